@@ -54,7 +54,7 @@ case "$1" in
     
     --unit)
         print_header "Unit Tests"
-        pytest tests/test_article_service.py tests/test_user_service.py tests/test_article_repository.py -v -s --tb=short | tee "$RESULTS_FILE"
+        pytest tests/test_article_service.py tests/test_user_service.py tests/test_article_repository.py tests/test_model_repository.py tests/test_inference_scheduler.py tests/test_shadow_scorer.py tests/test_executors.py tests/test_article_fetcher.py tests/test_cache.py tests/test_urls.py tests/test_supabase_client.py tests/test_auth.py tests/test_jwt_backends.py tests/test_cors.py tests/test_timing.py tests/test_features.py tests/test_lean_model.py tests/test_bulk_score.py tests/test_backfill_canonical_urls.py tests/test_admin_routes.py -v -s --tb=short | tee "$RESULTS_FILE"
         ;;
     
     --routes)
@@ -64,7 +64,17 @@ case "$1" in
     
     --repository)
         print_header "Repository Tests"
-        pytest tests/test_article_repository.py -v -s --tb=short | tee "$RESULTS_FILE"
+        pytest tests/test_article_repository.py tests/test_save_analysis_sql.py -v -s --tb=short | tee "$RESULTS_FILE"
+        ;;
+    
+    --benchmark)
+        print_header "Benchmarks"
+        pytest tests/test_benchmarks.py --benchmark-only --no-cov --tb=short | tee "$RESULTS_FILE"
+        ;;
+    
+    --load)
+        print_header "Local Load Tests"
+        pytest tests/test_load.py -m load -s --no-cov --tb=short | tee "$RESULTS_FILE"
         ;;
     
     --quick)
@@ -83,6 +93,8 @@ case "$1" in
         echo "  --unit          Run unit tests (services and repositories)"
         echo "  --routes        Run route integration tests"
         echo "  --repository    Run repository tests only"
+        echo "  --benchmark     Run local microbenchmarks"
+        echo "  --load          Run load tests against local stand-ins"
         echo "  --coverage      Generate coverage report"
         echo "  --quick         Fast test run with minimal output"
         echo ""
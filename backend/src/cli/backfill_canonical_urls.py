@@ -0,0 +1,76 @@
+"""
+Canonicalize Article.canonical_url for rows saved before URLs were canonicalized.
+
+    python -m src.cli.backfill_canonical_urls [--dry-run] [--batch-size 500]
+
+The 20261018000000_article_canonical_url.sql migration can only copy each
+row's submitted url into canonical_url. Until this runs, existing articles
+that differ from a new submission by `www.`, a trailing slash or tracking
+parameters aren't found by duplicate checks or shared analysis lookups.
+
+Only rows whose canonical_url is missing or still equal to the raw url are
+rewritten, so canonical URLs refined from a page's <link rel="canonical">
+are kept. Safe to run again; rows are read in id order in batches.
+Needs SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY.
+"""
+import argparse
+import asyncio
+import sys
+
+from ..lib import supabase_client
+from ..lib.urls import canonicalize_url
+from ..repository import article_repository
+
+
+def backfilled_canonical_url(row: dict):
+    """The canonical URL a row should get, or None if it needs no update"""
+    url = row.get("url")
+    if not url or row.get("canonical_url") not in (None, url):
+        return None
+    canonical_url = canonicalize_url(url)
+    return canonical_url if canonical_url != row.get("canonical_url") else None
+
+
+async def run(args) -> dict:
+    """Backfill every batch and return {"scanned", "updated"}"""
+    scanned = updated = 0
+    after_id = 0
+    try:
+        while True:
+            rows = await article_repository.get_urls_after(after_id, args.batch_size)
+            if not rows:
+                break
+            after_id = rows[-1]["id"]
+            scanned += len(rows)
+
+            updates = [(row["id"], canonical_url) for row in rows
+                       if (canonical_url := backfilled_canonical_url(row)) is not None]
+            if not args.dry_run:
+                await asyncio.gather(*[
+                    article_repository.set_canonical_url(article_id, canonical_url)
+                    for article_id, canonical_url in updates
+                ])
+            updated += len(updates)
+            print(f"Scanned {scanned} articles, {updated} to update", file=sys.stderr)
+    finally:
+        await supabase_client.aclose()
+
+    return {"scanned": scanned, "updated": updated}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Canonicalize Article.canonical_url for existing rows")
+    parser.add_argument("--batch-size", type=int, default=500, help="Rows read (and updated concurrently) per batch")
+    parser.add_argument("--dry-run", action="store_true", help="Only report how many rows would change")
+    args = parser.parse_args(argv)
+    if args.batch_size < 1:
+        parser.error("--batch-size must be at least 1")
+
+    summary = asyncio.run(run(args))
+    action = "would be updated" if args.dry_run else "updated"
+    print(f"{summary['updated']} of {summary['scanned']} articles {action}", file=sys.stderr)
+    return summary
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,347 @@
+"""
+Score large JSONL or CSV dumps of articles offline.
+
+    python -m src.cli.bulk_score articles.jsonl -o scores.jsonl [--resume]
+    python -m src.cli.bulk_score articles.csv -o scores.parquet --workers 8
+    echo '{"url": "https://example.com/story"}' | python -m src.cli.bulk_score - -o -
+
+Each input record may have "id", "url", "title" and "text", or raw "html"
+instead of text. Records with neither are downloaded from their url first.
+Records are read lazily and scored in fixed-size chunks on a process pool,
+with a bounded number of chunks in flight, so memory stays flat however
+large the input is. Results
+are written in input order: one JSON line per record, or one Parquet part
+file per --rows-per-file records in the output directory (needs pyarrow).
+
+After every durable write the next input offset goes to a checkpoint file
+(<output>.checkpoint.json), and --resume continues from there.
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import re
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from ..config import settings
+from ..lib.article_fetcher import article_fetcher
+from ..repository.model_repository import model_registry
+from ..services.article_service import ArticleService, parse_article_html
+
+# Parquet part files, named by the offset of their first row
+PART_FILE = re.compile(r"part-(\d{12})\.parquet")
+
+OUTPUT_FIELDS = (
+    "offset", "id", "url", "title", "source", "prediction",
+    "truthness_label", "truthness_score", "genre", "is_satire", "error",
+)
+
+
+def read_records(path: str, input_format: str, start: int = 0) -> Iterator[Tuple[int, dict]]:
+    """Yield (offset, record) for each input record from `start` on"""
+    stream = sys.stdin if path == "-" else open(path, newline="" if input_format == "csv" else None, encoding="utf-8")
+    try:
+        if input_format == "csv":
+            # Article bodies easily exceed the default 128 KiB field limit
+            csv.field_size_limit(sys.maxsize)
+            for offset, record in enumerate(csv.DictReader(stream)):
+                if offset >= start:
+                    yield offset, record
+        else:
+            offset = 0
+            for line in stream:
+                if not line.strip():
+                    continue
+                # Skipped records aren't parsed
+                if offset >= start:
+                    yield offset, json.loads(line)
+                offset += 1
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def chunked(records: Iterable, size: int) -> Iterator[list]:
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _source(url: Optional[str]) -> Optional[str]:
+    return (urlsplit(url).netloc or None) if url else None
+
+
+def score_chunk(chunk: List[Tuple[int, dict]], version: Optional[str] = None) -> List[dict]:
+    """
+    Parse downloaded pages and score a chunk of records in one model call.
+    Runs in the process pool, so it must stay a module-level function.
+    """
+    rows, articles = [], []
+    for offset, record in chunk:
+        url = record.get("url") or None
+        row = dict.fromkeys(OUTPUT_FIELDS)
+        row.update(offset=offset, id=None if record.get("id") in (None, "") else str(record["id"]), url=url)
+        rows.append(row)
+
+        article = {"title": record.get("title") or "", "text": record.get("text") or "", "source": _source(url)}
+        try:
+            if record.get("_fetch_error"):
+                raise ValueError(record["_fetch_error"])
+            if record.get("html"):
+                parsed = parse_article_html(url or "", record["html"], record.get("final_url"))
+                article.update(title=parsed["title"] or "", text=parsed["text"] or "", source=parsed["source"])
+            if not article["text"].strip():
+                raise ValueError("No text to score" if not url else f"No article text found at {url}")
+        except Exception as e:
+            row["error"] = str(e)
+            continue
+        row.update(title=article["title"] or None, source=article["source"])
+        articles.append((row, article))
+
+    if articles:
+        vectorizer, model = model_registry.get(version)
+        predictions = model.predict_proba(vectorizer.transform([ArticleService.article_text(a) for _, a in articles]))
+        for (row, article), prediction in zip(articles, predictions):
+            ai_result = ArticleService.build_analysis(article, {"prediction": prediction}, None)["ai_result"]
+            row.update(
+                prediction=[float(p) for p in prediction],
+                truthness_label=ai_result["truthness_label"],
+                truthness_score=float(ai_result["truthness_score"]),
+                genre=ai_result["genre"],
+                is_satire=ai_result["is_satire"],
+            )
+    return rows
+
+
+async def fetch_missing(chunk: List[Tuple[int, dict]], concurrency: int) -> List[Tuple[int, dict]]:
+    """Download the page of every record that has a url but no text"""
+    limit = asyncio.Semaphore(max(1, concurrency))
+
+    async def fetch(offset, record):
+        if (record.get("text") or "").strip() or record.get("html") or not record.get("url"):
+            return offset, record
+        async with limit:
+            try:
+                page = await article_fetcher.fetch(record["url"])
+                return offset, {**record, "html": page["html"], "final_url": page["final_url"]}
+            except Exception as e:
+                return offset, {**record, "_fetch_error": str(e)}
+
+    return await asyncio.gather(*[fetch(offset, record) for offset, record in chunk])
+
+
+class JsonlWriter:
+    """Appends one JSON line per row; every write is a checkpoint"""
+
+    def __init__(self, path: str, output_bytes: int = 0):
+        self.path = path
+        if path == "-":
+            self._file = sys.stdout.buffer
+            return
+        self._file = open(path, "r+b" if output_bytes else "wb")
+        # Drop anything written after the last checkpoint
+        self._file.truncate(output_bytes)
+        self._file.seek(output_bytes)
+
+    def write(self, rows: List[dict], next_offset: int) -> Optional[dict]:
+        self._file.write("".join(json.dumps(row) + "\n" for row in rows).encode("utf-8"))
+        self._file.flush()
+        if self.path == "-":
+            return None
+        os.fsync(self._file.fileno())
+        return {"offset": next_offset, "output_bytes": self._file.tell()}
+
+    def close(self, next_offset: int) -> Optional[dict]:
+        if self.path == "-":
+            return None
+        position = self._file.tell()
+        self._file.close()
+        return {"offset": next_offset, "output_bytes": position}
+
+
+class ParquetWriter:
+    """
+    Writes part-<first offset>.parquet files of up to `rows_per_file` rows
+    into a directory. A part is only renamed into place once complete, and
+    the checkpoint only moves when a part is.
+    """
+
+    def __init__(self, path: str, rows_per_file: int, offset: int = 0):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("Parquet output needs pyarrow (pip install pyarrow)")
+        self._pa, self._pq = pa, pq
+        self.schema = pa.schema([
+            ("offset", pa.int64()),
+            ("id", pa.string()),
+            ("url", pa.string()),
+            ("title", pa.string()),
+            ("source", pa.string()),
+            ("prediction", pa.list_(pa.float64())),
+            ("truthness_label", pa.string()),
+            ("truthness_score", pa.float64()),
+            ("genre", pa.string()),
+            ("is_satire", pa.bool_()),
+            ("error", pa.string()),
+        ])
+        self.path = path
+        self.rows_per_file = max(1, rows_per_file)
+        os.makedirs(path, exist_ok=True)
+        # Parts at or after the checkpoint are rewritten; other files are left alone
+        for name in os.listdir(path):
+            part = PART_FILE.fullmatch(name.removesuffix(".tmp"))
+            if part and (name.endswith(".tmp") or int(part.group(1)) >= offset):
+                os.remove(os.path.join(path, name))
+        self._writer = None
+        self._rows = 0
+
+    def _part_path(self, first_offset: int) -> str:
+        return os.path.join(self.path, f"part-{first_offset:012d}.parquet")
+
+    def write(self, rows: List[dict], next_offset: int) -> Optional[dict]:
+        if self._writer is None:
+            self._part = self._part_path(rows[0]["offset"])
+            self._writer = self._pq.ParquetWriter(f"{self._part}.tmp", self.schema)
+            self._rows = 0
+        self._writer.write_table(self._pa.Table.from_pylist(rows, schema=self.schema))
+        self._rows += len(rows)
+        if self._rows >= self.rows_per_file:
+            return self.close(next_offset)
+        return None
+
+    def close(self, next_offset: int) -> Optional[dict]:
+        if self._writer is None:
+            return None
+        self._writer.close()
+        os.replace(f"{self._part}.tmp", self._part)
+        self._writer = None
+        return {"offset": next_offset}
+
+
+def read_checkpoint(path: str) -> Optional[dict]:
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_checkpoint(path: str, checkpoint: dict):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+
+async def run(args) -> dict:
+    """Score args.input into args.output and return {"records", "errors", "seconds"}"""
+    parquet = args.output.endswith(".parquet")
+    checkpoint_path = args.checkpoint or f"{args.output}.checkpoint.json"
+    use_checkpoint = args.output != "-"
+
+    checkpoint = read_checkpoint(checkpoint_path) if args.resume and use_checkpoint else None
+    if checkpoint is not None and checkpoint.get("input") != args.input:
+        raise SystemExit(f"{checkpoint_path} belongs to {checkpoint.get('input')}, not {args.input}")
+    start = checkpoint["offset"] if checkpoint else 0
+
+    if parquet:
+        writer = ParquetWriter(args.output, args.rows_per_file, start)
+    else:
+        writer = JsonlWriter(args.output, checkpoint["output_bytes"] if checkpoint else 0)
+
+    def save(state):
+        if state is not None and use_checkpoint:
+            write_checkpoint(checkpoint_path, {"input": args.input, "output": args.output, **state})
+
+    # Load the model before the pool forks, so workers share it
+    model_registry.get(args.model_version)
+    executor = ProcessPoolExecutor(max_workers=args.workers) if args.workers > 0 else None
+    loop = asyncio.get_running_loop()
+    max_in_flight = max(1, args.workers) * 2
+    in_flight = deque()
+    records = errors = 0
+    start_time = time.perf_counter()
+
+    async def drain(keep: int):
+        nonlocal records, errors
+        while len(in_flight) > keep:
+            rows = await in_flight.popleft()
+            records += len(rows)
+            errors += sum(row["error"] is not None for row in rows)
+            save(writer.write(rows, rows[-1]["offset"] + 1))
+            if args.progress_every and records // args.progress_every != (records - len(rows)) // args.progress_every:
+                print(f"Scored {records} records ({errors} errors)", file=sys.stderr)
+
+    try:
+        for chunk in chunked(read_records(args.input, args.input_format, start), args.batch_size):
+            chunk = await fetch_missing(chunk, args.fetch_concurrency)
+            task = partial(score_chunk, chunk, args.model_version)
+            # Without a process pool the chunk is scored on the loop's default thread pool
+            in_flight.append(loop.run_in_executor(executor, task))
+            await drain(max_in_flight - 1)
+        await drain(0)
+        save(writer.close(start + records))
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+        await article_fetcher.aclose()
+
+    return {"records": records, "errors": errors, "seconds": round(time.perf_counter() - start_time, 3)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a JSONL or CSV dump of articles")
+    parser.add_argument("input", help="JSONL or CSV file, or - for JSONL on stdin")
+    parser.add_argument("-o", "--output", required=True, help="Output .jsonl file, .parquet directory, or - for stdout")
+    parser.add_argument("--format", dest="input_format", choices=("jsonl", "csv"), help="Input format (default: from the extension)")
+    parser.add_argument("--batch-size", type=int, default=256, help="Records per model call")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Scoring processes; 0 scores in a thread of this process")
+    parser.add_argument("--fetch-concurrency", type=int, default=settings.BATCH_FETCH_CONCURRENCY, help="Parallel downloads for records without text")
+    parser.add_argument("--model-version", default=None, help="Model version to score with (default: the active one)")
+    parser.add_argument("--rows-per-file", type=int, default=100_000, help="Rows per Parquet part file")
+    parser.add_argument("--checkpoint", default=None, help="Checkpoint file (default: <output>.checkpoint.json)")
+    parser.add_argument("--resume", action="store_true", help="Continue from the checkpoint")
+    parser.add_argument("--overwrite", action="store_true", help="Replace existing output")
+    parser.add_argument("--progress-every", type=int, default=10_000, help="Report progress every N records (0 disables)")
+    args = parser.parse_args(argv)
+
+    if args.input_format is None:
+        args.input_format = "csv" if args.input.lower().endswith(".csv") else "jsonl"
+    if args.batch_size < 1:
+        parser.error("--batch-size must be at least 1")
+    if args.output == "-" and args.resume:
+        parser.error("--resume needs an output file")
+    checkpoint_path = args.checkpoint or f"{args.output}.checkpoint.json"
+    if args.output != "-" and os.path.exists(args.output) and not (args.resume or args.overwrite):
+        parser.error(f"{args.output} exists; pass --resume to continue or --overwrite to replace it")
+    # Without a checkpoint there is nothing to resume from, and starting over would wipe the output
+    if args.resume and not args.overwrite and os.path.exists(args.output) and not os.path.exists(checkpoint_path):
+        parser.error(f"{args.output} exists but {checkpoint_path} doesn't; pass --overwrite to replace it")
+    if args.overwrite and not args.resume:
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+
+    summary = asyncio.run(run(args))
+    print(
+        f"Scored {summary['records']} records ({summary['errors']} errors) "
+        f"in {summary['seconds']}s",
+        file=sys.stderr,
+    )
+    return summary
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Export model/vectorizer.pkl and model/model.pkl as lean model artifacts.
+
+    python -m src.cli.export_model [--model-dir model] [--out model/lean]
+    python -m src.cli.export_model --version 2026-10-18 [--activate]
+
+Run from the backend directory. Serving picks the artifacts up from
+MODEL_ARTIFACT_DIR (default model/lean) when MODEL_FORMAT is auto or lean.
+With --version they become a checksummed version in MODEL_VERSIONS_DIR
+instead, which can be switched to at runtime with PUT /api/v1/admin/models/active
+(or right away with --activate).
+"""
+import argparse
+import os
+import pickle
+
+from ..lib.lean_model import export_artifacts
+from ..repository.model_repository import (
+    MODEL_DIR,
+    get_artifact_dir,
+    get_version_dir,
+    write_active_version,
+    write_manifest,
+)
+
+
+def load_pickle(path: str):
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export the pickled model as lean artifacts")
+    parser.add_argument("--model-dir", default=MODEL_DIR, help="Directory with vectorizer.pkl and model.pkl")
+    parser.add_argument("--out", default=None, help="Artifact directory (default: MODEL_ARTIFACT_DIR or model/lean)")
+    parser.add_argument("--version", default=None, help="Export as this model version in MODEL_VERSIONS_DIR")
+    parser.add_argument("--activate", action="store_true", help="Make the exported version the active one")
+    args = parser.parse_args(argv)
+    if args.activate and not args.version:
+        parser.error("--activate requires --version")
+
+    out_dir = get_version_dir(args.version) if args.version else args.out or get_artifact_dir()
+    if args.version and os.path.exists(out_dir):
+        parser.error(f"Model version {args.version} already exists")
+    vectorizer = load_pickle(os.path.join(args.model_dir, "vectorizer.pkl"))
+    model = load_pickle(os.path.join(args.model_dir, "model.pkl"))
+
+    meta = export_artifacts(vectorizer, model, out_dir)
+    if args.version:
+        write_manifest(out_dir, args.version)
+        if args.activate:
+            write_active_version(args.version)
+    size = sum(os.path.getsize(os.path.join(out_dir, name)) for name in os.listdir(out_dir))
+    print(
+        f"Exported {meta['classifier']} model with {meta['n_features']} features "
+        f"to {out_dir} ({size / 1024:.1f} KiB)"
+    )
+    if args.activate:
+        print(f"Activated model version {args.version}")
+
+
+if __name__ == "__main__":
+    main()
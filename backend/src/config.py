@@ -13,6 +13,89 @@ class Settings:
     SUPABASE_ANON_KEY: str = os.getenv("SUPABASE_ANON_KEY")
     SUPABASE_JWT_SECRET: str = os.getenv("SUPABASE_JWT_SECRET")
 
+    # JWT verification: "pyjwt" (HS256 secret plus RS256/ES256 via JWKS) or "jose" (HS256 only).
+    # JWKS_FILE loads signing keys from disk instead of JWKS_URL.
+    JWT_BACKEND: str = os.getenv("JWT_BACKEND", "pyjwt").lower()
+    JWKS_URL: str = os.getenv("JWKS_URL")
+    JWKS_FILE: str = os.getenv("JWKS_FILE")
+    JWKS_MIN_REFRESH_SECONDS: float = float(os.getenv("JWKS_MIN_REFRESH_SECONDS", "60"))
+
+    # Decoded JWT claims cached until each token expires (0 disables)
+    AUTH_CACHE_SIZE: int = int(os.getenv("AUTH_CACHE_SIZE", "10000"))
+
+    # Pooled HTTP connections to Supabase, shared by all requests in a worker
+    SUPABASE_MAX_CONNECTIONS: int = int(os.getenv("SUPABASE_MAX_CONNECTIONS", "32"))
+    SUPABASE_KEEPALIVE_EXPIRY: float = float(os.getenv("SUPABASE_KEEPALIVE_EXPIRY", "60"))
+    SUPABASE_TIMEOUT: float = float(os.getenv("SUPABASE_TIMEOUT", "10"))
+
+    # Worker pools for blocking I/O and CPU-bound parsing/inference (0 runs CPU work inline)
+    IO_POOL_SIZE: int = int(os.getenv("IO_POOL_SIZE", "32"))
+    CPU_POOL_SIZE: int = int(os.getenv("CPU_POOL_SIZE", "2"))
+
+    # Article downloads
+    FETCH_CONNECT_TIMEOUT: float = float(os.getenv("FETCH_CONNECT_TIMEOUT", "5"))
+    FETCH_READ_TIMEOUT: float = float(os.getenv("FETCH_READ_TIMEOUT", "10"))
+    FETCH_TOTAL_TIMEOUT: float = float(os.getenv("FETCH_TOTAL_TIMEOUT", "20"))
+    FETCH_MAX_BYTES: int = int(os.getenv("FETCH_MAX_BYTES", str(5 * 1024 * 1024)))
+    FETCH_MAX_CONNECTIONS: int = int(os.getenv("FETCH_MAX_CONNECTIONS", "100"))
+    FETCH_MAX_CONNECTIONS_PER_HOST: int = int(os.getenv("FETCH_MAX_CONNECTIONS_PER_HOST", "4"))
+    FETCH_MAX_TRACKED_HOSTS: int = int(os.getenv("FETCH_MAX_TRACKED_HOSTS", "1024"))
+
+    # URL-level analysis cache (CACHE_REDIS_URL adds a shared Redis tier)
+    ANALYSIS_CACHE_SIZE: int = int(os.getenv("ANALYSIS_CACHE_SIZE", "10000"))
+    ANALYSIS_CACHE_TTL_SECONDS: float = float(os.getenv("ANALYSIS_CACHE_TTL_SECONDS", "86400"))
+    CACHE_REDIS_URL: str = os.getenv("CACHE_REDIS_URL")
+
+    # GET /articles/{id} responses per owner: reused without a database call for
+    # ARTICLE_CACHE_FRESH_SECONDS, then served stale while reloaded in the background.
+    # Without Redis other workers only see a history clear on that reload, so the
+    # default fresh window is short
+    ARTICLE_CACHE_SIZE: int = int(os.getenv("ARTICLE_CACHE_SIZE", "5000"))
+    ARTICLE_CACHE_FRESH_SECONDS: float = float(
+        os.getenv("ARTICLE_CACHE_FRESH_SECONDS", "300" if os.getenv("CACHE_REDIS_URL") else "30")
+    )
+    ARTICLE_CACHE_TTL_SECONDS: float = float(os.getenv("ARTICLE_CACHE_TTL_SECONDS", "86400"))
+
+    # History pagination
+    HISTORY_PAGE_SIZE: int = int(os.getenv("HISTORY_PAGE_SIZE", "50"))
+    HISTORY_MAX_PAGE_SIZE: int = int(os.getenv("HISTORY_MAX_PAGE_SIZE", "100"))
+
+    # Batch analysis
+    BATCH_MAX_URLS: int = int(os.getenv("BATCH_MAX_URLS", "50"))
+    BATCH_FETCH_CONCURRENCY: int = int(os.getenv("BATCH_FETCH_CONCURRENCY", "8"))
+
+    # Model files: "auto" serves the lean artifacts in MODEL_ARTIFACT_DIR when they
+    # exist and falls back to the pickles; "lean" or "pickle" forces one format
+    MODEL_FORMAT: str = os.getenv("MODEL_FORMAT", "auto").lower()
+    MODEL_ARTIFACT_DIR: str = os.getenv("MODEL_ARTIFACT_DIR")
+    # Memory-map the lean artifacts so all workers on a host share one copy
+    MODEL_MMAP: bool = os.getenv("MODEL_MMAP", "True").lower() == "true"
+
+    # Versioned models for hot swaps (see model_repository). Workers check the
+    # ACTIVE file every MODEL_RELOAD_INTERVAL_SECONDS (0 disables the check).
+    MODEL_VERSIONS_DIR: str = os.getenv("MODEL_VERSIONS_DIR")
+    MODEL_MAX_LOADED_VERSIONS: int = int(os.getenv("MODEL_MAX_LOADED_VERSIONS", "2"))
+    MODEL_RELOAD_INTERVAL_SECONDS: float = float(os.getenv("MODEL_RELOAD_INTERVAL_SECONDS", "10"))
+
+    # Shadow scoring: a sample of requests is also scored by this model
+    # version in the background and compared with the served prediction
+    SHADOW_MODEL_VERSION: str = os.getenv("SHADOW_MODEL_VERSION")
+    SHADOW_SAMPLE_RATE: float = float(os.getenv("SHADOW_SAMPLE_RATE", "0.1"))
+    SHADOW_QUEUE_SIZE: int = int(os.getenv("SHADOW_QUEUE_SIZE", "100"))
+    SHADOW_LOG_FILE: str = os.getenv("SHADOW_LOG_FILE", "logs/shadow.jsonl")
+    # Processes of the shadow model's own pool (0 scores in the shadow thread)
+    SHADOW_POOL_SIZE: int = int(os.getenv("SHADOW_POOL_SIZE", "1"))
+
+    # Send per-stage request timings in a Server-Timing header (/metrics is always on)
+    SERVER_TIMING_ENABLED: bool = os.getenv("SERVER_TIMING_ENABLED", "True").lower() == "true"
+
+    # Admin API (model versions); disabled unless a token is set
+    ADMIN_API_TOKEN: str = os.getenv("ADMIN_API_TOKEN")
+
+    # Micro-batching of concurrent single-article inference (0 ms disables it)
+    INFERENCE_BATCH_WINDOW_MS: float = float(os.getenv("INFERENCE_BATCH_WINDOW_MS", "5"))
+    INFERENCE_MAX_BATCH_SIZE: int = int(os.getenv("INFERENCE_MAX_BATCH_SIZE", "32"))
+
     def __init__(self):
         # Skip validation in testing mode
         if self.TESTING:
@@ -0,0 +1,201 @@
+"""
+Async HTML fetcher for article pages.
+
+Uses one pooled httpx.AsyncClient per event loop so keep-alive connections
+are reused across requests, with HTTP/2 when the h2 package is installed.
+Every fetch has connect/read timeouts plus an overall deadline, a cap on
+concurrent connections per host, and a cap on the decompressed body size
+that is enforced while streaming.
+"""
+import asyncio
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from ..config import settings
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+USER_AGENT = "Mozilla/5.0 (compatible; ArticleVerify/1.0; +https://articleverify.net)"
+
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml", "text/plain", "application/xml", "text/xml")
+
+
+class FetchError(Exception):
+    """Raised when an article page can't be downloaded"""
+
+
+class ArticleTooLargeError(FetchError):
+    """Raised when an article page is bigger than the configured limit"""
+
+
+class _HostLimit:
+    """Connection slots of one host, and how many fetches are using or awaiting them"""
+
+    __slots__ = ("semaphore", "users")
+
+    def __init__(self, slots: int):
+        self.semaphore = asyncio.Semaphore(slots)
+        self.users = 0
+
+
+class ArticleFetcher:
+    def __init__(
+        self,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        max_bytes: int = None,
+        connect_timeout: float = None,
+        read_timeout: float = None,
+        total_timeout: float = None,
+        max_connections: int = None,
+        max_connections_per_host: int = None,
+        max_tracked_hosts: int = None,
+    ):
+        """
+        Args:
+            transport: Optional httpx transport, e.g. httpx.MockTransport in tests
+            Remaining arguments default to the FETCH_* values in Settings
+        """
+        self._transport = transport
+        self.max_bytes = max_bytes or settings.FETCH_MAX_BYTES
+        self.connect_timeout = connect_timeout or settings.FETCH_CONNECT_TIMEOUT
+        self.read_timeout = read_timeout or settings.FETCH_READ_TIMEOUT
+        self.total_timeout = total_timeout or settings.FETCH_TOTAL_TIMEOUT
+        self.max_connections = max_connections or settings.FETCH_MAX_CONNECTIONS
+        self.max_connections_per_host = max_connections_per_host or settings.FETCH_MAX_CONNECTIONS_PER_HOST
+        self.max_tracked_hosts = max_tracked_hosts or settings.FETCH_MAX_TRACKED_HOSTS
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop = None
+        # Least recently used first; bounded by max_tracked_hosts
+        self._host_limits: "OrderedDict[str, _HostLimit]" = OrderedDict()
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # An AsyncClient's connections belong to the loop that opened them
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                transport=self._transport,
+                http2=HTTP2_AVAILABLE and self._transport is None,
+                follow_redirects=True,
+                max_redirects=5,
+                timeout=httpx.Timeout(
+                    self.read_timeout,
+                    connect=self.connect_timeout,
+                    pool=self.connect_timeout,
+                ),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+                headers={
+                    "User-Agent": USER_AGENT,
+                    "Accept": "text/html,application/xhtml+xml;q=0.9,*/*;q=0.8",
+                    "Accept-Encoding": "gzip, deflate" + (", br" if _brotli_available() else ""),
+                },
+            )
+            self._client_loop = loop
+            self._host_limits = OrderedDict()
+        return self._client
+
+    @asynccontextmanager
+    async def _host_limit(self, url: str):
+        """Hold one of the URL's host's connection slots"""
+        host = urlsplit(url).netloc.lower()
+        limit = self._host_limits.get(host)
+        if limit is None:
+            limit = self._host_limits[host] = _HostLimit(self.max_connections_per_host)
+            self._evict_idle_hosts()
+        self._host_limits.move_to_end(host)
+
+        limit.users += 1
+        try:
+            async with limit.semaphore:
+                yield
+        finally:
+            limit.users -= 1
+
+    def _evict_idle_hosts(self):
+        # A host with fetches in flight keeps its semaphore, or a new one
+        # would let more than max_connections_per_host through
+        excess = len(self._host_limits) - self.max_tracked_hosts
+        if excess <= 0:
+            return
+        idle = [host for host, limit in self._host_limits.items() if limit.users == 0]
+        for host in idle[:excess]:
+            del self._host_limits[host]
+
+    async def fetch(self, url: str) -> dict:
+        """
+        Download a page and return {"url", "final_url", "status_code", "html"}.
+        Raises FetchError on network errors, timeouts, non-2xx responses,
+        non-HTML content and bodies larger than max_bytes.
+        """
+        client = self._get_client()
+        try:
+            async with asyncio.timeout(self.total_timeout):
+                async with self._host_limit(url):
+                    async with client.stream("GET", url) as response:
+                        return await self._read(url, response)
+        except TimeoutError:
+            raise FetchError(f"Timed out after {self.total_timeout}s fetching {url}")
+        except httpx.HTTPError as e:
+            raise FetchError(f"Failed to fetch {url}: {e}")
+
+    async def _read(self, url: str, response: httpx.Response) -> dict:
+        if response.status_code >= 400:
+            raise FetchError(f"{url} returned HTTP {response.status_code}")
+
+        content_type = response.headers.get("content-type", "").split(";")[0].strip().lower()
+        if content_type and content_type not in HTML_CONTENT_TYPES:
+            raise FetchError(f"{url} is not an HTML page ({content_type})")
+
+        content_length = response.headers.get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > self.max_bytes:
+            raise ArticleTooLargeError(f"{url} is larger than {self.max_bytes} bytes")
+
+        # aiter_bytes decompresses incrementally, so the cap also guards
+        # against small compressed bodies that expand to huge pages
+        chunks = []
+        size = 0
+        async for chunk in response.aiter_bytes():
+            size += len(chunk)
+            if size > self.max_bytes:
+                raise ArticleTooLargeError(f"{url} is larger than {self.max_bytes} bytes")
+            chunks.append(chunk)
+
+        html = b"".join(chunks).decode(response.encoding or "utf-8", errors="replace")
+        return {
+            "url": url,
+            "final_url": str(response.url),
+            "status_code": response.status_code,
+            "html": html,
+        }
+
+    async def aclose(self):
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+        self._client_loop = None
+
+
+def _brotli_available() -> bool:
+    try:
+        import brotli  # noqa: F401
+        return True
+    except ImportError:
+        try:
+            import brotlicffi  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+
+article_fetcher = ArticleFetcher()
@@ -0,0 +1,230 @@
+"""
+In-process LRU/TTL cache with an optional shared backend.
+
+LRUCache is a bounded, thread-safe in-memory cache. TieredCache puts it in
+front of a shared backend (Redis, when CACHE_REDIS_URL is set) so workers
+and instances can reuse each other's entries. StaleWhileRevalidateCache
+serves entries past their freshness window while reloading them in the
+background.
+"""
+import asyncio
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from .executors import run_io
+
+
+class LRUCache:
+    def __init__(self, max_size: int = 1024, ttl_seconds: Optional[float] = None):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Any, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl_seconds: Optional[float] = None):
+        ttl = ttl_seconds if ttl_seconds is not None else self.ttl_seconds
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def delete_where(self, predicate) -> int:
+        """Delete every entry whose key matches `predicate`; returns how many"""
+        with self._lock:
+            keys = [key for key in self._entries if predicate(key)]
+            for key in keys:
+                del self._entries[key]
+        return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0,
+        }
+
+
+class RedisCache:
+    """Shared cache backend storing JSON values in Redis"""
+
+    def __init__(self, url: str, prefix: str, ttl_seconds: Optional[float] = None):
+        # redis is an optional dependency, only needed when a shared cache is configured
+        import redis
+
+        self._client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self.prefix = prefix
+        self.ttl_seconds = ttl_seconds
+
+    def get(self, key, default=None):
+        raw = self._client.get(f"{self.prefix}{key}")
+        return json.loads(raw) if raw is not None else default
+
+    def set(self, key, value, ttl_seconds: Optional[float] = None):
+        ttl = ttl_seconds if ttl_seconds is not None else self.ttl_seconds
+        self._client.set(f"{self.prefix}{key}", json.dumps(value), ex=int(ttl) if ttl else None)
+
+    def delete(self, key):
+        self._client.delete(f"{self.prefix}{key}")
+
+    def incr(self, key) -> int:
+        """Atomically increment an integer value, restarting its TTL"""
+        name = f"{self.prefix}{key}"
+        pipeline = self._client.pipeline()
+        pipeline.incr(name)
+        if self.ttl_seconds:
+            pipeline.expire(name, int(self.ttl_seconds))
+        return pipeline.execute()[0]
+
+
+class TieredCache:
+    """Local LRU cache in front of an optional shared backend"""
+
+    def __init__(self, local: LRUCache, shared=None):
+        self.local = local
+        self.shared = shared
+
+    async def get(self, key):
+        value = self.local.get(key)
+        if value is not None or self.shared is None:
+            return value
+
+        try:
+            value = await run_io(self.shared.get, key)
+        except Exception as e:
+            # The shared cache is an optimization; never fail a request over it
+            print(f"Warning: Shared cache read failed: {e}")
+            return None
+
+        if value is not None:
+            self.local.set(key, value)
+        return value
+
+    async def set(self, key, value):
+        self.local.set(key, value)
+        if self.shared is not None:
+            try:
+                await run_io(self.shared.set, key, value)
+            except Exception as e:
+                print(f"Warning: Shared cache write failed: {e}")
+
+    async def delete(self, key):
+        self.local.delete(key)
+        if self.shared is not None:
+            try:
+                await run_io(self.shared.delete, key)
+            except Exception as e:
+                print(f"Warning: Shared cache delete failed: {e}")
+
+    def stats(self) -> dict:
+        stats = self.local.stats()
+        stats["shared_backend"] = type(self.shared).__name__ if self.shared is not None else None
+        return stats
+
+
+class StaleWhileRevalidateCache:
+    """
+    In-memory cache of loaded values. An entry is served as is for
+    `fresh_seconds`; after that it is still served, while one background
+    reload per key refreshes it, until it expires after `ttl_seconds`.
+    """
+
+    def __init__(self, max_size: int = 1024, fresh_seconds: float = 60, ttl_seconds: Optional[float] = None):
+        self.fresh_seconds = fresh_seconds
+        self.local = LRUCache(max_size, ttl_seconds)
+        self._revalidating = {}
+        # Bumped by invalidate() so loads that started before it aren't stored
+        self._generation = 0
+        self.revalidations = 0
+        self.revalidation_failures = 0
+
+    async def get_or_load(self, key, load):
+        """Return the cached value for `key`, awaiting `load()` on a miss"""
+        entry = self.local.get(key)
+        if entry is None:
+            generation = self._generation
+            value = await load()
+            self._store(key, value, generation)
+            return value
+
+        value, stored_at = entry
+        if time.monotonic() - stored_at > self.fresh_seconds and key not in self._revalidating:
+            self._revalidating[key] = asyncio.create_task(self._revalidate(key, load))
+        return value
+
+    async def _revalidate(self, key, load):
+        generation = self._generation
+        try:
+            self._store(key, await load(), generation)
+            self.revalidations += 1
+        except Exception as e:
+            # Drop the entry so the next request loads it and gets the error
+            self.local.delete(key)
+            self.revalidation_failures += 1
+            print(f"Warning: Cache revalidation failed for {key}: {e}")
+        finally:
+            self._revalidating.pop(key, None)
+
+    def _store(self, key, value, generation: int):
+        if generation == self._generation:
+            self.local.set(key, (value, time.monotonic()))
+
+    def invalidate(self, predicate) -> int:
+        """Drop every entry whose key matches `predicate`"""
+        self._generation += 1
+        return self.local.delete_where(predicate)
+
+    def clear(self):
+        self._generation += 1
+        self.local.clear()
+
+    def stats(self) -> dict:
+        stats = self.local.stats()
+        stats.update(
+            fresh_seconds=self.fresh_seconds,
+            ttl_seconds=self.local.ttl_seconds,
+            revalidating=len(self._revalidating),
+            revalidations=self.revalidations,
+            revalidation_failures=self.revalidation_failures,
+        )
+        return stats
@@ -0,0 +1,164 @@
+"""
+Shared worker pools for work that must not run on the event loop.
+
+Blocking I/O (e.g. the synchronous Redis client) goes to a bounded
+thread pool. CPU-bound work (HTML parsing, model inference) goes to a
+process pool so it doesn't hold the GIL of the serving process. Pool
+sizes come from Settings; CPU_POOL_SIZE=0 runs CPU work in the calling
+thread instead. Shadow scoring has a pool of its own, so a candidate model
+never takes capacity from live inference.
+"""
+import asyncio
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Optional
+
+from ..config import settings
+
+_lock = threading.Lock()
+_io_executor: Optional[ThreadPoolExecutor] = None
+_cpu_executor: Optional[ProcessPoolExecutor] = None
+_shadow_executor: Optional[ProcessPoolExecutor] = None
+_pid = None
+
+# Shadow workers yield the CPU to live inference when the host is busy
+SHADOW_NICENESS = 10
+
+
+def _check_pid():
+    # Pools created before a fork (gunicorn preload) can't be used by the
+    # child, so each worker process lazily builds its own
+    global _io_executor, _cpu_executor, _shadow_executor, _pid
+    if _pid != os.getpid():
+        _io_executor = None
+        _cpu_executor = None
+        _shadow_executor = None
+        _pid = os.getpid()
+
+
+def get_io_executor() -> ThreadPoolExecutor:
+    global _io_executor
+    with _lock:
+        _check_pid()
+        if _io_executor is None:
+            _io_executor = ThreadPoolExecutor(
+                max_workers=settings.IO_POOL_SIZE,
+                thread_name_prefix="io-worker"
+            )
+        return _io_executor
+
+
+def get_cpu_executor() -> Optional[ProcessPoolExecutor]:
+    global _cpu_executor
+    if settings.CPU_POOL_SIZE <= 0:
+        return None
+
+    with _lock:
+        _check_pid()
+        if _cpu_executor is None:
+            _cpu_executor = ProcessPoolExecutor(max_workers=settings.CPU_POOL_SIZE)
+        return _cpu_executor
+
+
+def get_shadow_executor() -> Optional[ProcessPoolExecutor]:
+    """
+    Process pool for shadow scoring, or None when shadow scoring is off or
+    SHADOW_POOL_SIZE=0 (then it runs in the shadow scorer's thread).
+    """
+    global _shadow_executor
+    if not settings.SHADOW_MODEL_VERSION or settings.SHADOW_POOL_SIZE <= 0:
+        return None
+
+    with _lock:
+        _check_pid()
+        if _shadow_executor is None:
+            _shadow_executor = ProcessPoolExecutor(
+                max_workers=settings.SHADOW_POOL_SIZE,
+                initializer=os.nice,
+                initargs=(SHADOW_NICENESS,)
+            )
+        return _shadow_executor
+
+
+async def run_io(func, *args, **kwargs):
+    """Run a blocking function in the I/O thread pool and await its result"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_io_executor(), partial(func, *args, **kwargs))
+
+
+async def run_cpu(func, *args):
+    """
+    Run a CPU-bound function in the process pool and await its result.
+    `func` and its arguments must be picklable.
+    """
+    cpu_executor = get_cpu_executor()
+    if cpu_executor is None:
+        return await run_io(func, *args)
+    return await asyncio.wrap_future(cpu_executor.submit(func, *args))
+
+
+def call_cpu(func, *args):
+    """
+    Blocking counterpart of run_cpu for code that already runs in a worker
+    thread. Falls back to calling `func` directly when there is no process pool.
+    """
+    cpu_executor = get_cpu_executor()
+    if cpu_executor is None:
+        return func(*args)
+    return cpu_executor.submit(func, *args).result()
+
+
+def submit_cpu(func, *args) -> Future:
+    """
+    Non-blocking counterpart of call_cpu: submit `func` to the process pool
+    and return its future. Without a pool `func` runs in the calling thread
+    and the returned future is already done.
+    """
+    cpu_executor = get_cpu_executor()
+    if cpu_executor is not None:
+        return cpu_executor.submit(func, *args)
+
+    future = Future()
+    try:
+        future.set_result(func(*args))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+
+def call_shadow(func, *args):
+    """Blocking call of `func` in the shadow pool, or in the calling thread without one"""
+    shadow_executor = get_shadow_executor()
+    if shadow_executor is None:
+        return func(*args)
+    return shadow_executor.submit(func, *args).result()
+
+
+def start():
+    """
+    Create the pools and fork the CPU workers up front, before other threads
+    exist, so the workers inherit the already loaded model.
+    """
+    get_io_executor()
+    cpu_executor = get_cpu_executor()
+    if cpu_executor is not None:
+        for future in [cpu_executor.submit(os.getpid) for _ in range(settings.CPU_POOL_SIZE)]:
+            future.result()
+    shadow_executor = get_shadow_executor()
+    if shadow_executor is not None:
+        for future in [shadow_executor.submit(os.getpid) for _ in range(settings.SHADOW_POOL_SIZE)]:
+            future.result()
+
+
+def shutdown():
+    global _io_executor, _cpu_executor, _shadow_executor
+    with _lock:
+        if _pid == os.getpid():
+            for executor in (_io_executor, _cpu_executor, _shadow_executor):
+                if executor is not None:
+                    executor.shutdown(wait=False, cancel_futures=True)
+        _io_executor = None
+        _cpu_executor = None
+        _shadow_executor = None
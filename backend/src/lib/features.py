@@ -0,0 +1,173 @@
+"""
+TF-IDF feature extraction without the per-call overhead of TfidfVectorizer.
+
+The fitted vocabulary and idf weights are copied out of the pickled
+vectorizer once. Each text is tokenized with one regex scan and mapped to
+columns with C-level dict lookups; the whole batch is then counted with a
+single NumPy pass that produces the CSR matrix directly. The vocabulary can
+also be a SortedVocabulary over memory-mapped arrays, so every worker reads
+the same physical pages instead of holding its own dict. The output matches
+TfidfVectorizer.transform for the configurations it accepts (word tokens,
+unigrams, no custom preprocessing); see `from_vectorizer`.
+"""
+import re
+from itertools import chain
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+import scipy.sparse as sp
+
+DEFAULT_TOKEN_PATTERN = r"(?u)\b\w\w+\b"
+
+
+class SortedVocabulary:
+    """
+    Term to column mapping stored as two arrays: the terms in sorted order
+    and the column of each. Tokens are looked up in bulk with
+    np.searchsorted, so the arrays can stay memory-mapped and shared.
+    """
+
+    def __init__(self, terms: np.ndarray, columns: np.ndarray):
+        self.terms = terms
+        self.columns = columns
+        # One character wider than the longest term, so a longer token can't
+        # be truncated into a match when it is cast to the array's dtype
+        self._token_dtype = np.dtype(f"<U{terms.dtype.itemsize // 4 + 1}")
+
+    @classmethod
+    def from_dict(cls, vocabulary: Dict[str, int]) -> "SortedVocabulary":
+        terms = sorted(vocabulary)
+        return cls(np.array(terms), np.array([vocabulary[term] for term in terms], dtype=np.int32))
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def lookup(self, tokens: List[str]) -> np.ndarray:
+        """Column of each token, or -1 for tokens outside the vocabulary"""
+        if not tokens or not len(self.terms):
+            return np.full(len(tokens), -1, dtype=np.int64)
+        tokens = np.array(tokens, dtype=self._token_dtype)
+        positions = np.searchsorted(self.terms, tokens)
+        np.minimum(positions, len(self.terms) - 1, out=positions)
+        found = self.terms[positions] == tokens
+        return np.where(found, self.columns[positions], -1).astype(np.int64)
+
+
+class TfidfFeatureExtractor:
+    def __init__(
+        self,
+        vocabulary: Union[Dict[str, int], SortedVocabulary],
+        idf: Optional[np.ndarray],
+        token_pattern: str = DEFAULT_TOKEN_PATTERN,
+        lowercase: bool = True,
+        norm: Optional[str] = "l2",
+        sublinear_tf: bool = False,
+        dtype=np.float64,
+    ):
+        self.vocabulary = vocabulary if isinstance(vocabulary, SortedVocabulary) else dict(vocabulary)
+        self.n_features = len(self.vocabulary)
+        self.idf = None if idf is None else np.asanyarray(idf, dtype=np.float64)
+        self.token_pattern = token_pattern
+        # The default pattern only matches maximal runs of 2+ word characters,
+        # so its \b assertions are redundant and just slow the scan down
+        self._tokenizer = re.compile(r"\w\w+" if token_pattern == DEFAULT_TOKEN_PATTERN else token_pattern)
+        self.lowercase = lowercase
+        self.norm = norm
+        self.sublinear_tf = sublinear_tf
+        self.dtype = dtype
+
+    @classmethod
+    def from_vectorizer(cls, vectorizer) -> "TfidfFeatureExtractor":
+        """
+        Copy the fitted state out of a TfidfVectorizer.
+        Raises ValueError for settings this extractor doesn't reproduce.
+        """
+        params = vectorizer.get_params()
+        unsupported = {
+            "analyzer": params["analyzer"] != "word",
+            "ngram_range": tuple(params["ngram_range"]) != (1, 1),
+            "preprocessor": params["preprocessor"] is not None,
+            "tokenizer": params["tokenizer"] is not None,
+            "strip_accents": params["strip_accents"] is not None,
+            "binary": params["binary"],
+            "input": params["input"] != "content",
+            "norm": params["norm"] not in ("l1", "l2", None),
+        }
+        unsupported = [name for name, failed in unsupported.items() if failed]
+        if unsupported:
+            raise ValueError(f"Unsupported TfidfVectorizer settings: {', '.join(unsupported)}")
+
+        return cls(
+            vocabulary=vectorizer.vocabulary_,
+            idf=vectorizer.idf_ if params["use_idf"] else None,
+            token_pattern=params["token_pattern"],
+            lowercase=params["lowercase"],
+            norm=params["norm"],
+            sublinear_tf=params["sublinear_tf"],
+            dtype=params["dtype"],
+        )
+
+    def _columns(self, texts: Iterable[str]) -> Tuple[int, np.ndarray, np.ndarray]:
+        """(row count, row of each known token, column of each known token)"""
+        findall = self._tokenizer.findall
+        lowercase = self.lowercase
+
+        if isinstance(self.vocabulary, SortedVocabulary):
+            tokens = [findall(text.lower() if lowercase else text) for text in texts]
+            lengths = np.fromiter(map(len, tokens), dtype=np.int64, count=len(tokens))
+            columns = self.vocabulary.lookup(list(chain.from_iterable(tokens)))
+            rows = np.repeat(np.arange(len(tokens), dtype=np.int64), lengths)
+            known = columns >= 0
+            return len(tokens), rows[known], columns[known]
+
+        # Out-of-vocabulary tokens (including stop words, which were never
+        # added to the vocabulary) are dropped
+        lookup = self.vocabulary.get
+        columns = [
+            [column for column in map(lookup, findall(text.lower() if lowercase else text)) if column is not None]
+            for text in texts
+        ]
+        lengths = np.fromiter(map(len, columns), dtype=np.int64, count=len(columns))
+        flat = np.fromiter(chain.from_iterable(columns), dtype=np.int64, count=int(lengths.sum()))
+        return len(columns), np.repeat(np.arange(len(columns), dtype=np.int64), lengths), flat
+
+    def _count(self, texts: Iterable[str]) -> sp.csr_matrix:
+        """Term counts as a CSR matrix with sorted column indices"""
+        n_rows, rows, columns = self._columns(texts)
+
+        # One key per (row, column); np.unique sorts them in CSR order and counts repeats
+        keys, counts = np.unique(rows * self.n_features + columns, return_counts=True)
+        row_ids, indices = np.divmod(keys, self.n_features)
+
+        indptr = np.zeros(n_rows + 1, dtype=np.int64)
+        np.cumsum(np.bincount(row_ids, minlength=n_rows), out=indptr[1:])
+        return sp.csr_matrix(
+            (counts.astype(np.float64), indices.astype(np.int32), indptr),
+            shape=(n_rows, self.n_features),
+        )
+
+    def transform(self, texts: Iterable[str]) -> sp.csr_matrix:
+        """TF-IDF features for a batch of texts, one row per text"""
+        if isinstance(texts, str):
+            raise ValueError("Iterable over raw text documents expected, string object received.")
+
+        matrix = self._count(texts)
+        data = matrix.data
+        if self.sublinear_tf:
+            np.log(data, out=data)
+            data += 1
+        if self.idf is not None:
+            data *= self.idf[matrix.indices]
+
+        if self.norm is not None and data.size:
+            lengths = np.diff(matrix.indptr)
+            starts = matrix.indptr[:-1][lengths > 0]
+            if self.norm == "l2":
+                row_norms = np.sqrt(np.add.reduceat(data * data, starts))
+            else:
+                row_norms = np.add.reduceat(np.abs(data), starts)
+            data /= np.repeat(row_norms, lengths[lengths > 0])
+
+        if self.dtype != np.float64:
+            matrix = matrix.astype(self.dtype)
+        return matrix
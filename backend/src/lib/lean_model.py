@@ -0,0 +1,188 @@
+"""
+Lean model artifacts: the fitted TF-IDF vectorizer and classifier exported as
+plain arrays, so serving needs NumPy (and scipy.sparse for the feature
+matrix) but never imports scikit-learn or unpickles estimator objects.
+
+The arrays are memory-mapped read-only by default. The OS keeps one copy of
+each file in the page cache and every worker on the host maps those same
+pages, so adding workers doesn't add copies of the vocabulary or weights.
+
+An artifact directory holds one .npy file per array plus meta.json:
+
+    meta.json               format version, feature settings, classifier kind
+    vocabulary_terms.npy    vocabulary terms, sorted
+    vocabulary_columns.npy  column of each sorted term
+    idf.npy                 idf weight per column (absent when use_idf=False)
+    coef.npy                classifier weights, one row per class score
+    intercept.npy           classifier bias per class score
+    classes.npy             class labels in predict_proba column order
+
+Export with `python -m src.cli.export_model`.
+"""
+import json
+import os
+from typing import Optional, Tuple
+
+import numpy as np
+
+from .features import SortedVocabulary, TfidfFeatureExtractor
+
+FORMAT_VERSION = 1
+META_FILE = "meta.json"
+
+# Classifier kinds and how their scores become probabilities
+LOGISTIC = "logistic"          # binary logistic regression
+MULTINOMIAL = "multinomial"    # softmax over class scores
+OVR = "ovr"                    # one-vs-rest sigmoids, normalized
+NAIVE_BAYES = "naive_bayes"    # joint log likelihood, normalized
+
+
+class LinearClassifier:
+    """predict_proba for linear models and multinomial naive Bayes from exported weights"""
+
+    def __init__(self, kind: str, coef: np.ndarray, intercept: np.ndarray, classes: np.ndarray):
+        if kind not in (LOGISTIC, MULTINOMIAL, OVR, NAIVE_BAYES):
+            raise ValueError(f"Unknown classifier kind {kind!r}")
+        self.kind = kind
+        self.coef = coef
+        self.intercept = intercept
+        self.classes_ = classes
+
+    def decision_function(self, X) -> np.ndarray:
+        scores = np.asarray(X @ self.coef.T) + self.intercept
+        return scores.ravel() if self.kind == LOGISTIC else scores
+
+    def predict_proba(self, X) -> np.ndarray:
+        scores = self.decision_function(X)
+        if self.kind == LOGISTIC:
+            positive = _expit(scores)
+            return np.stack([1 - positive, positive], axis=1)
+        if self.kind == OVR:
+            probabilities = _expit(scores)
+            totals = probabilities.sum(axis=1, keepdims=True)
+            return np.divide(probabilities, totals, out=np.full_like(probabilities, 1 / scores.shape[1]), where=totals > 0)
+        return _softmax(scores)
+
+
+def _expit(x: np.ndarray) -> np.ndarray:
+    # exp overflows to inf for very negative scores, which still gives 0
+    with np.errstate(over="ignore"):
+        return 1 / (1 + np.exp(-x))
+
+
+def _softmax(x: np.ndarray) -> np.ndarray:
+    shifted = np.exp(x - x.max(axis=1, keepdims=True))
+    return shifted / shifted.sum(axis=1, keepdims=True)
+
+
+def classifier_arrays(model) -> Tuple[str, np.ndarray, np.ndarray]:
+    """(kind, coef, intercept) for a fitted LogisticRegression or MultinomialNB"""
+    name = type(model).__name__
+    if name == "MultinomialNB":
+        return NAIVE_BAYES, model.feature_log_prob_, model.class_log_prior_
+    if name != "LogisticRegression":
+        raise ValueError(f"Can't export a {name}; only LogisticRegression and MultinomialNB are supported")
+
+    if len(model.classes_) <= 2:
+        kind = LOGISTIC
+    elif getattr(model, "multi_class", "auto") == "ovr" or model.solver == "liblinear":
+        # sklearn scores multiclass liblinear models one-vs-rest, even with multi_class="auto"
+        kind = OVR
+    else:
+        kind = MULTINOMIAL
+    return kind, model.coef_, model.intercept_
+
+
+def export_artifacts(vectorizer, model, out_dir: str) -> dict:
+    """Write the lean artifacts for a fitted vectorizer and classifier, returning meta.json"""
+    extractor = TfidfFeatureExtractor.from_vectorizer(vectorizer)
+    kind, coef, intercept = classifier_arrays(model)
+    if coef.shape[1] != extractor.n_features:
+        raise ValueError(f"Model expects {coef.shape[1]} features, vectorizer has {extractor.n_features}")
+
+    classes = np.asarray(model.classes_)
+    if classes.dtype == object:
+        classes = classes.astype(str)
+
+    vocabulary = SortedVocabulary.from_dict(extractor.vocabulary)
+    arrays = {
+        "vocabulary_terms": vocabulary.terms,
+        "vocabulary_columns": vocabulary.columns,
+        "coef": np.ascontiguousarray(coef, dtype=np.float64),
+        "intercept": np.ascontiguousarray(intercept, dtype=np.float64),
+        "classes": classes,
+    }
+    if extractor.idf is not None:
+        arrays["idf"] = extractor.idf
+
+    meta = {
+        "format_version": FORMAT_VERSION,
+        "n_features": extractor.n_features,
+        "features": {
+            "token_pattern": extractor.token_pattern,
+            "lowercase": extractor.lowercase,
+            "norm": extractor.norm,
+            "sublinear_tf": extractor.sublinear_tf,
+            "dtype": np.dtype(extractor.dtype).name,
+        },
+        "classifier": kind,
+        "arrays": sorted(arrays),
+    }
+
+    os.makedirs(out_dir, exist_ok=True)
+    for name, array in arrays.items():
+        np.save(os.path.join(out_dir, f"{name}.npy"), array, allow_pickle=False)
+    # meta.json goes last, so a directory with one is always complete
+    with open(os.path.join(out_dir, META_FILE), "w") as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+def read_meta(artifact_dir: str) -> Optional[dict]:
+    """The artifact's meta.json, or None if the directory holds no artifact"""
+    path = os.path.join(artifact_dir, META_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def artifact_files(artifact_dir: str, meta: dict) -> list:
+    return [os.path.join(artifact_dir, f"{name}.npy") for name in meta["arrays"]]
+
+
+def load_artifacts(artifact_dir: str, mmap: bool = True) -> Tuple[TfidfFeatureExtractor, LinearClassifier]:
+    """
+    Load exported artifacts as a (vectorizer, model) pair for ArticleService.
+
+    Args:
+        mmap: Map the arrays read-only and look terms up in the sorted
+            vocabulary arrays. Without it, every array is read into this
+            process and the vocabulary becomes a dict, which is faster to
+            query but private to the process.
+    """
+    meta = read_meta(artifact_dir)
+    if meta is None:
+        raise FileNotFoundError(f"No model artifact in {artifact_dir}")
+    if meta["format_version"] != FORMAT_VERSION:
+        raise ValueError(f"Unsupported model artifact format {meta['format_version']}")
+
+    def load(name):
+        return np.load(os.path.join(artifact_dir, f"{name}.npy"), mmap_mode="r" if mmap else None, allow_pickle=False)
+
+    vocabulary = SortedVocabulary(load("vocabulary_terms"), load("vocabulary_columns"))
+    if not mmap:
+        vocabulary = dict(zip(vocabulary.terms.tolist(), vocabulary.columns.tolist()))
+
+    features = meta["features"]
+    extractor = TfidfFeatureExtractor(
+        vocabulary=vocabulary,
+        idf=load("idf") if "idf" in meta["arrays"] else None,
+        token_pattern=features["token_pattern"],
+        lowercase=features["lowercase"],
+        norm=features["norm"],
+        sublinear_tf=features["sublinear_tf"],
+        dtype=np.dtype(features["dtype"]).type,
+    )
+    classifier = LinearClassifier(meta["classifier"], load("coef"), load("intercept"), load("classes"))
+    return extractor, classifier
@@ -1,24 +1,220 @@
-from supabase import create_client, Client
+"""
+Async Supabase clients backed by one pooled HTTP transport per worker.
+
+Every PostgREST, storage and auth call goes through the same
+httpx.AsyncClient, so keep-alive (and HTTP/2, when h2 is installed)
+connections to Supabase are reused across requests instead of paying a new
+TCP+TLS handshake each time. User-scoped clients are thin PostgREST
+wrappers that only carry the user's JWT header; building one doesn't open
+a connection.
+
+An AsyncClient's connections belong to the event loop that opened them, so
+the pool (and the admin client on top of it) is created lazily for the
+running loop, after any gunicorn fork.
+"""
+import asyncio
+import weakref
+from typing import Optional
+
+import httpx
+from postgrest import AsyncPostgrestClient
+from supabase import AsyncClient, AsyncClientOptions
+
 from ..config import settings
 
-def get_supabase_client(user_jwt: str = None) -> Client:
-    client = create_client(
-        settings.SUPABASE_URL,
-        settings.SUPABASE_ANON_KEY
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class PoolMetrics:
+    """Counters for in-flight Supabase requests and connection reuse"""
+
+    def __init__(self, max_connections: int):
+        self.max_connections = max_connections
+        self._seen_streams = weakref.WeakSet()
+        self.requests = 0
+        self.errors = 0
+        self.connections_opened = 0
+        self.connections_reused = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    def request_started(self):
+        self.requests += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def request_failed(self):
+        self.errors += 1
+        self.in_flight -= 1
+
+    def request_finished(self):
+        self.in_flight -= 1
+
+    def record_connection(self, network_stream):
+        if network_stream is None:
+            return
+        try:
+            if network_stream in self._seen_streams:
+                self.connections_reused += 1
+                return
+            self._seen_streams.add(network_stream)
+        except TypeError:
+            # Not weak-referenceable, so reuse can't be tracked
+            return
+        self.connections_opened += 1
+
+    def stats(self) -> dict:
+        tracked = self.connections_opened + self.connections_reused
+        return {
+            "max_connections": self.max_connections,
+            "http2": HTTP2_AVAILABLE,
+            "requests": self.requests,
+            "errors": self.errors,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "utilization": round(self.in_flight / self.max_connections, 4),
+            "connections_opened": self.connections_opened,
+            "connections_reused": self.connections_reused,
+            "reuse_rate": round(self.connections_reused / tracked, 4) if tracked else 0,
+        }
+
+
+class _TrackedStream(httpx.AsyncByteStream):
+    """Response body that reports back when the connection is released"""
+
+    def __init__(self, stream, on_close):
+        self._stream = stream
+        self._on_close = on_close
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self):
+        try:
+            await self._stream.aclose()
+        finally:
+            on_close, self._on_close = self._on_close, None
+            if on_close is not None:
+                on_close()
+
+
+class PoolMetricsTransport(httpx.AsyncBaseTransport):
+    """
+    Wraps an httpx transport to count in-flight requests and how often a
+    request reused an existing connection rather than opening a new one.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, metrics: PoolMetrics):
+        self._transport = transport
+        self.metrics = metrics
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.metrics.request_started()
+        try:
+            response = await self._transport.handle_async_request(request)
+        except BaseException:
+            self.metrics.request_failed()
+            raise
+
+        self.metrics.record_connection(response.extensions.get("network_stream"))
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_TrackedStream(response.stream, self.metrics.request_finished),
+            extensions=response.extensions,
+        )
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+
+def create_http_client(transport: Optional[httpx.AsyncBaseTransport] = None,
+                       metrics: Optional[PoolMetrics] = None) -> httpx.AsyncClient:
+    """
+    Build a pooled HTTP client for Supabase requests, sized by the SUPABASE_* settings.
+
+    Args:
+        transport: Optional httpx transport, e.g. httpx.MockTransport in tests
+        metrics: Where to record pool metrics, defaults to this worker's pool_metrics
+    """
+    if transport is None:
+        transport = httpx.AsyncHTTPTransport(
+            http2=HTTP2_AVAILABLE,
+            limits=httpx.Limits(
+                max_connections=settings.SUPABASE_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.SUPABASE_MAX_CONNECTIONS,
+                keepalive_expiry=settings.SUPABASE_KEEPALIVE_EXPIRY,
+            ),
+        )
+    return httpx.AsyncClient(
+        transport=PoolMetricsTransport(transport, metrics or pool_metrics),
+        timeout=httpx.Timeout(settings.SUPABASE_TIMEOUT),
+        follow_redirects=True,
+    )
+
+
+pool_metrics = PoolMetrics(settings.SUPABASE_MAX_CONNECTIONS)
+
+_http_client: Optional[httpx.AsyncClient] = None
+_http_client_loop = None
+_admin_client: Optional[AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """The pooled HTTP client for the running event loop"""
+    global _http_client, _http_client_loop, _admin_client
+    loop = asyncio.get_running_loop()
+    if _http_client is None or _http_client_loop is not loop or _http_client.is_closed:
+        _http_client = create_http_client()
+        _http_client_loop = loop
+        _admin_client = None
+    return _http_client
+
+
+def pool_stats() -> dict:
+    """Connection pool utilization and reuse for this worker"""
+    return pool_metrics.stats()
+
+
+def get_supabase_client(user_jwt: str = None) -> AsyncPostgrestClient:
+    """
+    PostgREST client for one request. With a user JWT, Supabase treats the
+    requests as coming from that authenticated user, so RLS policies apply.
+    Shares the worker's connection pool.
+    """
+    return AsyncPostgrestClient(
+        f"{settings.SUPABASE_URL}/rest/v1",
+        headers={
+            "apikey": settings.SUPABASE_ANON_KEY,
+            "Authorization": f"Bearer {user_jwt or settings.SUPABASE_ANON_KEY}",
+        },
+        http_client=get_http_client(),
     )
-    
-    # If we have a user JWT, set it in the auth header
-    # This makes Supabase treat requests as coming from that authenticated user
-    if user_jwt:
-        client.postgrest.auth(user_jwt)
-    
-    return client
-
-# Initialize admin client only if not in testing mode
-if settings.TESTING:
-    supabase_admin_client = None
-else:
-    supabase_admin_client = create_client(
-        settings.SUPABASE_URL,
-        settings.SUPABASE_SERVICE_ROLE_KEY
-    )
\ No newline at end of file
+
+
+def get_admin_client() -> AsyncClient:
+    """Service role client for storage, auth admin and cross-user queries"""
+    global _admin_client
+    http_client = get_http_client()
+    if _admin_client is None:
+        _admin_client = AsyncClient(
+            settings.SUPABASE_URL,
+            settings.SUPABASE_SERVICE_ROLE_KEY,
+            options=AsyncClientOptions(httpx_client=http_client),
+        )
+    return _admin_client
+
+
+async def aclose():
+    """Close the pooled connections of the running loop's client"""
+    global _http_client, _http_client_loop, _admin_client
+    if _http_client is not None and not _http_client.is_closed:
+        await _http_client.aclose()
+    _http_client = None
+    _http_client_loop = None
+    _admin_client = None
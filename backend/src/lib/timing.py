@@ -0,0 +1,108 @@
+"""
+Per-stage latency spans for the analyze pipeline.
+
+`stage("fetch")` times a block. Each span is observed in a process-wide
+histogram per stage, served in the Prometheus text format on /metrics, and
+added to the current request's timings, which ServerTimingMiddleware sends
+back as a Server-Timing header. Stages that run in a process pool worker
+measure themselves there and are passed back to `record_all`.
+"""
+import bisect
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+# Upper bounds of the histogram buckets, in seconds
+STAGE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# {stage: seconds} of the request being handled, set by ServerTimingMiddleware
+request_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_timings", default=None)
+
+
+class Histogram:
+    def __init__(self, buckets=STAGE_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class StageMetrics:
+    def __init__(self, name: str = "analyze_stage_duration_seconds", buckets=STAGE_BUCKETS):
+        self.name = name
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, Histogram] = {}
+
+    def observe(self, stage: str, seconds: float):
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    def render(self) -> str:
+        """The histograms in the Prometheus text exposition format"""
+        lines = [
+            f"# HELP {self.name} Time spent in each stage of article analysis.",
+            f"# TYPE {self.name} histogram",
+        ]
+        with self._lock:
+            for stage, histogram in sorted(self._histograms.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + ("+Inf",), histogram.counts):
+                    cumulative += count
+                    lines.append(f'{self.name}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                lines.append(f'{self.name}_sum{{stage="{stage}"}} {histogram.sum}')
+                lines.append(f'{self.name}_count{{stage="{stage}"}} {histogram.count}')
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._histograms = {}
+
+
+stage_metrics = StageMetrics()
+
+
+def record(stage: str, seconds: float):
+    """Add a measured span to the stage histogram and the current request's timings"""
+    stage_metrics.observe(stage, seconds)
+    timings = request_timings.get()
+    if timings is not None:
+        # Concurrent spans of one request (e.g. a batch) add up
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+
+def record_all(timings: Dict[str, float]):
+    for name, seconds in timings.items():
+        record(name, seconds)
+
+
+@contextmanager
+def stage(name: str):
+    """Time the enclosed block as one span of stage `name`"""
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start_time)
+
+
+def timed(name: str):
+    """Decorator timing every call of a coroutine function as a span of stage `name`"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with stage(name):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,104 @@
+"""
+URL canonicalization for deduplicating article submissions.
+
+Two submissions of the same story should map to one canonical URL even when
+they differ by tracking parameters, `www.`, trailing slashes, fragments or
+AMP variants. After a page is fetched, its `<link rel="canonical">` (or the
+final URL after redirects) refines the canonical URL further.
+"""
+import re
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+TRACKING_PARAMS = frozenset({
+    "fbclid", "gclid", "dclid", "gclsrc", "msclkid", "yclid", "twclid", "igshid",
+    "mc_cid", "mc_eid", "_ga", "_gl", "ref", "ref_src", "ref_url", "cmpid", "ocid",
+    "smid", "smtyp", "ito", "guccounter", "guce_referrer", "guce_referrer_sig",
+})
+TRACKING_PREFIXES = ("utm_", "hsa_", "pk_", "mtm_")
+
+AMP_PARAMS = frozenset({"amp", "outputtype", "usqp"})
+AMP_SUFFIX = re.compile(r"/amp/?$", re.IGNORECASE)
+AMP_PREFIX = re.compile(r"^/amp(?=/)", re.IGNORECASE)
+AMP_EXTENSION = re.compile(r"\.amp(?=\.html?$)|\.amp$", re.IGNORECASE)
+
+HOST_PREFIXES = ("www.", "amp.")
+
+
+def normalize_url(url: str) -> str:
+    """
+    Lowercase scheme and host, drop default ports and the fragment.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+
+    port = parts.port
+    if port and not ((scheme == "http" and port == 80) or (scheme == "https" and port == 443)):
+        host = f"{host}:{port}"
+
+    return urlunsplit((scheme, host, parts.path or "/", parts.query, ""))
+
+
+def _is_tracking_param(name: str) -> bool:
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Canonical form of an article URL used for dedup and cache keys.
+
+    - http and https collapse to https
+    - `www.` and `amp.` host prefixes are removed
+    - tracking parameters (utm_*, fbclid, gclid, ...) and AMP flags are removed,
+      the remaining parameters are sorted
+    - AMP path variants (`/amp`, `/amp/...`, `.amp.html`) collapse to the regular page
+    - the fragment and trailing slashes are removed
+    """
+    parts = urlsplit(normalize_url(url))
+
+    host = parts.netloc
+    for prefix in HOST_PREFIXES:
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+
+    path = re.sub(r"/{2,}", "/", parts.path)
+    path = AMP_SUFFIX.sub("", path)
+    path = AMP_PREFIX.sub("", path)
+    path = AMP_EXTENSION.sub("", path)
+    path = path.rstrip("/") or "/"
+
+    query = sorted(
+        (name, value)
+        for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not _is_tracking_param(name) and name.lower() not in AMP_PARAMS
+    )
+
+    return urlunsplit(("https", host, path, urlencode(query), ""))
+
+
+def _site(url: str) -> str:
+    host = (urlsplit(url).hostname or "").lower()
+    for prefix in HOST_PREFIXES + ("m.",):
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+    return host
+
+
+def resolve_canonical_url(url: str, final_url: Optional[str] = None, canonical_link: Optional[str] = None) -> str:
+    """
+    Canonical URL of a fetched page. Prefers the page's `<link rel="canonical">`,
+    then the final URL after redirects, then the submitted URL. A canonical link
+    pointing at a different site (or at the site's home page) is ignored.
+    """
+    fetched_url = final_url or url
+    if canonical_link:
+        candidate = urljoin(fetched_url, canonical_link.strip())
+        if (
+            urlsplit(candidate).scheme in ("http", "https")
+            and _site(candidate) == _site(fetched_url)
+            and urlsplit(candidate).path.strip("/")
+        ):
+            return canonicalize_url(candidate)
+    return canonicalize_url(fetched_url)
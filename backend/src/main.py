@@ -1,26 +1,50 @@
-from fastapi import FastAPI, Response, Request
-from src.routes import article_routes, user_routes, health_routes
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI
+from src.routes import admin_routes, article_routes, user_routes, health_routes
+from src.repository.model_repository import model_registry
+from src.lib import executors, supabase_client
+from src.lib.article_fetcher import article_fetcher
 from src.config import settings
-from fastapi.middleware.cors import CORSMiddleware
+from src.middleware.auth import auth_handler
+from src.services.article_service import article_service, shadow_scorer
+from src.middleware.cors import CORSMiddleware
+from src.middleware.server_timing import ServerTimingMiddleware
 
-app = FastAPI(title=settings.APP_NAME, debug=settings.DEBUG)
-
-@app.options("/{full_path:path}")
-async def options_handler(full_path: str, request: Request) -> Response:
-    origin = request.headers.get("origin", "")
-    if origin == "http://localhost:5173" or origin.endswith("daltongorhams-projects.vercel.app") or origin.endswith("https://fake-news-detector-frontend-delta.vercel.app") or origin == "https://articleverify.net" or origin == "https://www.articleverify.net":
-        return Response(
-            status_code=200,
-            headers={
-                "Access-Control-Allow-Origin": origin,
-                "Access-Control-Allow-Methods": "GET, POST, PUT, DELETE, OPTIONS",
-                "Access-Control-Allow-Headers": "Authorization, Content-Type, Accept",
-                "Access-Control-Allow-Credentials": "true",
-                "Access-Control-Max-Age": "3600",
-            }
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load the model before serving traffic. This is a no-op when the
+    # gunicorn master already preloaded it before forking workers.
+    if not settings.TESTING:
+        stats = model_registry.load()
+        print(
+            f"Model {stats['version']} ready in worker {stats['current_pid']}: "
+            f"loaded by pid {stats['pid']} in {stats['load_seconds']}s, "
+            f"resident size {stats['current_resident_bytes'] / (1024 * 1024):.1f} MiB"
         )
-    return Response(status_code=400)
+        # Fetch JWKS signing keys now rather than on the first request
+        auth_handler.verifier.load_keys()
+    executors.start()
+    await article_service.prepare_shadow_model()
+    # Follow model version switches made through any worker's admin API
+    model_watcher = None
+    if not settings.TESTING and settings.MODEL_RELOAD_INTERVAL_SECONDS > 0:
+        model_watcher = asyncio.create_task(article_service.watch_model_version())
+    yield
+    if model_watcher is not None:
+        model_watcher.cancel()
+    shadow_scorer.shutdown()
+    await article_fetcher.aclose()
+    await supabase_client.aclose()
+    executors.shutdown()
+
+app = FastAPI(title=settings.APP_NAME, debug=settings.DEBUG, lifespan=lifespan)
+
+# Per-stage timings of each request in a Server-Timing header
+if settings.SERVER_TIMING_ENABLED:
+    app.add_middleware(ServerTimingMiddleware)
 
+# Preflights are answered by the CORS middleware before routing
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[
@@ -31,10 +55,10 @@ app.add_middleware(
     ],
     allow_origin_regex=r"https://fake-news-detector-frontend-[a-zA-Z0-9-]+-daltongorhams-projects\.vercel\.app",
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    expose_headers=["X-Total-Count", "X-Next-Cursor"],
 )
 
 app.include_router(article_routes.router, prefix="/api/v1")
 app.include_router(user_routes.router, prefix="/api/v1")
+app.include_router(admin_routes.router, prefix="/api/v1")
 app.include_router(health_routes.router)
\ No newline at end of file
@@ -0,0 +1,27 @@
+import hmac
+from typing import Optional
+from fastapi import Header, HTTPException
+from ..config import settings
+
+
+async def require_admin_token(x_admin_token: Optional[str] = Header(None)):
+    """Allow a request only when its X-Admin-Token header matches ADMIN_API_TOKEN"""
+    if not settings.ADMIN_API_TOKEN:
+        raise HTTPException(
+            status_code=403,
+            detail={
+                "message": "Admin API is disabled",
+                "error": "ADMIN_API_TOKEN is not configured",
+                "code": "ADMIN_DISABLED"
+            }
+        )
+
+    if not x_admin_token or not hmac.compare_digest(x_admin_token.encode(), settings.ADMIN_API_TOKEN.encode()):
+        raise HTTPException(
+            status_code=401,
+            detail={
+                "message": "Invalid admin token",
+                "error": "A valid X-Admin-Token header is required",
+                "code": "INVALID_ADMIN_TOKEN"
+            }
+        )
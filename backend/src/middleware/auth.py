@@ -1,46 +1,73 @@
+import hashlib
+import hmac
+import secrets
+import time
 from fastapi import HTTPException, Security, Depends
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from jose import jwt, JWTError
-from datetime import datetime
 from typing import Optional, Tuple
 from ..config import settings
+from ..lib.cache import LRUCache
+from .jwt_backends import JWTVerifier, UnknownSigningKey, create_verifier
 
 security = HTTPBearer()
 
 class AuthMiddleware:
-    def __init__(self):
-        self.jwt_secret = settings.SUPABASE_JWT_SECRET
+    def __init__(self, cache_size: int = None, verifier: JWTVerifier = None):
         self.jwt_audience = "authenticated"
+        # Signature and claim checks are delegated to the JWT_BACKEND verifier
+        self.verifier = verifier or create_verifier(self.jwt_audience)
+
+        # Decoded claims of recently seen tokens, kept until each token expires.
+        # AUTH_CACHE_SIZE=0 verifies every request from scratch.
+        cache_size = settings.AUTH_CACHE_SIZE if cache_size is None else cache_size
+        self._cache = LRUCache(max_size=cache_size) if cache_size > 0 else None
+        # Cache keys are keyed digests, so raw tokens never sit in the cache
+        self._digest_key = secrets.token_bytes(32)
+
+    def _token_digest(self, token: str) -> bytes:
+        return hmac.new(self._digest_key, token.encode(), hashlib.sha256).digest()
 
     def verify_token(self, token: str) -> dict:
         """
-        Verify and decode a JWT token
+        Verify and decode a JWT token.
+        A token that verified before is served from the cache until its `exp`.
         """
+        if self._cache is None:
+            return self._decode(token)
+
+        digest = self._token_digest(token)
+        payload = self._cache.get(digest)
+        if payload is not None:
+            if payload.get("exp", 0) > time.time():
+                return payload
+            self._cache.delete(digest)
+
+        payload = self._decode(token)
+
+        # Tokens without an expiry are never cached
+        ttl = payload.get("exp", 0) - time.time()
+        if ttl > 0:
+            self._cache.set(digest, payload, ttl_seconds=ttl)
+        return payload
+
+    def cache_stats(self) -> dict:
+        if self._cache is None:
+            return {"enabled": False}
+        return {"enabled": True, **self._cache.stats()}
+
+    def stats(self) -> dict:
+        return {**self.verifier.stats(), "cache": self.cache_stats()}
+
+    def _decode(self, token: str) -> dict:
         try:
-            payload = jwt.decode(
-                token,
-                self.jwt_secret,
-                algorithms=["HS256"],
-                audience=self.jwt_audience,
-                options={
-                    "verify_aud": True,
-                    "verify_exp": True,
-                    "verify_signature": True
-                }
-            )
-                    
-            return payload
-            
-        except JWTError as e:
-            raise ValueError(f"Invalid token: {str(e)}")
+            return self.verifier.verify(token)
+        except ValueError:
+            raise
         except Exception as e:
             raise ValueError(f"Token verification failed: {str(e)}")
-            
-    async def get_current_user(self, credentials: HTTPAuthorizationCredentials = Security(security)) -> str:
-        """
-        Get the current user's ID from the verified token.
-        Returns just the user_id for backward compatibility.
-        """
+
+    async def _authenticate(self, credentials: HTTPAuthorizationCredentials) -> Tuple[str, str]:
+        """Verify the bearer token and return (user_id, jwt_token)"""
         if not credentials:
             raise HTTPException(
                 status_code=401,
@@ -52,13 +79,18 @@ class AuthMiddleware:
 
         token = credentials.credentials
         try:
-            payload = self.verify_token(token)
+            try:
+                payload = self.verify_token(token)
+            except UnknownSigningKey:
+                # Signing keys were rotated: fetch them off the event loop and retry once
+                await self.verifier.refresh_keys()
+                payload = self.verify_token(token)
             
             user_id = payload.get('sub')
             if not user_id:
                 raise ValueError("User ID not found in token")
                 
-            return user_id
+            return (user_id, token)
             
         except ValueError as e:
             raise HTTPException(
@@ -69,39 +101,20 @@ class AuthMiddleware:
                     "code": "INVALID_TOKEN"
                 }
             )
+
+    async def get_current_user(self, credentials: HTTPAuthorizationCredentials = Security(security)) -> str:
+        """
+        Get the current user's ID from the verified token.
+        Returns just the user_id for backward compatibility.
+        """
+        user_id, _ = await self._authenticate(credentials)
+        return user_id
     
     async def get_user_with_token(self, credentials: HTTPAuthorizationCredentials = Security(security)) -> Tuple[str, str]:
         """
         Get both the user's ID and their JWT token.
         Returns (user_id, jwt_token) tuple for creating user-scoped Supabase clients.
         """
-        if not credentials:
-            raise HTTPException(
-                status_code=401,
-                detail={
-                    "message": "Authentication required",
-                    "error": "No credentials provided"
-                }
-            )
-
-        token = credentials.credentials
-        try:
-            payload = self.verify_token(token)
-            
-            user_id = payload.get('sub')
-            if not user_id:
-                raise ValueError("User ID not found in token")
-                
-            return (user_id, token)
-            
-        except ValueError as e:
-            raise HTTPException(
-                status_code=401,
-                detail={
-                    "message": "Invalid authentication token",
-                    "error": str(e),
-                    "code": "INVALID_TOKEN"
-                }
-            )
+        return await self._authenticate(credentials)
 
-auth_handler = AuthMiddleware()
\ No newline at end of file
+auth_handler = AuthMiddleware()
@@ -0,0 +1,125 @@
+"""
+Pure ASGI CORS middleware.
+
+Preflight requests are answered here, before routing, with headers built
+once at startup. Origins are checked against a frozen set of exact origins
+plus one compiled regex for preview deployments; regex results are cached
+per origin. Everything works on the raw header bytes, so a request is never
+wrapped in a Starlette Request.
+"""
+import re
+from typing import Iterable, Optional
+
+from ..lib.cache import LRUCache
+
+DEFAULT_METHODS = ("DELETE", "GET", "HEAD", "OPTIONS", "PATCH", "POST", "PUT")
+
+
+class CORSMiddleware:
+    def __init__(
+        self,
+        app,
+        allow_origins: Iterable[str] = (),
+        allow_origin_regex: Optional[str] = None,
+        allow_methods: Iterable[str] = DEFAULT_METHODS,
+        allow_credentials: bool = True,
+        expose_headers: Iterable[str] = (),
+        max_age: int = 3600,
+        origin_cache_size: int = 1024,
+    ):
+        self.app = app
+        self.allow_origins = frozenset(origin.encode("latin-1") for origin in allow_origins)
+        self.allow_origin_regex = (
+            re.compile(allow_origin_regex.encode("latin-1")) if allow_origin_regex else None
+        )
+        self.allow_methods = frozenset(method.upper().encode("latin-1") for method in allow_methods)
+        # Regex decisions per origin; bounded so random Origin headers can't grow it
+        self._origin_cache = LRUCache(max_size=origin_cache_size)
+
+        # Headers shared by every allowed response, built once
+        shared = [(b"vary", b"Origin")]
+        if allow_credentials:
+            shared.append((b"access-control-allow-credentials", b"true"))
+
+        self._preflight_headers = shared + [
+            (b"access-control-allow-methods", b", ".join(sorted(self.allow_methods))),
+            (b"access-control-max-age", str(max_age).encode("latin-1")),
+            (b"content-length", b"0"),
+        ]
+        self._simple_headers = list(shared)
+        if expose_headers:
+            self._simple_headers.append(
+                (b"access-control-expose-headers", ", ".join(expose_headers).encode("latin-1"))
+            )
+
+    def is_allowed_origin(self, origin: bytes) -> bool:
+        if origin in self.allow_origins:
+            return True
+        if self.allow_origin_regex is None:
+            return False
+
+        allowed = self._origin_cache.get(origin)
+        if allowed is None:
+            allowed = self.allow_origin_regex.fullmatch(origin) is not None
+            self._origin_cache.set(origin, allowed)
+        return allowed
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        origin = request_method = request_headers = None
+        for name, value in scope["headers"]:
+            if name == b"origin":
+                origin = value
+            elif name == b"access-control-request-method":
+                request_method = value
+            elif name == b"access-control-request-headers":
+                request_headers = value
+
+        if origin is None:
+            await self.app(scope, receive, send)
+            return
+
+        if scope["method"] == "OPTIONS":
+            await self._preflight(origin, request_method, request_headers, send)
+            return
+
+        if not self.is_allowed_origin(origin):
+            await self.app(scope, receive, send)
+            return
+
+        headers = self._simple_headers + [(b"access-control-allow-origin", origin)]
+
+        async def send_with_cors(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_cors)
+
+    async def _preflight(self, origin: bytes, request_method: Optional[bytes],
+                         request_headers: Optional[bytes], send):
+        if not self.is_allowed_origin(origin):
+            await self._respond(send, 400, [(b"vary", b"Origin")], b"Disallowed CORS origin")
+            return
+        if request_method is not None and request_method.upper() not in self.allow_methods:
+            await self._respond(send, 400, [(b"vary", b"Origin")], b"Disallowed CORS method")
+            return
+
+        headers = self._preflight_headers + [(b"access-control-allow-origin", origin)]
+        if request_headers:
+            # Any header the browser asks for is allowed, as with allow_headers=["*"]
+            headers.append((b"access-control-allow-headers", request_headers))
+        await self._respond(send, 200, headers)
+
+    @staticmethod
+    async def _respond(send, status: int, headers: list, body: bytes = b""):
+        if body:
+            headers = headers + [
+                (b"content-type", b"text/plain; charset=utf-8"),
+                (b"content-length", str(len(body)).encode("latin-1")),
+            ]
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,260 @@
+"""
+JWT verification backends for AuthMiddleware.
+
+A verifier checks a token's signature and claims and returns its payload,
+raising ValueError when the token is not acceptable. Two backends exist:
+
+- "pyjwt" (default): PyJWT, which verifies HS256 tokens with the shared
+  SUPABASE_JWT_SECRET and RS256/ES256 tokens with public keys from a JWKS
+  document. The JWKS is fetched at startup and refreshed only when a token
+  names a `kid` it doesn't know, so key rotation needs no redeploy and costs
+  no per-request network calls. verify() never fetches: it raises
+  UnknownSigningKey, and the caller awaits refresh_keys() off the event loop
+  and tries again. JWKS_FILE loads the keys from disk instead, e.g. for
+  offline tests.
+- "jose": the original python-jose HS256 verifier.
+"""
+import asyncio
+import json
+import time
+from typing import Dict, List, Optional
+
+import httpx
+import jwt as pyjwt
+from jose import jwt as jose_jwt, JWTError
+
+from ..config import settings
+from ..lib.executors import run_io
+
+HMAC_ALGORITHMS = ("HS256",)
+ASYMMETRIC_ALGORITHMS = ("RS256", "ES256")
+
+
+class JWTVerifier:
+    """Interface for token verification backends"""
+
+    name = "base"
+
+    def verify(self, token: str) -> dict:
+        """Return the token's claims, or raise ValueError if it is invalid"""
+        raise NotImplementedError
+
+    def load_keys(self):
+        """Fetch remote signing keys ahead of the first request, if there are any"""
+
+    async def refresh_keys(self):
+        """Refetch the signing keys after verify() raised UnknownSigningKey"""
+
+    def stats(self) -> dict:
+        return {"backend": self.name}
+
+
+class JoseVerifier(JWTVerifier):
+    """HS256 verification with python-jose"""
+
+    name = "jose"
+
+    def __init__(self, secret: str, audience: str):
+        self.secret = secret
+        self.audience = audience
+
+    def verify(self, token: str) -> dict:
+        try:
+            return jose_jwt.decode(
+                token,
+                self.secret,
+                algorithms=["HS256"],
+                audience=self.audience,
+                options={
+                    "verify_aud": True,
+                    "verify_exp": True,
+                    "verify_signature": True
+                }
+            )
+        except JWTError as e:
+            raise ValueError(f"Invalid token: {str(e)}")
+
+
+class UnknownSigningKey(ValueError):
+    """A token names a `kid` that isn't in the current key set"""
+
+    def __init__(self, kid: Optional[str]):
+        super().__init__(f"Invalid token: unknown signing key {kid!r}")
+        self.kid = kid
+
+
+class JWKSKeySet:
+    """
+    Public signing keys from a JWKS document, looked up by `kid`.
+
+    Keys come from `path` (read right away) or `url` (fetched by refresh(),
+    at startup). get_key() never does I/O. After an unknown `kid`,
+    refresh_async() reloads the keys in the I/O pool; concurrent misses wait
+    for the same reload, and there is at most one per `min_refresh_seconds`,
+    so tokens with made-up key ids can't turn into a stream of JWKS requests.
+    """
+
+    def __init__(
+        self,
+        url: Optional[str] = None,
+        path: Optional[str] = None,
+        transport: Optional[httpx.BaseTransport] = None,
+        min_refresh_seconds: float = None,
+        timeout: float = 5,
+    ):
+        """
+        Args:
+            url: JWKS endpoint, e.g. https://<project>.supabase.co/auth/v1/.well-known/jwks.json
+            path: Local JWKS file, used instead of `url`
+            transport: Optional httpx transport, e.g. httpx.MockTransport in tests
+        """
+        if not url and not path:
+            raise ValueError("A JWKS url or path is required")
+        self.url = url
+        self.path = path
+        self._transport = transport
+        self.min_refresh_seconds = (
+            settings.JWKS_MIN_REFRESH_SECONDS if min_refresh_seconds is None else min_refresh_seconds
+        )
+        self.timeout = timeout
+
+        self._keys: Dict[str, pyjwt.PyJWK] = {}
+        self._loaded_at: Optional[float] = None
+        self._refreshing: Optional[asyncio.Future] = None
+        self.fetches = 0
+        self.fetch_errors = 0
+        if path:
+            self.refresh()
+
+    def _read_document(self) -> dict:
+        if self.path:
+            with open(self.path) as f:
+                return json.load(f)
+        with httpx.Client(transport=self._transport, timeout=self.timeout) as client:
+            response = client.get(self.url)
+            response.raise_for_status()
+            return response.json()
+
+    def refresh(self):
+        """Reload the key set, keeping the current keys if that fails"""
+        self._loaded_at = time.monotonic()
+        self.fetches += 1
+        try:
+            document = self._read_document()
+        except Exception as e:
+            self.fetch_errors += 1
+            print(f"Warning: Failed to load JWKS from {self.path or self.url}: {e}")
+            return
+
+        keys = {}
+        for jwk in document.get("keys", []):
+            if jwk.get("use", "sig") != "sig" or "kid" not in jwk:
+                continue
+            try:
+                keys[jwk["kid"]] = pyjwt.PyJWK(jwk)
+            except pyjwt.PyJWTError as e:
+                print(f"Warning: Skipping unusable JWKS key {jwk.get('kid')}: {e}")
+        self._keys = keys
+
+    async def refresh_async(self):
+        """
+        Reload the key set in the I/O pool, unless it was loaded less than
+        `min_refresh_seconds` ago. Callers arriving during a reload wait for
+        it instead of starting their own.
+        """
+        if self._refreshing is None:
+            if self._loaded_at is not None and time.monotonic() - self._loaded_at < self.min_refresh_seconds:
+                return
+            self._refreshing = asyncio.ensure_future(run_io(self.refresh))
+            self._refreshing.add_done_callback(self._refresh_done)
+        await asyncio.shield(self._refreshing)
+
+    def _refresh_done(self, future: asyncio.Future):
+        if self._refreshing is future:
+            self._refreshing = None
+
+    def get_key(self, kid: Optional[str]) -> pyjwt.PyJWK:
+        key = self._keys.get(kid)
+        if key is None:
+            raise UnknownSigningKey(kid)
+        return key
+
+    def stats(self) -> dict:
+        return {
+            "source": self.path or self.url,
+            "keys": sorted(self._keys),
+            "fetches": self.fetches,
+            "fetch_errors": self.fetch_errors,
+        }
+
+
+class PyJWTVerifier(JWTVerifier):
+    """
+    PyJWT verification of HS256 tokens (shared secret) and RS256/ES256
+    tokens (JWKS). The token header picks the key, and each algorithm is
+    only ever checked against its own kind of key.
+    """
+
+    name = "pyjwt"
+
+    def __init__(self, audience: str, secret: Optional[str] = None, jwks: Optional[JWKSKeySet] = None):
+        self.audience = audience
+        self.secret = secret
+        self.jwks = jwks
+
+        self.algorithms: List[str] = []
+        if secret:
+            self.algorithms += HMAC_ALGORITHMS
+        if jwks is not None:
+            self.algorithms += ASYMMETRIC_ALGORITHMS
+
+    def verify(self, token: str) -> dict:
+        try:
+            header = pyjwt.get_unverified_header(token)
+        except pyjwt.PyJWTError as e:
+            raise ValueError(f"Invalid token: {str(e)}")
+
+        algorithm = header.get("alg")
+        if algorithm not in self.algorithms:
+            raise ValueError(f"Invalid token: algorithm {algorithm!r} is not allowed")
+
+        if algorithm in HMAC_ALGORITHMS:
+            key = self.secret
+        else:
+            signing_key = self.jwks.get_key(header.get("kid"))
+            if signing_key.algorithm_name != algorithm:
+                raise ValueError(f"Invalid token: key {header.get('kid')!r} is not a {algorithm} key")
+            key = signing_key.key
+
+        try:
+            return pyjwt.decode(token, key, algorithms=[algorithm], audience=self.audience)
+        except pyjwt.PyJWTError as e:
+            raise ValueError(f"Invalid token: {str(e)}")
+
+    def load_keys(self):
+        if self.jwks is not None:
+            self.jwks.refresh()
+
+    async def refresh_keys(self):
+        if self.jwks is not None:
+            await self.jwks.refresh_async()
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.name,
+            "algorithms": self.algorithms,
+            "jwks": self.jwks.stats() if self.jwks is not None else None,
+        }
+
+
+def create_verifier(audience: str) -> JWTVerifier:
+    """Build the verifier selected by JWT_BACKEND"""
+    if settings.JWT_BACKEND == "jose":
+        return JoseVerifier(settings.SUPABASE_JWT_SECRET, audience)
+    if settings.JWT_BACKEND != "pyjwt":
+        raise ValueError(f"Unknown JWT_BACKEND {settings.JWT_BACKEND!r}, expected 'pyjwt' or 'jose'")
+
+    jwks = None
+    if settings.JWKS_FILE or settings.JWKS_URL:
+        jwks = JWKSKeySet(url=settings.JWKS_URL, path=settings.JWKS_FILE)
+    return PyJWTVerifier(audience, secret=settings.SUPABASE_JWT_SECRET, jwks=jwks)
@@ -0,0 +1,40 @@
+"""
+Pure ASGI middleware that collects the stage timings of each request (see
+lib/timing.py) and returns them in a Server-Timing header, e.g.
+
+    Server-Timing: fetch;dur=182.4, parse;dur=21.7, inference;dur=9.3, total;dur=231.0
+"""
+import time
+
+from ..lib.timing import request_timings
+
+
+def format_server_timing(timings: dict, total: float) -> bytes:
+    entries = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings.items()]
+    entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries).encode("latin-1")
+
+
+class ServerTimingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = {}
+        token = request_timings.set(timings)
+        start_time = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                header = format_server_timing(timings, time.perf_counter() - start_time)
+                message["headers"] = list(message.get("headers", [])) + [(b"server-timing", header)]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            request_timings.reset(token)
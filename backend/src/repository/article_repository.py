@@ -1,49 +1,86 @@
 from datetime import datetime
-from ..lib.supabase_client import get_supabase_client, supabase_admin_client
+from ..lib.supabase_client import get_admin_client, get_supabase_client
+from ..lib.timing import timed
+from ..lib.urls import canonicalize_url
 
-def get_all(user_id: str, user_jwt: str = None):
-    """Get all articles for a specific user"""
-    # SQL: SELECT * FROM "Input History" 
-    # WHERE input_by_user = user_id 
+HISTORY_COLUMNS = '''
+    id,
+    created_at,
+    history_index,
+    input_by_user,
+    article:article_id (
+        id,
+        url,
+        canonical_url,
+        title,
+        source,
+        collected_date,
+        ai_result:"AI Result" (
+            id,
+            genre,
+            truthness_label,
+            truthness_score,
+            related_articles,
+            is_satire
+        )
+    )
+'''
+
+# Lightweight projection for list views: only what the sidebar renders and searches
+HISTORY_SUMMARY_COLUMNS = '''
+    id,
+    created_at,
+    history_index,
+    article:article_id (
+        id,
+        title,
+        source,
+        url,
+        ai_result:"AI Result" (
+            truthness_label,
+            truthness_score
+        )
+    )
+'''
+
+async def get_page(user_id: str, user_jwt: str = None, before: int = None, limit: int = 50,
+             summary: bool = False, with_total: bool = False):
+    """
+    Get one page of a user's history, newest first.
+
+    Keyset pagination on history_index: pass the smallest history_index of the
+    previous page as `before` to get the next one. Returns (rows, total), where
+    total is None unless `with_total` is set. The total is PostgREST's
+    "estimated" count: exact up to the server's max-rows, the query planner's
+    estimate above that, so it never costs a scan of a long history.
+    """
+    # SQL: SELECT ... FROM "Input History"
+    # WHERE input_by_user = user_id AND history_index < before
     # ORDER BY history_index DESC
+    # LIMIT limit
     client = get_supabase_client(user_jwt)
-    response = client.from_('Input History') \
-        .select('''
-            id,
-            created_at,
-            history_index,
-            input_by_user,
-            article:article_id (
-                id,
-                url,
-                title,
-                source,
-                collected_date,
-                ai_result:"AI Result" (
-                    id,
-                    genre,
-                    truthness_label,
-                    truthness_score,
-                    related_articles,
-                    is_satire
-                )
-            )
-        ''') \
-        .eq('input_by_user', user_id) \
+    query = client.from_('Input History') \
+        .select(HISTORY_SUMMARY_COLUMNS if summary else HISTORY_COLUMNS, count='estimated' if with_total else None) \
+        .eq('input_by_user', user_id)
+    if before is not None:
+        query = query.lt('history_index', before)
+    response = await query \
         .order('history_index', desc=True) \
+        .limit(limit) \
         .execute()
-    return response.data
+    return response.data, response.count if with_total else None
 
-def get_by_id(article_id: int, user_jwt: str = None):
+async def get_by_id(article_id: int, user_jwt: str = None):
     """Get a single article by ID with its AI result"""
     # SQL: SELECT * FROM Article 
     # WHERE id = article_id 
     # JOIN "AI Result" on article_id
     client = get_supabase_client(user_jwt)
-    response = client.from_('Article') \
+    response = await client.from_('Article') \
         .select('''
             id,
             url,
+            canonical_url,
             title,
             source,
             collected_date,
@@ -62,80 +99,140 @@ def get_by_id(article_id: int, user_jwt: str = None):
     
     return response.data
 
-def save(analysis_data: dict, user_jwt: str = None):
-    """Save a new article analysis across multiple tables"""
-    user_client = get_supabase_client(user_jwt)
+async def has_analyzed(user_id: str, canonical_url: str, user_jwt: str = None):
+    """Check whether a user already has a canonical URL in their history"""
+    return bool(await find_analyzed(user_id, [canonical_url], user_jwt))
+
+@timed("duplicate_check")
+async def find_analyzed(user_id: str, canonical_urls: list, user_jwt: str = None):
+    """Return the subset of canonical URLs that are already in a user's history"""
+    # SQL: SELECT Article.canonical_url FROM "Input History"
+    # JOIN Article ON Article.id = article_id
+    # WHERE input_by_user = user_id AND Article.canonical_url IN (canonical_urls)
+    # LIMIT len(canonical_urls)
+    # Uses input_history_user_article_idx and article_canonical_url_idx
+    client = get_supabase_client(user_jwt)
+    response = await client.from_('Input History') \
+        .select('article:article_id!inner (canonical_url)') \
+        .eq('input_by_user', user_id) \
+        .in_('article.canonical_url', list(canonical_urls)) \
+        .limit(len(canonical_urls)) \
+        .execute()
+
+    return {item['article']['canonical_url'] for item in response.data or []}
+
+@timed("lookup")
+async def find_by_canonical_url(canonical_url: str):
+    """
+    Find an existing analysis of a downloaded article for a canonical URL,
+    submitted by any user. Articles scored from user-submitted content are
+    private to that user and never returned. Returns {"article_id",
+    "ai_result_id"} or None.
+    """
+    # SQL: SELECT Article.id, "AI Result".id FROM Article
+    # JOIN "AI Result" on article_id
+    # WHERE canonical_url = canonical_url AND submitted_by IS NULL
+    # LIMIT 1  -- uses article_shared_canonical_url_idx
+    response = await get_admin_client().from_('Article') \
+        .select('id, ai_result:"AI Result"!inner (id)') \
+        .eq('canonical_url', canonical_url) \
+        .is_('submitted_by', 'null') \
+        .limit(1) \
+        .execute()
+
+    if not response.data:
+        return None
 
-    # SQL: INSERT INTO Article (url, title, source, collected_date)
+    row = response.data[0]
+    ai_result = row['ai_result']
+    if isinstance(ai_result, list):
+        ai_result = ai_result[0] if ai_result else None
+    if not ai_result:
+        return None
+
+    return {'article_id': row['id'], 'ai_result_id': ai_result['id']}
+
+async def get_urls_after(after_id: int, limit: int):
+    """
+    A batch of Article ids with their url and canonical_url, in id order,
+    starting after `after_id`. Used by the canonical URL backfill.
+    """
+    # SQL: SELECT id, url, canonical_url FROM Article
+    # WHERE id > after_id ORDER BY id LIMIT limit
+    response = await get_admin_client().from_('Article') \
+        .select('id, url, canonical_url') \
+        .gt('id', after_id) \
+        .order('id') \
+        .limit(limit) \
+        .execute()
+    return response.data or []
+
+async def set_canonical_url(article_id: int, canonical_url: str):
+    # SQL: UPDATE Article SET canonical_url = canonical_url WHERE id = article_id
+    await get_admin_client().table('Article') \
+        .update({'canonical_url': canonical_url}) \
+        .eq('id', article_id) \
+        .execute()
+
+@timed("save")
+async def save(analysis_data: dict, user_jwt: str = None, submitted: bool = False):
+    """
+    Save a new article analysis and add it to the user's history in a single
+    transaction. If the canonical URL was already saved (e.g. by a concurrent
+    submission) its existing rows are reused. With `submitted`, the analysis
+    of user-submitted content is saved as new rows private to that user.
+    Returns the article joined with its AI result.
+    """
+    # SQL: SELECT save_analysis(user_id, article, ai_result)
+    # Inserts Article and "AI Result", then "Input History" via link_analysis,
+    # see supabase/migrations/20261018000300_save_analysis_functions.sql.
+    # save_submitted_analysis sets Article.submitted_by (20261018000400_submitted_articles.sql)
     article_data = {
         'url': analysis_data['article']['url'],
+        'canonical_url': analysis_data['article'].get('canonical_url') or canonicalize_url(analysis_data['article']['url']),
         'title': analysis_data['article']['title'],
         'source': analysis_data['article']['source'],
         'collected_date': datetime.now().isoformat()
     }
-    article_response = supabase_admin_client.table('Article').insert(article_data).execute()
-    article_id = article_response.data[0]['id']
-
-    # SQL: INSERT INTO "AI Result" (article_id, genre, truthness_label, truthness_score, related_articles, is_satire)
     ai_result_data = {
-        'article_id': article_id,
         'genre': analysis_data['ai_result']['genre'],
         'truthness_label': analysis_data['ai_result']['truthness_label'],
         'truthness_score': analysis_data['ai_result']['truthness_score'],
         'related_articles': analysis_data['ai_result']['related_articles'],
         'is_satire': analysis_data['ai_result'].get('is_satire', False)
     }
-    ai_result_response = supabase_admin_client.table('AI Result').insert(ai_result_data).execute()
-    ai_result_id = ai_result_response.data[0]['id']
-
-    # SQL: SELECT history_index FROM "Input History" 
-    # WHERE input_by_user = user_id 
-    # ORDER BY history_index DESC 
-    # LIMIT 1
-    history_response = user_client.from_('Input History') \
-        .select('history_index') \
-        .eq('input_by_user', analysis_data['input_by_user']) \
-        .order('history_index', desc=True) \
-        .limit(1) \
-        .execute()
-
-    next_index = 1
-    if history_response.data:
-        next_index = history_response.data[0]['history_index'] + 1
-
-    # SQL: INSERT INTO "Input History" (created_at, history_index, input_by_user, article_id, ai_result_id)
-    history_data = {
-        'created_at': datetime.now().isoformat(),
-        'history_index': next_index,
-        'input_by_user': analysis_data['input_by_user'],
-        'article_id': article_id,
-        'ai_result_id': ai_result_id
-    }
-    user_client.table('Input History').insert(history_data).execute()
+    function = 'save_submitted_analysis' if submitted else 'save_analysis'
+    response = await get_admin_client().rpc(function, {
+        'p_user_id': analysis_data['input_by_user'],
+        'p_article': article_data,
+        'p_ai_result': ai_result_data
+    }).execute()
+    return response.data
 
-    return get_by_id(article_id, user_jwt)
+@timed("link")
+async def link_to_history(user_id: str, article_id: int, ai_result_id: int, user_jwt: str = None):
+    """
+    Add an already analyzed article to a user's history. Returns the article
+    joined with its AI result, or None if the article no longer exists.
+    """
+    # SQL: SELECT link_analysis(user_id, article_id, ai_result_id)
+    # Takes the next history_index from the user's "History Counter" row, see
+    # supabase/migrations/20261018000600_link_analysis_lock.sql
+    response = await get_admin_client().rpc('link_analysis', {
+        'p_user_id': user_id,
+        'p_article_id': article_id,
+        'p_ai_result_id': ai_result_id
+    }).execute()
+    return response.data
 
-def clear(user_id: str, user_jwt: str = None):
-    """Clear all articles from history for a specific user"""
-    user_client = get_supabase_client(user_jwt)
-    
-    # SQL: SELECT article_id FROM "Input History" WHERE input_by_user = user_id
-    history_response = user_client.from_('Input History') \
-        .select('article_id') \
-        .eq('input_by_user', user_id) \
-        .execute()
-    
-    if not history_response.data:
-        return True
-
-    article_ids = [item['article_id'] for item in history_response.data]
-
-    # Delete in correct order due to foreign key constraints
-    # SQL: DELETE FROM "Input History" WHERE input_by_user = user_id
-    user_client.table('Input History').delete().eq('input_by_user', user_id).execute()
-    # SQL: DELETE FROM "AI Result" WHERE article_id IN (article_ids)
-    supabase_admin_client.table('AI Result').delete().in_('article_id', article_ids).execute()
-    # SQL: DELETE FROM Article WHERE id IN (article_ids)
-    supabase_admin_client.table('Article').delete().in_('id', article_ids).execute()
-    
-    return True
\ No newline at end of file
+async def clear(user_id: str, user_jwt: str = None):
+    """
+    Clear all articles from history for a specific user, and delete the
+    articles no other user's history points at, in a single transaction
+    """
+    # SQL: SELECT clear_history(user_id)
+    # Articles are shared between users who submitted the same URL, so only
+    # orphaned ones are deleted, see
+    # supabase/migrations/20261018000500_clear_history_function.sql
+    await get_admin_client().rpc('clear_history', {'p_user_id': user_id}).execute()
+    return True
@@ -1,19 +1,397 @@
+import hashlib
+import json
 import os
 import pickle
+import re
+import resource
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from ..config import settings
+from ..lib.features import TfidfFeatureExtractor
+from ..lib.lean_model import artifact_files, load_artifacts, read_meta
+
+# Get the backend directory (parent of src/)
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+MODEL_DIR = os.path.join(BASE_DIR, "model")
+
 
 def get_all():
-    return (get_vectorizer(), get_model())
+    """Return the shared (vectorizer, model) pair, loading it on first use"""
+    return model_registry.get()
+
+def get_vectorizer(model_dir: str = MODEL_DIR):
+    """
+    Load the fitted TfidfVectorizer and swap in the faster TfidfFeatureExtractor,
+    which produces the same features. Falls back to the pickled vectorizer if
+    it uses settings the extractor doesn't support.
+    """
+    file_path = os.path.join(model_dir, "vectorizer.pkl")
+
+    with open(file_path, 'rb') as f:
+        vectorizer = pickle.load(f)
+
+    try:
+        return TfidfFeatureExtractor.from_vectorizer(vectorizer)
+    except ValueError as e:
+        print(f"Warning: Using the pickled vectorizer: {e}")
+        return vectorizer
+
+def get_model(model_dir: str = MODEL_DIR):
+    file_path = os.path.join(model_dir, "model.pkl")
+
+    with open(file_path, 'rb') as f:
+        return pickle.load(f)
+
+def get_artifact_dir():
+    return settings.MODEL_ARTIFACT_DIR or os.path.join(MODEL_DIR, "lean")
+
+def load_model_files():
+    """
+    Load (vectorizer, model, format) according to MODEL_FORMAT. The lean
+    artifacts skip importing scikit-learn and unpickling estimators, and are
+    memory-mapped unless MODEL_MMAP is off.
+    """
+    model_format = settings.MODEL_FORMAT
+    if model_format not in ("auto", "lean", "pickle"):
+        raise ValueError(f"Unknown MODEL_FORMAT {model_format!r}, expected 'auto', 'lean' or 'pickle'")
+
+    artifact_dir = get_artifact_dir()
+    if model_format == "lean" or (model_format == "auto" and read_meta(artifact_dir) is not None):
+        vectorizer, model = load_artifacts(artifact_dir, mmap=settings.MODEL_MMAP)
+        return vectorizer, model, "lean"
+    return get_vectorizer(), get_model(), "pickle"
+
+# Versioned models live in MODEL_VERSIONS_DIR/<version>/, each with a
+# manifest.json holding the sha256 of every file. ACTIVE names the version
+# to serve. Without it the unversioned files in model/ are served as "default".
+MANIFEST_FILE = "manifest.json"
+ACTIVE_FILE = "ACTIVE"
+DEFAULT_VERSION = "default"
+VERSION_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]{0,63}$")
+WARM_UP_TEXTS = ["Officials confirmed the report on Tuesday, according to a statement from the agency."]
+
+def get_versions_dir():
+    return settings.MODEL_VERSIONS_DIR or os.path.join(MODEL_DIR, "versions")
+
+def get_version_dir(version: str) -> str:
+    if version == DEFAULT_VERSION or not VERSION_PATTERN.match(version):
+        raise ValueError(f"Invalid model version {version!r}")
+    return os.path.join(get_versions_dir(), version)
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _write_json_atomic(path: str, data):
+    # Readers see either the old file or the new one, never a partial write
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+def write_manifest(version_dir: str, version: str) -> dict:
+    """Checksum every file of a model version directory into its manifest.json"""
+    files = sorted(
+        name for name in os.listdir(version_dir)
+        if name != MANIFEST_FILE and os.path.isfile(os.path.join(version_dir, name))
+    )
+    manifest = {
+        "version": version,
+        "format": "lean" if read_meta(version_dir) is not None else "pickle",
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "files": {name: _sha256(os.path.join(version_dir, name)) for name in files},
+    }
+    _write_json_atomic(os.path.join(version_dir, MANIFEST_FILE), manifest)
+    return manifest
+
+def read_manifest(version: str) -> dict:
+    path = os.path.join(get_version_dir(version), MANIFEST_FILE)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Model version {version!r} not found")
+    with open(path) as f:
+        return json.load(f)
+
+def verify_version(version: str) -> dict:
+    """Return the version's manifest after checking every file against its checksum"""
+    manifest = read_manifest(version)
+    version_dir = get_version_dir(version)
+    for name, checksum in manifest["files"].items():
+        path = os.path.join(version_dir, name)
+        if not os.path.exists(path) or _sha256(path) != checksum:
+            raise ValueError(f"Checksum mismatch for {name} in model version {version!r}")
+    return manifest
+
+def list_versions() -> List[dict]:
+    """Manifests of all model versions, oldest first"""
+    versions_dir = get_versions_dir()
+    if not os.path.isdir(versions_dir):
+        return []
+    manifests = []
+    for name in os.listdir(versions_dir):
+        if VERSION_PATTERN.match(name) and name != DEFAULT_VERSION:
+            try:
+                manifests.append(read_manifest(name))
+            except (OSError, ValueError) as e:
+                print(f"Warning: Skipping model version {name}: {e}")
+    return sorted(manifests, key=lambda manifest: manifest["created_at"])
+
+def read_active_version() -> Optional[str]:
+    path = os.path.join(get_versions_dir(), ACTIVE_FILE)
+    try:
+        with open(path) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+def write_active_version(version: str):
+    os.makedirs(get_versions_dir(), exist_ok=True)
+    path = os.path.join(get_versions_dir(), ACTIVE_FILE)
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, "w") as f:
+        f.write(version)
+    os.replace(tmp_path, path)
+
+def load_version_files(version: str):
+    """(vectorizer, model, format, mapped files) for a model version"""
+    if version == DEFAULT_VERSION:
+        vectorizer, model, model_format = load_model_files()
+        artifact_dir = get_artifact_dir()
+    else:
+        manifest = verify_version(version)
+        artifact_dir = get_version_dir(version)
+        model_format = manifest["format"]
+        if model_format == "lean":
+            vectorizer, model = load_artifacts(artifact_dir, mmap=settings.MODEL_MMAP)
+        else:
+            vectorizer, model = get_vectorizer(artifact_dir), get_model(artifact_dir)
+
+    mapped_files = []
+    if model_format == "lean" and settings.MODEL_MMAP:
+        mapped_files = [os.path.realpath(path) for path in artifact_files(artifact_dir, read_meta(artifact_dir))]
+    return vectorizer, model, model_format, mapped_files
+
+def _resident_bytes() -> int:
+    """Current resident set size of this process in bytes"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # Not on Linux; ru_maxrss is the peak RSS in KB
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+SMAPS_FIELDS = {
+    "Rss": "rss_bytes",
+    "Pss": "pss_bytes",
+    "Shared_Clean": "shared_bytes",
+    "Shared_Dirty": "shared_bytes",
+    "Private_Clean": "unique_bytes",
+    "Private_Dirty": "unique_bytes",
+}
+
+def _add_smaps_line(totals: dict, line: str):
+    field, _, value = line.partition(":")
+    key = SMAPS_FIELDS.get(field)
+    if key is not None:
+        totals[key] += int(value.split()[0]) * 1024
+
+def _memory_stats(paths=()) -> dict:
+    """
+    Memory this process shares with others (e.g. forked workers, mapped files)
+    vs memory unique to it, from /proc/self/smaps_rollup. With `paths`, also
+    totals the mappings of those files. None where /proc isn't available.
+    """
+    empty = dict.fromkeys(set(SMAPS_FIELDS.values()), 0)
+    stats = {"process": dict(empty)}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                _add_smaps_line(stats["process"], line)
+
+        if paths:
+            paths = set(paths)
+            stats["mapped_files"] = dict(empty)
+            in_file = False
+            with open("/proc/self/smaps") as f:
+                for line in f:
+                    first = line.split(None, 1)[0]
+                    if "-" in first and not first.endswith(":"):
+                        # Mapping header: "start-end perms offset dev inode [path]"
+                        parts = line.split(None, 5)
+                        in_file = len(parts) == 6 and parts[5].strip() in paths
+                    elif in_file:
+                        _add_smaps_line(stats["mapped_files"], line)
+    except OSError:
+        return None
+    return stats
+
+
+class ModelVersion:
+    """One loaded model version and its load stats"""
+
+    def __init__(self, version: str, vectorizer, model, model_format: str, mapped_files: list, stats: dict):
+        self.version = version
+        self.vectorizer = vectorizer
+        self.model = model
+        self.format = model_format
+        self.mapped_files = mapped_files
+        self.stats = stats
+
+    def predict_proba(self, texts: list):
+        return self.model.predict_proba(self.vectorizer.transform(texts))
+
+
+class ModelRegistry:
+    """
+    Process-wide holder for the loaded model versions and the active one.
+
+    Loading happens once per process. When the app is preloaded by the
+    gunicorn master (see gunicorn.conf.py) the loaded objects are inherited
+    by every forked worker and shared copy-on-write.
+
+    Switching versions loads, verifies and warms up the new version first and
+    then replaces the active reference in one assignment. Batches that
+    already picked up the previous version finish on it, and it stays loaded
+    until it falls out of the MODEL_MAX_LOADED_VERSIONS most recent ones.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._loaded = OrderedDict()
+        self._active: Optional[ModelVersion] = None
+        self.swaps = 0
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._active is not None
+
+    @property
+    def active_version(self) -> Optional[str]:
+        active = self._active
+        return active.version if active is not None else None
+
+    def _load_version(self, version: str) -> ModelVersion:
+        rss_before = _resident_bytes()
+        start_time = time.perf_counter()
+
+        vectorizer, model, model_format, mapped_files = load_version_files(version)
+
+        load_seconds = time.perf_counter() - start_time
+        rss_after = _resident_bytes()
+        return ModelVersion(version, vectorizer, model, model_format, mapped_files, {
+            "loaded": True,
+            "version": version,
+            "format": model_format,
+            "mmap": bool(mapped_files),
+            "pid": os.getpid(),
+            "load_seconds": round(load_seconds, 4),
+            "resident_bytes": rss_after,
+            "resident_delta_bytes": max(rss_after - rss_before, 0),
+        })
+
+    def _remember(self, loaded: ModelVersion):
+        self._loaded[loaded.version] = loaded
+        self._loaded.move_to_end(loaded.version)
+        while len(self._loaded) > max(settings.MODEL_MAX_LOADED_VERSIONS, 1):
+            oldest = next(iter(self._loaded))
+            if self._active is not None and oldest == self._active.version:
+                self._loaded.move_to_end(oldest)
+                continue
+            del self._loaded[oldest]
+
+    def load(self) -> dict:
+        """Load the active model version if nothing is loaded yet and return load stats"""
+        with self._lock:
+            if not self.is_loaded:
+                version = read_active_version() or DEFAULT_VERSION
+                loaded = self._loaded.get(version) or self._load_version(version)
+                self._remember(loaded)
+                self._active = loaded
+            return self.stats()
+
+    def prepare(self, version: str) -> ModelVersion:
+        """Load, verify and warm up a version without activating it"""
+        with self._lock:
+            loaded = self._loaded.get(version)
+            if loaded is None:
+                loaded = self._load_version(version)
+                # One inference up front so the first real request doesn't
+                # pay for lazy initialization or page faults
+                start_time = time.perf_counter()
+                loaded.predict_proba(WARM_UP_TEXTS)
+                loaded.stats["warm_up_seconds"] = round(time.perf_counter() - start_time, 4)
+            self._remember(loaded)
+            return loaded
+
+    def activate(self, version: str, persist: bool = True) -> dict:
+        """
+        Make `version` the one new requests are scored with. With `persist`
+        the choice is also written to the ACTIVE file, which other workers
+        pick up (see ArticleService.watch_model_version).
+        """
+        with self._lock:
+            loaded = self.prepare(version)
+            if persist:
+                # "default" is written too, so a rollback sticks for the other
+                # workers' watchers and across restarts
+                write_active_version(version)
+            if self._active is not loaded:
+                self._active = loaded
+                self.swaps += 1
+            return self.stats()
+
+    def get(self, version: str = None):
+        """Return (vectorizer, model) of `version`, or of the active version, loading them if needed"""
+        if version is None:
+            if not self.is_loaded:
+                self.load()
+            loaded = self._active
+        else:
+            loaded = self._loaded.get(version) or self.prepare(version)
+        return (loaded.vectorizer, loaded.model)
 
-def get_vectorizer():
-    # Get the backend directory (parent of src/)
-    base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    file_path = os.path.join(base_dir, "model", "vectorizer.pkl")
+    def versions(self) -> dict:
+        """Available versions, which are loaded in this process and which is active"""
+        manifests = list_versions()
+        if not any(manifest["version"] == DEFAULT_VERSION for manifest in manifests):
+            manifests.insert(0, {"version": DEFAULT_VERSION, "format": None, "created_at": None, "files": {}})
+        loaded = set(self._loaded)
+        return {
+            "active": self.active_version,
+            "versions": [
+                {**manifest, "loaded": manifest["version"] in loaded, "active": manifest["version"] == self.active_version}
+                for manifest in manifests
+            ],
+        }
 
-    return pickle.load(open(file_path, 'rb'))
+    def stats(self) -> dict:
+        active = self._active
+        if active is not None:
+            stats = dict(active.stats)
+        else:
+            stats = {
+                "loaded": False,
+                "version": None,
+                "format": None,
+                "mmap": False,
+                "pid": None,
+                "load_seconds": None,
+                "resident_bytes": None,
+                "resident_delta_bytes": None,
+            }
+        stats["swaps"] = self.swaps
+        stats["loaded_versions"] = list(self._loaded)
+        stats["current_pid"] = os.getpid()
+        stats["current_resident_bytes"] = _resident_bytes()
+        stats["memory"] = _memory_stats(active.mapped_files if active is not None else [])
+        return stats
 
-def get_model():
-    # Get the backend directory (parent of src/)
-    base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    file_path = os.path.join(base_dir, "model", "model.pkl")
 
-    return pickle.load(open(file_path, 'rb'))
\ No newline at end of file
+model_registry = ModelRegistry()
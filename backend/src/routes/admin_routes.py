@@ -0,0 +1,52 @@
+from fastapi import APIRouter, HTTPException, Depends
+from pydantic import BaseModel, Field
+from ..lib.executors import run_io
+from ..middleware.admin import require_admin_token
+from ..repository.model_repository import model_registry
+from ..services.article_service import article_service
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin_token)])
+
+class ModelActivation(BaseModel):
+    version: str = Field(..., min_length=1, max_length=64)
+
+@router.get("/models")
+async def list_models():
+    """List the model versions, which one is active and this worker's model stats"""
+    versions = await run_io(model_registry.versions)
+    return {"data": {**versions, "stats": model_registry.stats()}, "error": None}
+
+@router.put("/models/active")
+async def activate_model(activation: ModelActivation):
+    """
+    Switch to another model version without a restart. The version is
+    verified and warmed up before it takes traffic; other workers follow
+    within MODEL_RELOAD_INTERVAL_SECONDS.
+    """
+    try:
+        stats = await article_service.activate_model(activation.version)
+        return {"data": stats, "error": None}
+    except FileNotFoundError as e:
+        raise HTTPException(
+            status_code=404,
+            detail={
+                "message": "Model version not found",
+                "error": str(e)
+            }
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "message": "Invalid model version",
+                "error": str(e)
+            }
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "message": "Failed to activate model version",
+                "error": str(e)
+            }
+        )
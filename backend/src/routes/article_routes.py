@@ -1,28 +1,72 @@
-from fastapi import APIRouter, HTTPException, Depends
-from pydantic import BaseModel
-from ..services.article_service import article_service
+import hashlib
+import json
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel, Field, model_validator
+from ..config import settings
+from ..services.article_service import article_cache, article_service
 from ..middleware.auth import auth_handler
-from typing import Tuple
+from typing import List, Literal, Optional, Tuple
 
 router = APIRouter()
 
+# Browsers reuse an article while the server would; it's per user, so never in shared caches
+ARTICLE_CACHE_CONTROL = (
+    f"private, max-age={int(settings.ARTICLE_CACHE_FRESH_SECONDS)}, "
+    f"stale-while-revalidate={int(settings.ARTICLE_CACHE_TTL_SECONDS - settings.ARTICLE_CACHE_FRESH_SECONDS)}"
+)
+
 from pydantic import HttpUrl
 
 class ArticleSubmission(BaseModel):
     url: HttpUrl
 
+class BatchArticleSubmission(BaseModel):
+    urls: List[HttpUrl] = Field(..., min_length=1, max_length=settings.BATCH_MAX_URLS)
+
+class ContentSubmission(BaseModel):
+    text: Optional[str] = Field(None, min_length=1, max_length=settings.FETCH_MAX_BYTES)
+    html: Optional[str] = Field(None, min_length=1, max_length=settings.FETCH_MAX_BYTES)
+    title: Optional[str] = Field(None, max_length=1000)
+    url: Optional[HttpUrl] = None
+
+    @model_validator(mode="after")
+    def check_one_body(self):
+        if (self.text is None) == (self.html is None):
+            raise ValueError("Provide exactly one of text or html")
+        return self
+
 @router.get("/articles/history")
-async def get_article_history(auth: Tuple[str, str] = Depends(auth_handler.get_user_with_token)):
-    """Get the history of analyzed articles for the current user"""
+async def get_article_history(
+    response: Response,
+    before: Optional[int] = Query(None, ge=1),
+    limit: int = Query(settings.HISTORY_PAGE_SIZE, ge=1, le=settings.HISTORY_MAX_PAGE_SIZE),
+    fields: Literal["full", "summary"] = "full",
+    auth: Tuple[str, str] = Depends(auth_handler.get_user_with_token)
+):
+    """
+    Get a page of the history of analyzed articles for the current user.
+    Pass the X-Next-Cursor header of one page as `before` to get the next.
+    """
     user_id, jwt_token = auth
-    history = article_service.get_article_history(user_id, jwt_token)
-    return {"data": history, "error": None}
+    page = await article_service.get_article_history(
+        user_id,
+        jwt_token,
+        before=before,
+        limit=limit,
+        summary=fields == "summary"
+    )
+    if page["total"] is not None:
+        response.headers["X-Total-Count"] = str(page["total"])
+    if page["next_before"] is not None:
+        response.headers["X-Next-Cursor"] = str(page["next_before"])
+    return {"data": page["items"], "error": None}
 
 @router.delete("/articles/history")
 async def clear_article_history(auth: Tuple[str, str] = Depends(auth_handler.get_user_with_token)):
     """Clear all articles from history for the current user"""
     user_id, jwt_token = auth
-    article_service.clear_history(user_id, jwt_token)
+    await article_service.clear_history(user_id, jwt_token)
     return {"data": None, "error": None}
 
 @router.post("/articles/analyze")
@@ -33,42 +77,109 @@ async def analyze_article(
     """Analyze a new article for the current user"""
     user_id, jwt_token = auth
     str_url = str(submission.url)
-    analysis = article_service.analyze_article(str_url, user_id, jwt_token)
+    analysis = await article_service.analyze_article(str_url, user_id, jwt_token)
     return {"data": analysis, "error": None}
 
+@router.post("/articles/analyze/text")
+async def analyze_article_content(
+    submission: ContentSubmission,
+    auth: Tuple[str, str] = Depends(auth_handler.get_user_with_token)
+):
+    """
+    Analyze article text or HTML the client already has, without downloading
+    anything. Only saved to history when a url is given.
+    """
+    user_id, jwt_token = auth
+    analysis = await article_service.analyze_content(
+        user_id,
+        jwt_token,
+        text=submission.text,
+        html=submission.html,
+        title=submission.title,
+        url=str(submission.url) if submission.url else None
+    )
+    return {"data": analysis, "error": None}
+
+@router.post("/articles/analyze/batch")
+async def analyze_articles(
+    submission: BatchArticleSubmission,
+    auth: Tuple[str, str] = Depends(auth_handler.get_user_with_token)
+):
+    """Analyze several articles in one request for the current user"""
+    user_id, jwt_token = auth
+    str_urls = [str(url) for url in submission.urls]
+    results = await article_service.analyze_articles(str_urls, user_id, jwt_token)
+    return {"data": results, "error": None}
+
+def serialize_article_response(article) -> Tuple[bytes, str]:
+    """The JSON body of an article response and its ETag"""
+    body = json.dumps(
+        jsonable_encoder({"data": article, "error": None}),
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":")
+    ).encode("utf-8")
+    return body, f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
 @router.get("/articles/{article_id}")
 async def get_article(
     article_id: int,
+    request: Request,
     auth: Tuple[str, str] = Depends(auth_handler.get_user_with_token)
 ):
-    """Get a specific article by ID for the current user"""
+    """
+    Get a specific article by ID for the current user. Analyses never change
+    once saved, so repeat views are answered from the article cache, and a
+    matching If-None-Match gets a 304.
+    """
     user_id, jwt_token = auth
-    try:
-        article = article_service.get_article_by_id(article_id, user_id, jwt_token)
-        if not article:
+
+    async def load():
+        try:
+            article = await article_service.get_article_by_id(article_id, user_id, jwt_token)
+            if not article:
+                raise HTTPException(
+                    status_code=404,
+                    detail={
+                        "message": "Article not found",
+                        "error": f"No article found with ID {article_id} for current user"
+                    }
+                )
+            return serialize_article_response(article)
+        except HTTPException:
+            raise
+        except ValueError as e:
             raise HTTPException(
-                status_code=404,
+                status_code=400,
                 detail={
-                    "message": "Article not found",
-                    "error": f"No article found with ID {article_id} for current user"
+                    "message": "Invalid article ID",
+                    "error": str(e)
                 }
             )
-        return {"data": article, "error": None}
-    except HTTPException:
-        raise
-    except ValueError as e:
-        raise HTTPException(
-            status_code=400,
-            detail={
-                "message": "Invalid article ID",
-                "error": str(e)
-            }
-        )
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail={
-                "message": "Failed to retrieve article",
-                "error": str(e)
-            }
-        )
\ No newline at end of file
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail={
+                    "message": "Failed to retrieve article",
+                    "error": str(e)
+                }
+            )
+
+    # Keyed by owner as well, so a cached response is only served to a user who
+    # could load it, and by history generation, so clearing history on any worker
+    # retires it everywhere
+    generation = await article_service.history_generation(user_id)
+    if generation is None:
+        body, etag = await load()
+    else:
+        body, etag = await article_cache.get_or_load((user_id, generation, article_id), load)
+    headers = {"ETag": etag, "Cache-Control": ARTICLE_CACHE_CONTROL, "Vary": "Authorization"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -2,7 +2,13 @@
 Health check routes for monitoring service availability
 """
 from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
 from src.config import settings
+from src.lib.supabase_client import pool_stats
+from src.lib.timing import stage_metrics
+from src.middleware.auth import auth_handler
+from src.repository.model_repository import model_registry
+from src.services.article_service import analysis_cache, article_cache, inference_scheduler, shadow_scorer
 
 router = APIRouter(tags=["health"])
 
@@ -14,3 +20,44 @@ async def health_check():
         "service": settings.APP_NAME,
         "version": "1.0.0"
     }
+
+@router.get("/healthz/model")
+async def model_health():
+    """Report model load time and resident memory for this worker"""
+    return model_registry.stats()
+
+@router.get("/healthz/inference")
+async def inference_health():
+    """Report micro-batching queue depth and batch size metrics"""
+    return inference_scheduler.stats()
+
+@router.get("/healthz/shadow")
+async def shadow_health():
+    """Report shadow model sampling, agreement rate and latency for this worker"""
+    return shadow_scorer.stats()
+
+@router.get("/healthz/cache")
+async def cache_health():
+    """Report analysis cache size and hit rate for this worker"""
+    return analysis_cache.stats()
+
+@router.get("/healthz/article-cache")
+async def article_cache_health():
+    """Report article response cache size, hit rate and background revalidations for this worker"""
+    return article_cache.stats()
+
+@router.get("/healthz/supabase")
+async def supabase_health():
+    """Report Supabase connection pool utilization and reuse for this worker"""
+    return pool_stats()
+
+@router.get("/healthz/auth")
+async def auth_health():
+    """Report the JWT backend, signing keys and verification cache hit rate for this worker"""
+    return auth_handler.stats()
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Per-stage analyze latency histograms for this worker, in the Prometheus text format"""
+    return PlainTextResponse(stage_metrics.render(), media_type="text/plain; version=0.0.4")
@@ -1,9 +1,76 @@
+import asyncio
+import os
+import time
 from datetime import datetime
+from typing import Optional
 from newspaper import Article
 from fastapi import HTTPException
+from ..config import settings
+from ..lib.article_fetcher import article_fetcher
+from ..lib.cache import LRUCache, RedisCache, StaleWhileRevalidateCache, TieredCache
+from ..lib.executors import call_shadow, get_cpu_executor, get_shadow_executor, run_cpu, run_io, submit_cpu
+from ..lib.timing import record_all, stage
+from ..lib.urls import canonicalize_url, resolve_canonical_url
 from ..repository import article_repository
+from ..repository.model_repository import model_registry, read_active_version
+from .inference_scheduler import InferenceScheduler
+from .shadow_scorer import ShadowScorer
+
+def source_from_url(url: str):
+    return url.split('/')[2] if '://' in url else 'Unknown Source'
+
+def parse_article_html(url: str, html: str, final_url: str = None):
+    """Extract article fields from downloaded HTML without any network access"""
+    article = Article(url)
+    article.download(input_html=html)
+    article.parse()
+
+    current_time = datetime.now().isoformat()
+
+    return {
+        "url": url,
+        "canonical_url": resolve_canonical_url(url, final_url, article.canonical_link),
+        "source": source_from_url(url),
+        "title": article.title,
+        "authors": article.authors,
+        "collected_date": current_time,
+        "publish_date": article.publish_date.isoformat() if article.publish_date else None,
+        "text": article.text,
+    }
+
+def predict_texts_in_worker(texts: list, version: str = None):
+    """Module-level entry point so inference can be pickled to the process pool"""
+    return ArticleService.predict_texts(texts, version)
+
+def predict_texts_timed_in_worker(texts: list, version: str = None):
+    """Like predict_texts_in_worker, also returning the {stage: seconds} measured in the worker"""
+    timings = {}
+    predictions = ArticleService.predict_texts(texts, version, timings)
+    return predictions, timings
+
+def predict_scheduled_in_worker(texts: list, version: str = None):
+    """Score a micro-batch; each item gets its prediction and the batch's worker timings"""
+    predictions, timings = predict_texts_timed_in_worker(texts, version)
+    return [(prediction, timings) for prediction in predictions]
+
+def predict_scheduled_batch(texts: list):
+    """
+    Hand a micro-batch to the process pool without waiting for it, so the
+    scheduler can keep every pool worker busy
+    """
+    return submit_cpu(predict_scheduled_in_worker, texts, model_registry.active_version)
+
+def predict_shadow_batch(texts: list):
+    """Score sampled texts with the shadow model, in the shadow pool rather than the live one"""
+    return call_shadow(predict_texts_in_worker, texts, settings.SHADOW_MODEL_VERSION)
+
+def warm_up_in_worker(version: str):
+    """Load and warm up a model version in a process pool worker"""
+    model_registry.prepare(version)
+    return os.getpid()
 
 class ArticleService:
+    # Fixed (vectorizer, model) pair that bypasses the model registry, e.g. in tests
     vectorizer = None
     model = None
     
@@ -34,11 +101,24 @@ class ArticleService:
     }
 
     @staticmethod
-    def get_article_history(user_id: str, user_jwt: str = None):
-        """Get all articles in the history for a user"""
+    async def get_article_history(user_id: str, user_jwt: str = None, before: int = None,
+                            limit: int = None, summary: bool = False):
+        """
+        Get one page of the history for a user, newest first.
+        Returns {"items", "total", "next_before"}; `total` is only counted on
+        the first page and `next_before` is None on the last one.
+        """
+        limit = limit or settings.HISTORY_PAGE_SIZE
         try:
-            history = article_repository.get_all(user_id, user_jwt)
-            return history if history else []
+            # Ask for one extra row to know whether another page exists
+            items, total = await article_repository.get_page(
+                user_id,
+                user_jwt,
+                before=before,
+                limit=limit + 1,
+                summary=summary,
+                with_total=before is None
+            )
         except Exception as e:
             raise HTTPException(
                 status_code=500,
@@ -48,11 +128,49 @@ class ArticleService:
                 }
             )
 
+        items = items or []
+        has_more = len(items) > limit
+        items = items[:limit]
+        return {
+            "items": items,
+            "total": total,
+            "next_before": items[-1]["history_index"] if has_more else None
+        }
+
     @staticmethod
-    def clear_history(user_id: str, user_jwt: str = None):
+    async def history_generation(user_id: str) -> Optional[int]:
+        """
+        Generation of the user's history, part of their article cache keys.
+        Always 0 without Redis; None when Redis can't be read, so the caller
+        skips the cache rather than risk serving a cleared article.
+        """
+        if history_generations is None:
+            return 0
+        try:
+            return int(await run_io(history_generations.get, user_id, 0))
+        except Exception as e:
+            print(f"Warning: Failed to read history generation: {e}")
+            return None
+
+    @staticmethod
+    async def invalidate_article_cache(user_id: str):
+        """
+        Drop the user's cached articles in this worker, and bump their history
+        generation in Redis so the other workers stop serving them too
+        """
+        article_cache.invalidate(lambda key: key[0] == user_id)
+        if history_generations is not None:
+            try:
+                await run_io(history_generations.incr, user_id)
+            except Exception as e:
+                print(f"Warning: Failed to bump history generation: {e}")
+
+    @staticmethod
+    async def clear_history(user_id: str, user_jwt: str = None):
         """Clear all articles from history for a user"""
         try:
-            success = article_repository.clear(user_id, user_jwt)
+            success = await article_repository.clear(user_id, user_jwt)
+            await ArticleService.invalidate_article_cache(user_id)
             return [] if success else None
         except Exception as e:
             raise HTTPException(
@@ -64,24 +182,15 @@ class ArticleService:
             )
         
     @staticmethod
-    def pull_article(url: str):
+    async def pull_article(url: str):
         """Pull article content from a URL"""
         try:
-            article = Article(url)
-            article.download()
-            article.parse()
-
-            current_time = datetime.now().isoformat()
+            with stage("fetch"):
+                page = await article_fetcher.fetch(url)
 
-            return {
-                "url": url,
-                "source": url.split('/')[2] if '://' in url else 'Unknown Source',
-                "title": article.title,
-                "authors": article.authors,
-                "collected_date": current_time,
-                "publish_date": article.publish_date.isoformat() if article.publish_date else None,
-                "text": article.text,
-            }
+            # Parsing is CPU-bound, so it runs in the process pool
+            with stage("parse"):
+                return await run_cpu(parse_article_html, url, page["html"], page["final_url"])
         except Exception as e:
             raise HTTPException(
                 status_code=500,
@@ -92,73 +201,275 @@ class ArticleService:
             )
         
     @staticmethod
-    def ai_analysis(article: dict):
-        if ArticleService.vectorizer is None or ArticleService.model is None:
-            from ..repository.model_repository import get_all
-            ArticleService.vectorizer, ArticleService.model = get_all()
+    def article_text(article: dict):
+        return article.get("title", "") + " " + article.get("text", "")
+
+    @staticmethod
+    def predict_texts(texts: list, version: str = None, timings: dict = None):
+        """
+        Run one vectorize and predict_proba call over a list of texts with the
+        given model version, or the active one. Stage durations are added to
+        `timings` when given.
+        """
+        if ArticleService.vectorizer is not None and ArticleService.model is not None:
+            vectorizer, model = ArticleService.vectorizer, ArticleService.model
+        else:
+            vectorizer, model = model_registry.get(version)
 
-        text = article.get("title", "") + " " + article.get("text", "")
+        start_time = time.perf_counter()
+        vectorized_texts = vectorizer.transform(texts)
+        vectorized_time = time.perf_counter()
+        predictions = model.predict_proba(vectorized_texts)
+        if timings is not None:
+            timings["vectorize"] = vectorized_time - start_time
+            timings["predict"] = time.perf_counter() - vectorized_time
+        return predictions
 
-        vectorized_text = ArticleService.vectorizer.transform([text])
-        prediction = ArticleService.model.predict_proba(vectorized_text)
+    @staticmethod
+    async def ai_analysis(article: dict):
+        # Concurrent requests are coalesced into one model call by the scheduler
+        text = ArticleService.article_text(article)
+        version = model_registry.active_version
+        start_time = time.perf_counter()
+        with stage("inference"):
+            future = inference_scheduler.submit(text)
+            prediction, timings = await asyncio.wrap_future(future)
+        record_all(timings)
+        shadow_scorer.submit([text], [prediction], time.perf_counter() - start_time, version)
         return {
-            "prediction": prediction[0]
+            "prediction": prediction
         }
 
     @staticmethod
-    def analyze_article(url: str, user_id: str, user_jwt: str = None):
+    async def ai_analysis_batch(articles: list):
+        """Score several articles with a single vectorize and predict_proba call"""
+        texts = [ArticleService.article_text(article) for article in articles]
+        version = model_registry.active_version
+        start_time = time.perf_counter()
+        with stage("inference"):
+            predictions, timings = await run_cpu(predict_texts_timed_in_worker, texts, version)
+        record_all(timings)
+        shadow_scorer.submit(texts, predictions, time.perf_counter() - start_time, version)
+        return [{"prediction": prediction} for prediction in predictions]
+
+    @staticmethod
+    async def activate_model(version: str, persist: bool = True):
+        """
+        Switch the model version new requests are scored with. The version is
+        loaded and warmed up in the process pool workers before the swap, so
+        requests don't stall on the first inference with it; batches already
+        dispatched finish on the previous version.
+        """
+        await run_io(model_registry.prepare, version)
+        if get_cpu_executor() is not None:
+            # Each worker usually takes one of these; one that doesn't loads
+            # the version on its first batch instead
+            await asyncio.gather(*[
+                run_cpu(warm_up_in_worker, version) for _ in range(settings.CPU_POOL_SIZE)
+            ])
+        return await run_io(model_registry.activate, version, persist)
+
+    @staticmethod
+    async def prepare_shadow_model():
+        """
+        Load, verify and warm up the shadow model version at startup, where it
+        will be scored, so the first sampled request doesn't pay for it
+        """
+        if not shadow_scorer.enabled:
+            return
+        version = shadow_scorer.version
+        try:
+            shadow_executor = get_shadow_executor()
+            if shadow_executor is None:
+                await run_io(model_registry.prepare, version)
+            else:
+                loop = asyncio.get_running_loop()
+                await asyncio.gather(*[
+                    loop.run_in_executor(shadow_executor, warm_up_in_worker, version)
+                    for _ in range(settings.SHADOW_POOL_SIZE)
+                ])
+            print(f"Shadow model version {version} ready")
+        except Exception as e:
+            print(f"Warning: Failed to load shadow model version {version}: {e}")
+
+    @staticmethod
+    async def watch_model_version():
+        """
+        Follow the ACTIVE model version written by any worker. Runs for the
+        lifetime of the app, checking every MODEL_RELOAD_INTERVAL_SECONDS.
+        """
+        while True:
+            await asyncio.sleep(settings.MODEL_RELOAD_INTERVAL_SECONDS)
+            try:
+                version = await run_io(read_active_version)
+                if version is not None and version != model_registry.active_version:
+                    await ArticleService.activate_model(version, persist=False)
+                    print(f"Switched to model version {version}")
+            except Exception as e:
+                print(f"Warning: Failed to switch model version: {e}")
+
+    @staticmethod
+    def build_analysis(article: dict, ai_result: dict, user_id: str):
+        """Turn a model prediction into the analysis record that gets saved"""
+        current_time = datetime.now().isoformat()
+
+        # Check if the source is from a known satirical site
+        is_satire = article["source"] in ArticleService.SATIRICAL_DOMAINS
+
+        truthness_label = ""
+        genre = ""
+        truthness_score = 0
+
+        # prediction[0] = probability of real, prediction[1] = probability of fake
+        # Use prediction[0] directly as the real probability
+        real_probability = ai_result["prediction"][0]
+
+        if real_probability > 0.60:
+            truthness_label = "Reliable"
+            genre = "Real News"
+            truthness_score = real_probability
+        else:
+            truthness_label = "Unreliable"
+            genre = "Fake News"
+            truthness_score = real_probability
+
+        return {
+            "input_by_user": user_id,
+            "created_at": current_time,
+            "article": article,
+            "ai_result": {
+                "genre" : genre if not is_satire else "Satire",
+                "truthness_label": truthness_label,
+                "truthness_score": truthness_score,
+                "related_articles": [],
+                "is_satire": is_satire
+            }
+        }
+
+    @staticmethod
+    def already_analyzed_error():
+        return HTTPException(
+            status_code=409,
+            detail={
+                "message": "Article already analyzed",
+                "error": "This URL has already been analyzed"
+            }
+        )
+
+    @staticmethod
+    async def analyze_article(url: str, user_id: str, user_jwt: str = None):
         """Analyze a new article and add it to history"""
+        canonical_url = canonicalize_url(url)
+
         # Check for duplicate article URL first
-        existing_articles = article_repository.get_all(user_id, user_jwt)
-        if any(article['article']['url'] == url for article in existing_articles):
+        if await article_repository.has_analyzed(user_id, canonical_url, user_jwt):
+            raise ArticleService.already_analyzed_error()
+        
+        try:
+            # Someone already analyzed this URL, so only add it to this user's history
+            result = await ArticleService.link_existing_analysis(canonical_url, user_id, user_jwt)
+            if result:
+                return result
+
+            article = await ArticleService.pull_article(url)
+            result = await ArticleService.link_page_canonical(article, canonical_url, user_id, user_jwt)
+            if result:
+                return result
+            page_canonical_url = article.get("canonical_url") or canonical_url
+
+            ai_result = await ArticleService.ai_analysis(article)
+            analysis = ArticleService.build_analysis(article, ai_result, user_id)
+
+            result = await article_repository.save(analysis, user_jwt)
+            if not result:
+                raise HTTPException(
+                    status_code=500,
+                    detail={
+                        "message": "Failed to save article analysis",
+                        "error": "Database error occurred while saving"
+                    }
+                )
+            await ArticleService.cache_analysis({canonical_url, page_canonical_url}, analysis, result)
+            return result
+
+        except HTTPException:
+            raise
+        except Exception as e:
+            # Catch any unexpected errors and wrap them in HTTPException
             raise HTTPException(
-                status_code=409,
+                status_code=500,
                 detail={
-                    "message": "Article already analyzed",
-                    "error": "This URL has already been analyzed"
+                    "message": "Failed to analyze article",
+                    "error": str(e)
                 }
             )
-        
-        try:
-            article = ArticleService.pull_article(url)
-            current_time = datetime.now().isoformat()
-            
-            # Check if the source is from a known satirical site
-            is_satire = article["source"] in ArticleService.SATIRICAL_DOMAINS
-            
-            ai_result = ArticleService.ai_analysis(article)
-
-            truthness_label = ""
-            genre = ""
-            truthness_score = 0
-
-            # prediction[0] = probability of real, prediction[1] = probability of fake
-            # Use prediction[0] directly as the real probability
-            real_probability = ai_result["prediction"][0]
-
-            if real_probability > 0.60:
-                truthness_label = "Reliable"
-                genre = "Real News"
-                truthness_score = real_probability
-            else:
-                truthness_label = "Unreliable"
-                genre = "Fake News"
-                truthness_score = real_probability
-
-            analysis = {
-                "input_by_user": user_id,
-                "created_at": current_time,
-                "article": article,
-                "ai_result": {
-                    "genre" : genre if not is_satire else "Satire",
-                    "truthness_label": truthness_label,
-                    "truthness_score": truthness_score,
-                    "related_articles": [],
-                    "is_satire": is_satire
-                }
+
+    @staticmethod
+    async def parse_submitted_article(text: str = None, html: str = None, title: str = None, url: str = None):
+        """Build an article from submitted text or HTML without any network access"""
+        if html is not None:
+            try:
+                # Parsing is CPU-bound, so it runs in the process pool
+                with stage("parse"):
+                    article = await run_cpu(parse_article_html, url or "", html)
+            except Exception as e:
+                raise HTTPException(
+                    status_code=400,
+                    detail={
+                        "message": "Failed to parse article HTML",
+                        "error": str(e)
+                    }
+                )
+        else:
+            article = {
+                "url": url,
+                "canonical_url": canonicalize_url(url) if url else None,
+                "source": source_from_url(url or ""),
+                "title": "",
+                "authors": [],
+                "collected_date": datetime.now().isoformat(),
+                "publish_date": None,
+                "text": text,
             }
 
-            result = article_repository.save(analysis, user_jwt)
+        if not url:
+            article["url"] = article["canonical_url"] = None
+        if title:
+            article["title"] = title
+        if not (article["text"] or "").strip():
+            raise HTTPException(
+                status_code=422,
+                detail={
+                    "message": "No article text found",
+                    "error": "The submitted content has no article text to analyze"
+                }
+            )
+        return article
+
+    @staticmethod
+    async def analyze_content(user_id: str, user_jwt: str = None, text: str = None, html: str = None,
+                              title: str = None, url: str = None):
+        """
+        Analyze an article body the caller already has, skipping the download.
+        With a url it is saved to the user's history, but as a private row:
+        the content is the caller's word, so the verdict is never shared with
+        other users or cached under the URL. Without a url the analysis is
+        returned but not saved.
+        """
+        article = await ArticleService.parse_submitted_article(text=text, html=html, title=title, url=url)
+        if url:
+            # Keyed by the submitted URL, not a canonical link inside the submitted HTML
+            article["canonical_url"] = canonicalize_url(url)
+            if await article_repository.has_analyzed(user_id, article["canonical_url"], user_jwt):
+                raise ArticleService.already_analyzed_error()
+
+        try:
+            ai_result = await ArticleService.ai_analysis(article)
+            analysis = ArticleService.build_analysis(article, ai_result, user_id)
+            if not url:
+                return analysis
+
+            result = await article_repository.save(analysis, user_jwt, submitted=True)
             if not result:
                 raise HTTPException(
                     status_code=500,
@@ -168,9 +479,9 @@ class ArticleService:
                     }
                 )
             return result
-
+        except HTTPException:
+            raise
         except Exception as e:
-            # Catch any unexpected errors and wrap them in HTTPException
             raise HTTPException(
                 status_code=500,
                 detail={
@@ -180,10 +491,200 @@ class ArticleService:
             )
 
     @staticmethod
-    def get_article_by_id(article_id: int, user_id: str, user_jwt: str = None):
+    async def link_existing_analysis(canonical_url: str, user_id: str, user_jwt: str = None):
+        """
+        Add an article that was already analyzed (by anyone) to the user's history
+        without downloading or scoring it again. Looks in the analysis cache first,
+        then does an indexed canonical URL lookup. Returns None when there is no
+        existing analysis.
+        """
+        existing = await analysis_cache.get(canonical_url)
+        from_cache = existing is not None
+        if not from_cache:
+            try:
+                existing = await article_repository.find_by_canonical_url(canonical_url)
+            except Exception as e:
+                print(f"Warning: Canonical URL lookup failed for {canonical_url}: {e}")
+                return None
+            if existing is None:
+                return None
+
+        try:
+            result = await article_repository.link_to_history(
+                user_id, existing["article_id"], existing["ai_result_id"], user_jwt
+            )
+        except Exception as e:
+            # The rows may have been removed by a history clear
+            print(f"Warning: Could not reuse analysis for {canonical_url}: {e}")
+            result = None
+
+        if not result:
+            if from_cache:
+                await analysis_cache.delete(canonical_url)
+            return None
+
+        if not from_cache:
+            await analysis_cache.set(canonical_url, existing)
+        return result
+
+    @staticmethod
+    async def link_page_canonical(article: dict, canonical_url: str, user_id: str, user_jwt: str = None):
+        """
+        Redirects and <link rel="canonical"> can reveal a known article after the
+        download. Raises the 409 if it is already in the user's history, and links
+        an existing analysis of it instead of scoring it again. Returns the linked
+        history row, or None when the article still needs scoring.
+        """
+        page_canonical_url = article.get("canonical_url") or canonical_url
+        if page_canonical_url == canonical_url:
+            return None
+
+        if await article_repository.has_analyzed(user_id, page_canonical_url, user_jwt):
+            raise ArticleService.already_analyzed_error()
+        result = await ArticleService.link_existing_analysis(page_canonical_url, user_id, user_jwt)
+        if result:
+            await ArticleService.cache_analysis([canonical_url], None, result)
+        return result
+
+    @staticmethod
+    async def cache_analysis(canonical_urls, analysis: dict, result: dict):
+        """Remember the saved Article and AI Result rows under each canonical URL"""
+        ai_result = result.get("ai_result") if isinstance(result, dict) else None
+        if isinstance(ai_result, list):
+            ai_result = ai_result[0] if ai_result else None
+        if not ai_result or "id" not in result or "id" not in ai_result:
+            return
+
+        entry = {"article_id": result["id"], "ai_result_id": ai_result["id"]}
+        if analysis is not None:
+            entry["article"] = {key: value for key, value in analysis["article"].items() if key != "text"}
+            entry["ai_result"] = analysis["ai_result"]
+
+        for canonical_url in canonical_urls:
+            await analysis_cache.set(canonical_url, entry)
+
+    @staticmethod
+    def _error_detail(e: Exception, message: str):
+        """Per-item error payload in the same shape as HTTPException details"""
+        if isinstance(e, HTTPException):
+            return e.detail
+        return {"message": message, "error": str(e)}
+
+    @staticmethod
+    async def analyze_articles(urls: list, user_id: str, user_jwt: str = None):
+        """
+        Analyze several articles for the current user.
+        Articles are downloaded concurrently and scored with a single model call.
+        Returns one {url, data, error} entry per unique URL, in submission order.
+        """
+        urls = list(dict.fromkeys(urls))
+        results = {url: {"url": url, "data": None, "error": None} for url in urls}
+
+        canonical_urls = {url: canonicalize_url(url) for url in urls}
+        try:
+            history_urls = await article_repository.find_analyzed(
+                user_id, list(set(canonical_urls.values())), user_jwt
+            )
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail={
+                    "message": "Failed to retrieve article history",
+                    "error": str(e)
+                }
+            )
+
+        pending = {}
+        for url in urls:
+            canonical_url = canonical_urls[url]
+            if canonical_url in history_urls:
+                results[url]["error"] = ArticleService.already_analyzed_error().detail
+            elif canonical_url in pending:
+                results[url]["error"] = {
+                    "message": "Duplicate article in batch",
+                    "error": f"Same article as {pending[canonical_url]}"
+                }
+            else:
+                pending[canonical_url] = url
+
+        linked = await asyncio.gather(
+            *(ArticleService.link_existing_analysis(canonical_url, user_id, user_jwt) for canonical_url in pending),
+            return_exceptions=True
+        )
+        for canonical_url, result in zip(list(pending), linked):
+            if result and not isinstance(result, Exception):
+                results[pending.pop(canonical_url)]["data"] = result
+
+        if not pending:
+            return list(results.values())
+
+        fetch_limit = asyncio.Semaphore(settings.BATCH_FETCH_CONCURRENCY)
+
+        async def pull(url):
+            try:
+                async with fetch_limit:
+                    article = await ArticleService.pull_article(url)
+                result = await ArticleService.link_page_canonical(article, canonical_urls[url], user_id, user_jwt)
+            except Exception as e:
+                results[url]["error"] = ArticleService._error_detail(e, "Failed to pull article")
+                return None
+            if result:
+                results[url]["data"] = result
+                return None
+            return article
+
+        async def save(analysis):
+            url = analysis["article"]["url"]
+            try:
+                result = await article_repository.save(analysis, user_jwt)
+                if not result:
+                    raise Exception("Database error occurred while saving")
+                results[url]["data"] = result
+                canonical_urls = {canonicalize_url(url), analysis["article"].get("canonical_url") or canonicalize_url(url)}
+                await ArticleService.cache_analysis(canonical_urls, analysis, result)
+            except Exception as e:
+                results[url]["error"] = ArticleService._error_detail(e, "Failed to save article analysis")
+
+        # URLs that lead to the same page are scored once
+        to_score = {}
+        for article in await asyncio.gather(*(pull(url) for url in pending.values())):
+            if article is None:
+                continue
+            page_canonical_url = article.get("canonical_url") or canonical_urls[article["url"]]
+            if page_canonical_url in to_score:
+                results[article["url"]]["error"] = {
+                    "message": "Duplicate article in batch",
+                    "error": f"Same article as {to_score[page_canonical_url]['url']}"
+                }
+            else:
+                to_score[page_canonical_url] = article
+        pulled = list(to_score.values())
+        if not pulled:
+            return list(results.values())
+
+        try:
+            ai_results = await ArticleService.ai_analysis_batch(pulled)
+        except Exception as e:
+            for article in pulled:
+                results[article["url"]]["error"] = {
+                    "message": "Failed to analyze article",
+                    "error": str(e)
+                }
+            return list(results.values())
+
+        analyses = [
+            ArticleService.build_analysis(article, ai_result, user_id)
+            for article, ai_result in zip(pulled, ai_results)
+        ]
+        await asyncio.gather(*(save(analysis) for analysis in analyses))
+
+        return list(results.values())
+
+    @staticmethod
+    async def get_article_by_id(article_id: int, user_id: str, user_jwt: str = None):
         """Get a specific article by ID"""
         try:
-            article = article_repository.get_by_id(article_id, user_jwt)
+            article = await article_repository.get_by_id(article_id, user_jwt)
             if not article:
                 raise HTTPException(
                     status_code=404,
@@ -206,13 +707,41 @@ class ArticleService:
                 }
             )
 
-article_service = ArticleService()
+analysis_cache = TieredCache(
+    LRUCache(settings.ANALYSIS_CACHE_SIZE, settings.ANALYSIS_CACHE_TTL_SECONDS),
+    RedisCache(settings.CACHE_REDIS_URL, "analysis:", settings.ANALYSIS_CACHE_TTL_SECONDS)
+    if settings.CACHE_REDIS_URL else None
+)
+
+# Serialized GET /articles/{id} responses, keyed by (owner, history generation, article id)
+article_cache = StaleWhileRevalidateCache(
+    settings.ARTICLE_CACHE_SIZE,
+    fresh_seconds=settings.ARTICLE_CACHE_FRESH_SECONDS,
+    ttl_seconds=settings.ARTICLE_CACHE_TTL_SECONDS,
+)
 
-if __name__ == "__main__":
-    test_url = "https://www.whitehouse.gov/articles/2025/10/top-democrat-cheers-americans-suffering-as-leverage-in-their-sick-political-game/"
-    service = ArticleService()
-    article = service.pull_article(test_url)
-    print(article)
-    analysis = service.ai_analysis(article)
-    print(analysis)
-    
\ No newline at end of file
+# Per-user history generations shared by all workers, bumped when a history is
+# cleared. Kept as long as the cached articles they guard
+history_generations = (
+    RedisCache(settings.CACHE_REDIS_URL, "history-generation:", settings.ARTICLE_CACHE_TTL_SECONDS)
+    if settings.CACHE_REDIS_URL else None
+)
+
+inference_scheduler = InferenceScheduler(
+    predict_scheduled_batch,
+    max_batch_size=settings.INFERENCE_MAX_BATCH_SIZE,
+    max_wait_ms=settings.INFERENCE_BATCH_WINDOW_MS,
+    # One batch per process pool worker; inline scoring runs one at a time
+    max_in_flight=max(1, settings.CPU_POOL_SIZE),
+)
+
+# Scores a sample of requests with a candidate model off the response path
+shadow_scorer = ShadowScorer(
+    predict_shadow_batch,
+    version=settings.SHADOW_MODEL_VERSION,
+    sample_rate=settings.SHADOW_SAMPLE_RATE,
+    max_queue_size=settings.SHADOW_QUEUE_SIZE,
+    log_path=settings.SHADOW_LOG_FILE,
+)
+
+article_service = ArticleService()
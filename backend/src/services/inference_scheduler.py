@@ -0,0 +1,214 @@
+"""
+Micro-batching scheduler for model inference.
+
+Concurrent callers submit single items. A background thread collects the
+items that arrive within a short window (or until the batch is full) and
+scores them with one batched call, then resolves each caller's future.
+When the batch function hands the work off (returns a Future), up to
+max_in_flight batches run at once so a multi-process pool stays busy.
+"""
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional
+
+from ..lib.executors import get_io_executor
+
+_STOP = object()
+
+# Upper bounds of the batch size histogram buckets
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+
+class InferenceScheduler:
+    def __init__(
+        self,
+        predict_batch: Callable[[List[Any]], List[Any]],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        max_in_flight: int = 1,
+    ):
+        """
+        Args:
+            predict_batch: Scores a list of items and returns one result per item,
+                or a Future of that list if it hands the work to another executor
+            max_batch_size: Largest number of items scored in one call
+            max_wait_ms: How long to wait for more items after the first one arrives.
+                0 disables batching and scores every item on its own in the I/O
+                thread pool, so submit() still never blocks the caller.
+            max_in_flight: How many batches returned as Futures may be scored at
+                once, e.g. the size of the process pool that runs them. Items that
+                arrive while every slot is busy are coalesced into the next batch.
+        """
+        self._predict_batch = predict_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_seconds = max(0.0, max_wait_ms) / 1000
+        self.max_in_flight = max(1, max_in_flight)
+
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._queue: Optional[queue.Queue] = None
+        self._thread: Optional[threading.Thread] = None
+        self._pid = None
+
+        self._batches = 0
+        self._items = 0
+        self._largest_batch = 0
+        self._batch_size_counts = {bucket: 0 for bucket in BATCH_SIZE_BUCKETS}
+        self._batch_size_counts["+Inf"] = 0
+        self._last_batch_seconds = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_wait_seconds > 0 and self.max_batch_size > 1
+
+    def submit(self, item: Any) -> Future:
+        """Queue an item for scoring and return a future for its result"""
+        if not self.enabled:
+            # Callers include the event loop, which must not wait for inference
+            return get_io_executor().submit(lambda: self._run_batch([item])[0])
+
+        future = Future()
+        self._ensure_worker().put((item, future))
+        return future
+
+    def predict(self, item: Any, timeout: Optional[float] = None) -> Any:
+        """Score a single item, blocking until its batch has run"""
+        return self.submit(item).result(timeout=timeout)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_seconds * 1000,
+            "max_in_flight": self.max_in_flight,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "batches": self._batches,
+            "items": self._items,
+            "average_batch_size": round(self._items / self._batches, 2) if self._batches else 0,
+            "largest_batch_size": self._largest_batch,
+            "batch_size_histogram": dict(self._batch_size_counts),
+            "last_batch_seconds": self._last_batch_seconds,
+        }
+
+    def shutdown(self):
+        """Stop the worker thread after the queued and in-flight items are scored"""
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                self._queue.put(_STOP)
+                self._thread.join()
+            self._queue = None
+            self._thread = None
+
+    def _ensure_worker(self) -> queue.Queue:
+        # Threads don't survive fork, so a worker process inherited from a
+        # preloading gunicorn master needs its own thread and queue
+        pid = os.getpid()
+        if self._thread is not None and self._pid == pid:
+            return self._queue
+
+        with self._lock:
+            if self._thread is None or self._pid != pid:
+                self._queue = queue.Queue()
+                self._pid = pid
+                self._thread = threading.Thread(
+                    target=self._worker, args=(self._queue,), name="inference-scheduler", daemon=True
+                )
+                self._thread.start()
+            return self._queue
+
+    def _worker(self, pending: queue.Queue):
+        slots = threading.Semaphore(self.max_in_flight)
+        while True:
+            first = pending.get()
+            if first is _STOP:
+                self._drain(slots)
+                return
+
+            # Wait for a free slot before collecting the batch, so the items
+            # that queue up meanwhile go out together
+            slots.acquire()
+
+            batch = [first]
+            deadline = time.monotonic() + self.max_wait_seconds
+            stop = False
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    entry = pending.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if entry is _STOP:
+                    stop = True
+                    break
+                batch.append(entry)
+
+            self._start_batch(batch, slots)
+
+            if stop:
+                self._drain(slots)
+                return
+
+    def _start_batch(self, batch: list, slots: threading.Semaphore):
+        items = [item for item, _ in batch]
+        start_time = time.perf_counter()
+
+        def resolve(outcome: Future):
+            try:
+                results = self._check_results(items, outcome.result(), start_time)
+                for (_, future), result in zip(batch, results):
+                    future.set_result(result)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+            finally:
+                slots.release()
+
+        try:
+            outcome = self._predict_batch(items)
+        except Exception as e:
+            outcome = Future()
+            outcome.set_exception(e)
+        if not isinstance(outcome, Future):
+            results, outcome = outcome, Future()
+            outcome.set_result(results)
+        outcome.add_done_callback(resolve)
+
+    def _drain(self, slots: threading.Semaphore):
+        # Wait for the batches still being scored
+        for _ in range(self.max_in_flight):
+            slots.acquire()
+
+    def _run_batch(self, items: List[Any]) -> List[Any]:
+        start_time = time.perf_counter()
+        results = self._predict_batch(items)
+        if isinstance(results, Future):
+            results = results.result()
+        return self._check_results(items, results, start_time)
+
+    def _check_results(self, items: List[Any], results, start_time: float) -> List[Any]:
+        results = list(results)
+        elapsed = time.perf_counter() - start_time
+
+        if len(results) != len(items):
+            raise ValueError(f"Expected {len(items)} predictions, got {len(results)}")
+
+        self._record(len(items), elapsed)
+        return results
+
+    def _record(self, batch_size: int, elapsed: float):
+        with self._stats_lock:
+            self._batches += 1
+            self._items += batch_size
+            self._largest_batch = max(self._largest_batch, batch_size)
+            self._last_batch_seconds = round(elapsed, 6)
+            for bucket in BATCH_SIZE_BUCKETS:
+                if batch_size <= bucket:
+                    self._batch_size_counts[bucket] += 1
+                    break
+            else:
+                self._batch_size_counts["+Inf"] += 1
@@ -0,0 +1,176 @@
+"""
+Shadow scoring of a candidate model on live traffic.
+
+After a request has been scored with the active model, a sample of its
+texts is handed to a background thread, which scores them again with the
+shadow model and appends the comparison to a JSON Lines file. The response
+never waits for the shadow model: submitting only puts the texts on a
+bounded queue, and they are dropped when the queue is full.
+"""
+import json
+import os
+import queue
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, List, Optional
+
+import numpy as np
+
+_STOP = object()
+
+
+class ShadowScorer:
+    def __init__(
+        self,
+        predict_batch: Callable[[List[Any]], Any],
+        version: Optional[str] = None,
+        sample_rate: float = 0.0,
+        max_queue_size: int = 100,
+        log_path: Optional[str] = None,
+    ):
+        """
+        Args:
+            predict_batch: Scores a list of texts with the shadow model and
+                returns one row of class probabilities per text
+            version: Name of the shadow model version, None disables shadow scoring
+            sample_rate: Fraction of requests that are also scored by the shadow model
+            max_queue_size: Sampled requests waiting to be scored; more are dropped
+            log_path: JSON Lines file the comparisons are appended to
+        """
+        self._predict_batch = predict_batch
+        self.version = version
+        self.sample_rate = min(max(sample_rate, 0.0), 1.0)
+        self.max_queue_size = max(1, max_queue_size)
+        self.log_path = log_path
+
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._queue: Optional[queue.Queue] = None
+        self._thread: Optional[threading.Thread] = None
+        self._pid = None
+
+        self._sampled = 0
+        self._dropped = 0
+        self._errors = 0
+        self._requests = 0
+        self._items = 0
+        self._agreements = 0
+        self._primary_seconds = 0.0
+        self._shadow_seconds = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.version is not None and self.sample_rate > 0
+
+    def submit(self, texts: List[str], predictions, primary_seconds: float, primary_version: Optional[str] = None) -> bool:
+        """
+        Maybe queue a scored request for shadow scoring. Never blocks; returns
+        whether the request was queued.
+        """
+        if not self.enabled or random.random() >= self.sample_rate:
+            return False
+
+        with self._stats_lock:
+            self._sampled += 1
+        try:
+            self._ensure_worker().put_nowait((list(texts), np.asarray(predictions), primary_seconds, primary_version))
+            return True
+        except queue.Full:
+            with self._stats_lock:
+                self._dropped += 1
+            return False
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "version": self.version,
+            "sample_rate": self.sample_rate,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "sampled": self._sampled,
+            "dropped": self._dropped,
+            "errors": self._errors,
+            "requests": self._requests,
+            "items": self._items,
+            "agreement_rate": round(self._agreements / self._items, 4) if self._items else None,
+            "average_primary_ms": round(self._primary_seconds * 1000 / self._requests, 3) if self._requests else None,
+            "average_shadow_ms": round(self._shadow_seconds * 1000 / self._requests, 3) if self._requests else None,
+        }
+
+    def shutdown(self):
+        """Stop the worker thread after the queued requests are scored"""
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                self._queue.put(_STOP)
+                self._thread.join()
+            self._queue = None
+            self._thread = None
+
+    def _ensure_worker(self) -> queue.Queue:
+        # Same fork handling as InferenceScheduler: each worker process
+        # starts its own thread and queue
+        pid = os.getpid()
+        if self._thread is not None and self._pid == pid:
+            return self._queue
+
+        with self._lock:
+            if self._thread is None or self._pid != pid:
+                self._queue = queue.Queue(maxsize=self.max_queue_size)
+                self._pid = pid
+                self._thread = threading.Thread(
+                    target=self._worker, args=(self._queue,), name="shadow-scorer", daemon=True
+                )
+                self._thread.start()
+            return self._queue
+
+    def _worker(self, pending: queue.Queue):
+        while True:
+            entry = pending.get()
+            if entry is _STOP:
+                return
+            try:
+                self._score(*entry)
+            except Exception as e:
+                with self._stats_lock:
+                    self._errors += 1
+                print(f"Warning: Shadow scoring with model version {self.version} failed: {e}")
+
+    def _score(self, texts: List[str], primary, primary_seconds: float, primary_version: Optional[str]):
+        start_time = time.perf_counter()
+        shadow = np.asarray(self._predict_batch(texts))
+        shadow_seconds = time.perf_counter() - start_time
+
+        if shadow.shape != primary.shape:
+            raise ValueError(f"Expected predictions of shape {primary.shape}, got {shadow.shape}")
+
+        agreements = int((shadow.argmax(axis=1) == primary.argmax(axis=1)).sum())
+        record = {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "primary_version": primary_version,
+            "shadow_version": self.version,
+            "items": len(texts),
+            "agreements": agreements,
+            "max_abs_difference": round(float(np.abs(shadow - primary).max()), 6) if len(texts) else 0.0,
+            "primary_ms": round(primary_seconds * 1000, 3),
+            "shadow_ms": round(shadow_seconds * 1000, 3),
+            "latency_delta_ms": round((shadow_seconds - primary_seconds) * 1000, 3),
+        }
+        self._write(record)
+
+        with self._stats_lock:
+            self._requests += 1
+            self._items += len(texts)
+            self._agreements += agreements
+            self._primary_seconds += primary_seconds
+            self._shadow_seconds += shadow_seconds
+
+    def _write(self, record: dict):
+        if not self.log_path:
+            return
+        directory = os.path.dirname(self.log_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # One append per line, so records from several workers don't interleave
+        with open(self.log_path, "a") as f:
+            f.write(json.dumps(record) + "\n")
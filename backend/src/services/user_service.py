@@ -1,17 +1,22 @@
+import asyncio
 from datetime import datetime
 from typing import BinaryIO
 import uuid
 from fastapi import UploadFile
 
-from ..lib.supabase_client import supabase_admin_client
+from ..lib.supabase_client import get_admin_client
 from ..repository import article_repository
+from .article_service import ArticleService
 
 class UserService:
     def __init__(self):
+        self._bucket_name = "avatars"
+
+    @property
+    def _client(self):
         # Use admin client for storage operations (file uploads)
         # Storage operations require elevated permissions
-        self._client = supabase_admin_client
-        self._bucket_name = "avatars"
+        return get_admin_client()
 
     async def upload_avatar(self, user_id: str, file: UploadFile) -> str:
         """
@@ -30,7 +35,7 @@ class UserService:
         content = await file.read()
         
         try:
-            res = self._client.storage.from_(self._bucket_name).upload(
+            res = await self._client.storage.from_(self._bucket_name).upload(
                 path=file_name,
                 file=content,
                 file_options={"content-type": file.content_type}
@@ -39,9 +44,9 @@ class UserService:
             if hasattr(res, 'error') and res.error:
                 raise Exception(f"Storage error: {res.error.message}")
             
-            public_url = self._client.storage.from_(self._bucket_name).get_public_url(file_name)
+            public_url = await self._client.storage.from_(self._bucket_name).get_public_url(file_name)
             
-            res = self._client.table('Users').update({
+            res = await self._client.table('Users').update({
                 'avatar_url': public_url
             }).eq('id', user_id).execute()
             
@@ -68,23 +73,32 @@ class UserService:
             user_id: The ID of the user to delete
             user_jwt: The user's JWT token for authenticated operations
         """
-        # Clear article history
+        # History and storage cleanup are independent, so run them concurrently
+        await asyncio.gather(
+            self._clear_history(user_id, user_jwt),
+            self._delete_avatar_files(user_id)
+        )
+        
+        # Delete user from Supabase Auth using admin client
+        try:
+            await self._client.auth.admin.delete_user(user_id)
+        except Exception as e:
+            raise Exception(f"Failed to delete user account: {str(e)}")
+
+    async def _clear_history(self, user_id: str, user_jwt: str):
         try:
-            article_repository.clear(user_id, user_jwt)
+            await article_repository.clear(user_id, user_jwt)
         except Exception as e:
             print(f"Warning: Failed to clear article history: {e}")
-        
+        # Even a partly cleared history must not keep being served from the cache
+        await ArticleService.invalidate_article_cache(user_id)
+
+    async def _delete_avatar_files(self, user_id: str):
         # Delete avatar files from storage using admin client
         try:
-            files_response = self._client.storage.from_(self._bucket_name).list(user_id)
+            files_response = await self._client.storage.from_(self._bucket_name).list(user_id)
             if files_response and len(files_response) > 0:
                 file_paths = [f"{user_id}/{file['name']}" for file in files_response]
-                self._client.storage.from_(self._bucket_name).remove(file_paths)
+                await self._client.storage.from_(self._bucket_name).remove(file_paths)
         except Exception as e:
             print(f"Warning: Failed to delete storage files: {e}")
-        
-        # Delete user from Supabase Auth using admin client
-        try:
-            self._client.auth.admin.delete_user(user_id)
-        except Exception as e:
-            raise Exception(f"Failed to delete user account: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,10 @@
+-- Canonical URL for article dedup and shared analysis lookups.
+-- The backend computes canonical URLs (src/lib/urls.py); existing rows are
+-- backfilled with their submitted URL here, then canonicalized by
+-- `python -m src.cli.backfill_canonical_urls`.
+
+alter table "Article" add column if not exists canonical_url text;
+
+update "Article" set canonical_url = url where canonical_url is null;
+
+create index if not exists article_canonical_url_idx on "Article" (canonical_url);
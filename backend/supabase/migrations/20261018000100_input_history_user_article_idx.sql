@@ -0,0 +1,6 @@
+-- Per-user duplicate checks look up a user's history rows by article:
+--   WHERE input_by_user = $1 AND article_id IN (SELECT id FROM "Article" WHERE canonical_url = ANY($2))
+-- This index turns that into an index probe instead of a scan of the user's history.
+
+create index if not exists input_history_user_article_idx
+    on "Input History" (input_by_user, article_id);
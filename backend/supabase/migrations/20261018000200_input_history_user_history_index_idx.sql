@@ -0,0 +1,6 @@
+-- History pages are read newest first with keyset pagination:
+--   WHERE input_by_user = $1 AND history_index < $2 ORDER BY history_index DESC LIMIT $3
+-- With this index each page is a bounded range scan, however long the history is.
+
+create index if not exists input_history_user_history_index_idx
+    on "Input History" (input_by_user, history_index desc);
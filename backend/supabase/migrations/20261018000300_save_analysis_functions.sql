@@ -0,0 +1,127 @@
+-- Server-side save path for article analyses.
+--
+-- save_analysis() inserts the Article and AI Result rows (or reuses the ones
+-- already stored for the canonical URL) and adds the article to the user's
+-- history in one transaction. link_analysis() only adds the history entry.
+-- Both return the article joined with its AI results, in the same shape as
+-- the PostgREST select in article_repository.get_by_id.
+--
+-- History indexes come from a per-user counter row instead of reading
+-- max(history_index), so concurrent submits from one user can't get the
+-- same index.
+
+create table if not exists "History Counter" (
+    user_id uuid primary key,
+    last_index bigint not null default 0
+);
+
+-- Only reachable through the functions below
+alter table "History Counter" enable row level security;
+
+insert into "History Counter" (user_id, last_index)
+select input_by_user, max(history_index)
+from "Input History"
+group by input_by_user
+on conflict (user_id) do update
+    set last_index = greatest("History Counter".last_index, excluded.last_index);
+
+
+create or replace function article_analysis_json(p_article_id bigint)
+returns jsonb
+language sql
+stable
+as $$
+    select jsonb_build_object(
+        'id', a.id,
+        'url', a.url,
+        'canonical_url', a.canonical_url,
+        'title', a.title,
+        'source', a.source,
+        'collected_date', a.collected_date,
+        'ai_result', coalesce((
+            select jsonb_agg(jsonb_build_object(
+                'id', r.id,
+                'genre', r.genre,
+                'truthness_label', r.truthness_label,
+                'truthness_score', r.truthness_score,
+                'related_articles', r.related_articles,
+                'is_satire', r.is_satire
+            ) order by r.id)
+            from "AI Result" r
+            where r.article_id = a.id
+        ), '[]'::jsonb)
+    )
+    from "Article" a
+    where a.id = p_article_id
+$$;
+
+
+create or replace function link_analysis(p_user_id uuid, p_article_id bigint, p_ai_result_id bigint)
+returns jsonb
+language plpgsql
+as $$
+declare
+    v_index bigint;
+begin
+    -- Taking the next index locks the user's counter row, which also
+    -- serializes the duplicate check below for concurrent submits
+    insert into "History Counter" as c (user_id, last_index)
+    values (p_user_id, 1)
+    on conflict (user_id) do update set last_index = c.last_index + 1
+    returning c.last_index into v_index;
+
+    if not exists (
+        select 1 from "Input History"
+        where input_by_user = p_user_id and article_id = p_article_id
+    ) then
+        insert into "Input History" (created_at, history_index, input_by_user, article_id, ai_result_id)
+        values (now(), v_index, p_user_id, p_article_id, p_ai_result_id);
+    end if;
+
+    return article_analysis_json(p_article_id);
+end;
+$$;
+
+
+create or replace function save_analysis(p_user_id uuid, p_article jsonb, p_ai_result jsonb)
+returns jsonb
+language plpgsql
+as $$
+declare
+    v_canonical_url text := coalesce(p_article->>'canonical_url', p_article->>'url');
+    v_article_id bigint;
+    v_ai_result_id bigint;
+begin
+    -- Concurrent first submissions of the same story share one Article
+    perform pg_advisory_xact_lock(hashtextextended(v_canonical_url, 0));
+
+    select a.id, r.id into v_article_id, v_ai_result_id
+    from "Article" a
+    join "AI Result" r on r.article_id = a.id
+    where a.canonical_url = v_canonical_url
+    order by a.id, r.id
+    limit 1;
+
+    if v_article_id is null then
+        insert into "Article" (url, canonical_url, title, source, collected_date)
+        select p.url, v_canonical_url, p.title, p.source, coalesce(p.collected_date, now())
+        from jsonb_populate_record(null::"Article", p_article) p
+        returning id into v_article_id;
+
+        insert into "AI Result" (article_id, genre, truthness_label, truthness_score, related_articles, is_satire)
+        select v_article_id, p.genre, p.truthness_label, p.truthness_score, p.related_articles, coalesce(p.is_satire, false)
+        from jsonb_populate_record(null::"AI Result", p_ai_result) p
+        returning id into v_ai_result_id;
+    end if;
+
+    return link_analysis(p_user_id, v_article_id, v_ai_result_id);
+end;
+$$;
+
+-- The backend calls these with the service role after verifying the user's JWT
+revoke execute on function article_analysis_json(bigint) from public, anon, authenticated;
+revoke execute on function link_analysis(uuid, bigint, bigint) from public, anon, authenticated;
+revoke execute on function save_analysis(uuid, jsonb, jsonb) from public, anon, authenticated;
+grant execute on function article_analysis_json(bigint) to service_role;
+grant execute on function link_analysis(uuid, bigint, bigint) to service_role;
+grant execute on function save_analysis(uuid, jsonb, jsonb) to service_role;
@@ -0,0 +1,73 @@
+-- Articles scored from content a user submitted (POST /articles/analyze/text)
+-- belong to that user only. submitted_by is null for downloaded articles,
+-- which are the only ones shared by canonical URL, so nobody can plant a
+-- verdict for a URL by submitting their own text for it.
+
+alter table "Article" add column if not exists submitted_by uuid;
+
+create index if not exists article_shared_canonical_url_idx
+    on "Article" (canonical_url) where submitted_by is null;
+
+
+-- Same as in 20261018000300_save_analysis_functions.sql, but only reuses shared rows
+create or replace function save_analysis(p_user_id uuid, p_article jsonb, p_ai_result jsonb)
+returns jsonb
+language plpgsql
+as $$
+declare
+    v_canonical_url text := coalesce(p_article->>'canonical_url', p_article->>'url');
+    v_article_id bigint;
+    v_ai_result_id bigint;
+begin
+    -- Concurrent first submissions of the same story share one Article
+    perform pg_advisory_xact_lock(hashtextextended(v_canonical_url, 0));
+
+    select a.id, r.id into v_article_id, v_ai_result_id
+    from "Article" a
+    join "AI Result" r on r.article_id = a.id
+    where a.canonical_url = v_canonical_url and a.submitted_by is null
+    order by a.id, r.id
+    limit 1;
+
+    if v_article_id is null then
+        insert into "Article" (url, canonical_url, title, source, collected_date)
+        select p.url, v_canonical_url, p.title, p.source, coalesce(p.collected_date, now())
+        from jsonb_populate_record(null::"Article", p_article) p
+        returning id into v_article_id;
+
+        insert into "AI Result" (article_id, genre, truthness_label, truthness_score, related_articles, is_satire)
+        select v_article_id, p.genre, p.truthness_label, p.truthness_score, p.related_articles, coalesce(p.is_satire, false)
+        from jsonb_populate_record(null::"AI Result", p_ai_result) p
+        returning id into v_ai_result_id;
+    end if;
+
+    return link_analysis(p_user_id, v_article_id, v_ai_result_id);
+end;
+$$;
+
+
+-- Always inserts new rows owned by the submitting user, never reused by anyone
+create or replace function save_submitted_analysis(p_user_id uuid, p_article jsonb, p_ai_result jsonb)
+returns jsonb
+language plpgsql
+as $$
+declare
+    v_article_id bigint;
+    v_ai_result_id bigint;
+begin
+    insert into "Article" (url, canonical_url, title, source, collected_date, submitted_by)
+    select p.url, coalesce(p.canonical_url, p.url), p.title, p.source, coalesce(p.collected_date, now()), p_user_id
+    from jsonb_populate_record(null::"Article", p_article) p
+    returning id into v_article_id;
+
+    insert into "AI Result" (article_id, genre, truthness_label, truthness_score, related_articles, is_satire)
+    select v_article_id, p.genre, p.truthness_label, p.truthness_score, p.related_articles, coalesce(p.is_satire, false)
+    from jsonb_populate_record(null::"AI Result", p_ai_result) p
+    returning id into v_ai_result_id;
+
+    return link_analysis(p_user_id, v_article_id, v_ai_result_id);
+end;
+$$;
+
+revoke execute on function save_submitted_analysis(uuid, jsonb, jsonb) from public, anon, authenticated;
+grant execute on function save_submitted_analysis(uuid, jsonb, jsonb) to service_role;
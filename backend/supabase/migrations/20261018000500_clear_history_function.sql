@@ -0,0 +1,47 @@
+-- clear_history() removes a user's history and the Article / AI Result rows
+-- no other history entry points at, in one transaction. Articles are shared
+-- between users who saved the same canonical URL, so the orphan check and the
+-- deletes must not interleave with a save_analysis() reusing one of them.
+
+create or replace function clear_history(p_user_id uuid)
+returns void
+language plpgsql
+as $$
+declare
+    v_article_ids bigint[];
+begin
+    with deleted as (
+        delete from "Input History"
+        where input_by_user = p_user_id
+        returning article_id
+    )
+    select array_agg(distinct article_id) into v_article_ids from deleted;
+
+    if v_article_ids is null then
+        return;
+    end if;
+
+    -- save_analysis() picks an existing article under this lock, so none of
+    -- these can gain a new history entry until the transaction ends. Taken in
+    -- canonical_url order so concurrent clears can't deadlock
+    perform pg_advisory_xact_lock(hashtextextended(urls.canonical_url, 0))
+    from (
+        select distinct canonical_url
+        from "Article"
+        where id = any(v_article_ids) and canonical_url is not null
+        order by canonical_url
+    ) urls;
+
+    delete from "AI Result" r
+    where r.article_id = any(v_article_ids)
+      and not exists (select 1 from "Input History" h where h.article_id = r.article_id);
+
+    delete from "Article" a
+    where a.id = any(v_article_ids)
+      and not exists (select 1 from "Input History" h where h.article_id = a.id);
+end;
+$$;
+
+-- The backend calls this with the service role after verifying the user's JWT
+revoke execute on function clear_history(uuid) from public, anon, authenticated;
+grant execute on function clear_history(uuid) to service_role;
@@ -0,0 +1,53 @@
+-- link_analysis() now takes the canonical-URL advisory lock that
+-- save_analysis() and clear_history() take, so a history entry can't be
+-- added to an article while clear_history() deletes it. The per-user
+-- "History Counter" is only bumped when a history row is inserted, so
+-- re-linking an article already in the history leaves no gap in the indexes.
+
+create or replace function link_analysis(p_user_id uuid, p_article_id bigint, p_ai_result_id bigint)
+returns jsonb
+language plpgsql
+as $$
+declare
+    v_canonical_url text;
+    v_index bigint;
+begin
+    select canonical_url into v_canonical_url from "Article" where id = p_article_id;
+    if v_canonical_url is not null then
+        -- Re-entrant, so calls from save_analysis() don't wait on themselves
+        perform pg_advisory_xact_lock(hashtextextended(v_canonical_url, 0));
+    end if;
+
+    -- Deleted by clear_history() while this call waited for the lock
+    if not exists (select 1 from "Article" where id = p_article_id) then
+        return null;
+    end if;
+
+    -- Locking the user's counter row serializes the duplicate check below
+    -- for concurrent submits
+    insert into "History Counter" (user_id, last_index)
+    values (p_user_id, 0)
+    on conflict (user_id) do nothing;
+
+    select last_index into v_index
+    from "History Counter"
+    where user_id = p_user_id
+    for update;
+
+    if not exists (
+        select 1 from "Input History"
+        where input_by_user = p_user_id and article_id = p_article_id
+    ) then
+        v_index := v_index + 1;
+        update "History Counter" set last_index = v_index where user_id = p_user_id;
+
+        insert into "Input History" (created_at, history_index, input_by_user, article_id, ai_result_id)
+        values (now(), v_index, p_user_id, p_article_id, p_ai_result_id);
+    end if;
+
+    return article_analysis_json(p_article_id);
+end;
+$$;
+
+revoke execute on function link_analysis(uuid, bigint, bigint) from public, anon, authenticated;
+grant execute on function link_analysis(uuid, bigint, bigint) to service_role;
@@ -0,0 +1,74 @@
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+from src.main import app
+from src.config import settings
+
+client = TestClient(app)
+
+TOKEN = "test-admin-token"
+HEADERS = {"X-Admin-Token": TOKEN}
+
+
+@pytest.fixture(autouse=True)
+def admin_token():
+    with patch.object(settings, 'ADMIN_API_TOKEN', TOKEN):
+        yield
+
+
+class TestAdminAuth:
+
+    def test_disabled_without_token_setting(self):
+        with patch.object(settings, 'ADMIN_API_TOKEN', None):
+            response = client.get("/api/v1/admin/models", headers=HEADERS)
+
+        assert response.status_code == 403
+        assert response.json()["detail"]["code"] == "ADMIN_DISABLED"
+
+    @pytest.mark.parametrize("headers", [{}, {"X-Admin-Token": "wrong"}])
+    def test_rejects_bad_token(self, headers):
+        response = client.get("/api/v1/admin/models", headers=headers)
+
+        assert response.status_code == 401
+        assert response.json()["detail"]["code"] == "INVALID_ADMIN_TOKEN"
+
+
+class TestModelAdminRoutes:
+
+    def test_list_models(self):
+        versions = {"active": "v1", "versions": [{"version": "v1", "loaded": True, "active": True}]}
+
+        with patch('src.routes.admin_routes.model_registry.versions', return_value=versions):
+            response = client.get("/api/v1/admin/models", headers=HEADERS)
+
+        assert response.status_code == 200
+        data = response.json()["data"]
+        assert data["active"] == "v1"
+        assert data["versions"] == versions["versions"]
+        assert "swaps" in data["stats"]
+
+    def test_activate_model(self):
+        stats = {"version": "v2", "swaps": 1}
+
+        with patch('src.routes.admin_routes.article_service.activate_model', return_value=stats) as activate:
+            response = client.put("/api/v1/admin/models/active", json={"version": "v2"}, headers=HEADERS)
+
+        assert response.status_code == 200
+        assert response.json() == {"data": stats, "error": None}
+        activate.assert_called_once_with("v2")
+
+    @pytest.mark.parametrize("error, status_code", [
+        (FileNotFoundError("Model version 'v9' not found"), 404),
+        (ValueError("Checksum mismatch for coef.npy"), 400),
+        (RuntimeError("worker crashed"), 500),
+    ])
+    def test_activate_model_errors(self, error, status_code):
+        with patch('src.routes.admin_routes.article_service.activate_model', side_effect=error):
+            response = client.put("/api/v1/admin/models/active", json={"version": "v9"}, headers=HEADERS)
+
+        assert response.status_code == status_code
+        assert response.json()["detail"]["error"] == str(error)
+
+    def test_activate_requires_version(self):
+        response = client.put("/api/v1/admin/models/active", json={}, headers=HEADERS)
+        assert response.status_code == 422
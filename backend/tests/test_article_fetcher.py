@@ -0,0 +1,170 @@
+import asyncio
+import gzip
+import httpx
+import pytest
+from src.lib.article_fetcher import ArticleFetcher, ArticleTooLargeError, FetchError
+
+
+ARTICLE_HTML = "<html><head><title>Local article</title></head><body><p>Body</p></body></html>"
+
+
+def local_site(request: httpx.Request) -> httpx.Response:
+    """Local stand-in for article sites"""
+    path = request.url.path
+    if path == "/article":
+        return httpx.Response(200, html=ARTICLE_HTML)
+    if path == "/moved":
+        return httpx.Response(301, headers={"location": "https://news.example.com/article"})
+    if path == "/gzip":
+        return httpx.Response(
+            200,
+            content=gzip.compress(ARTICLE_HTML.encode()),
+            headers={"content-type": "text/html; charset=utf-8", "content-encoding": "gzip"},
+        )
+    if path == "/bomb":
+        # Tiny on the wire, huge once decompressed
+        return httpx.Response(
+            200,
+            content=gzip.compress(b"a" * 200_000),
+            headers={"content-type": "text/html", "content-encoding": "gzip"},
+        )
+    if path == "/declared-large":
+        return httpx.Response(200, content=b"small", headers={"content-type": "text/html", "content-length": "999999999"})
+    if path == "/pdf":
+        return httpx.Response(200, content=b"%PDF-1.7", headers={"content-type": "application/pdf"})
+    return httpx.Response(404, text="not found")
+
+
+def make_fetcher(handler=local_site, **kwargs):
+    return ArticleFetcher(transport=httpx.MockTransport(handler), **kwargs)
+
+
+class TestArticleFetcher:
+    
+    @pytest.mark.asyncio
+    async def test_fetch_success(self):
+        fetcher = make_fetcher()
+        page = await fetcher.fetch("https://news.example.com/article")
+        await fetcher.aclose()
+        
+        assert page["status_code"] == 200
+        assert page["html"] == ARTICLE_HTML
+        assert page["final_url"] == "https://news.example.com/article"
+    
+    @pytest.mark.asyncio
+    async def test_fetch_follows_redirects(self):
+        fetcher = make_fetcher()
+        page = await fetcher.fetch("https://news.example.com/moved")
+        await fetcher.aclose()
+        
+        assert page["url"] == "https://news.example.com/moved"
+        assert page["final_url"] == "https://news.example.com/article"
+    
+    @pytest.mark.asyncio
+    async def test_fetch_decompresses_gzip(self):
+        fetcher = make_fetcher()
+        page = await fetcher.fetch("https://news.example.com/gzip")
+        await fetcher.aclose()
+        
+        assert page["html"] == ARTICLE_HTML
+    
+    @pytest.mark.asyncio
+    async def test_fetch_caps_decompressed_size(self):
+        fetcher = make_fetcher(max_bytes=50_000)
+        with pytest.raises(ArticleTooLargeError):
+            await fetcher.fetch("https://news.example.com/bomb")
+        await fetcher.aclose()
+    
+    @pytest.mark.asyncio
+    async def test_fetch_rejects_declared_large_body(self):
+        fetcher = make_fetcher(max_bytes=50_000)
+        with pytest.raises(ArticleTooLargeError):
+            await fetcher.fetch("https://news.example.com/declared-large")
+        await fetcher.aclose()
+    
+    @pytest.mark.asyncio
+    async def test_fetch_http_error(self):
+        fetcher = make_fetcher()
+        with pytest.raises(FetchError) as exc_info:
+            await fetcher.fetch("https://news.example.com/missing")
+        await fetcher.aclose()
+        
+        assert "404" in str(exc_info.value)
+    
+    @pytest.mark.asyncio
+    async def test_fetch_rejects_non_html(self):
+        fetcher = make_fetcher()
+        with pytest.raises(FetchError):
+            await fetcher.fetch("https://news.example.com/pdf")
+        await fetcher.aclose()
+    
+    @pytest.mark.asyncio
+    async def test_fetch_total_timeout(self):
+        async def slow_site(request):
+            await asyncio.sleep(1)
+            return httpx.Response(200, html=ARTICLE_HTML)
+        
+        fetcher = make_fetcher(slow_site, total_timeout=0.05)
+        with pytest.raises(FetchError) as exc_info:
+            await fetcher.fetch("https://news.example.com/article")
+        await fetcher.aclose()
+        
+        assert "Timed out" in str(exc_info.value)
+    
+    @pytest.mark.asyncio
+    async def test_fetch_limits_connections_per_host(self):
+        active = 0
+        peak = 0
+        
+        async def counting_site(request):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            return httpx.Response(200, html=ARTICLE_HTML)
+        
+        fetcher = make_fetcher(counting_site, max_connections_per_host=2)
+        await asyncio.gather(*(fetcher.fetch(f"https://news.example.com/{i}") for i in range(6)))
+        await fetcher.aclose()
+        
+        assert peak == 2
+    
+    @pytest.mark.asyncio
+    async def test_tracked_hosts_are_bounded(self):
+        fetcher = make_fetcher(max_tracked_hosts=3)
+        for i in range(10):
+            await fetcher.fetch(f"https://site{i}.example.com/article")
+        await fetcher.aclose()
+        
+        assert list(fetcher._host_limits) == ["site7.example.com", "site8.example.com", "site9.example.com"]
+    
+    @pytest.mark.asyncio
+    async def test_busy_host_is_not_evicted(self):
+        release = asyncio.Event()
+        
+        async def slow_site(request):
+            if request.url.host == "slow.example.com":
+                await release.wait()
+            return httpx.Response(200, html=ARTICLE_HTML)
+        
+        fetcher = make_fetcher(slow_site, max_tracked_hosts=2)
+        slow = asyncio.ensure_future(fetcher.fetch("https://slow.example.com/article"))
+        await asyncio.sleep(0)
+        for i in range(5):
+            await fetcher.fetch(f"https://site{i}.example.com/article")
+        
+        assert "slow.example.com" in fetcher._host_limits
+        release.set()
+        await slow
+        await fetcher.aclose()
+    
+    @pytest.mark.asyncio
+    async def test_client_is_reused(self):
+        fetcher = make_fetcher()
+        await fetcher.fetch("https://news.example.com/article")
+        first_client = fetcher._client
+        await fetcher.fetch("https://news.example.com/article")
+        
+        assert fetcher._client is first_client
+        await fetcher.aclose()
@@ -1,11 +1,12 @@
 import pytest
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import Mock, patch, MagicMock, AsyncMock
 from src.repository import article_repository
 
 
 class TestArticleRepository:
     
-    def test_get_all_success(self):
+    @pytest.mark.asyncio
+    async def test_get_page_first_page(self):
         mock_data = [
             {"id": 1, "article": {"url": "https://example.com/1"}},
             {"id": 2, "article": {"url": "https://example.com/2"}}
@@ -13,23 +14,55 @@ class TestArticleRepository:
         
         mock_response = Mock()
         mock_response.data = mock_data
+        mock_response.count = 2
         
         mock_client = Mock()
         mock_table = Mock()
         mock_table.select.return_value = mock_table
         mock_table.eq.return_value = mock_table
         mock_table.order.return_value = mock_table
-        mock_table.execute.return_value = mock_response
+        mock_table.limit.return_value = mock_table
+        mock_table.execute = AsyncMock(return_value=mock_response)
         
         mock_client.from_.return_value = mock_table
         
         with patch('src.repository.article_repository.get_supabase_client', return_value=mock_client):
-            result = article_repository.get_all("user123", "fake_jwt")
+            rows, total = await article_repository.get_page("user123", "fake_jwt", limit=20, with_total=True)
             
-            assert result == mock_data
-            assert len(result) == 2
+            assert rows == mock_data
+            assert total == 2
+            mock_table.select.assert_called_once_with(article_repository.HISTORY_COLUMNS, count='estimated')
+            mock_table.lt.assert_not_called()
+            mock_table.order.assert_called_once_with('history_index', desc=True)
+            mock_table.limit.assert_called_once_with(20)
     
-    def test_get_by_id_success(self):
+    @pytest.mark.asyncio
+    async def test_get_page_before_cursor_summary(self):
+        mock_response = Mock()
+        mock_response.data = [{"id": 3}]
+        mock_response.count = None
+        
+        mock_client = Mock()
+        mock_table = Mock()
+        mock_table.select.return_value = mock_table
+        mock_table.eq.return_value = mock_table
+        mock_table.lt.return_value = mock_table
+        mock_table.order.return_value = mock_table
+        mock_table.limit.return_value = mock_table
+        mock_table.execute = AsyncMock(return_value=mock_response)
+        
+        mock_client.from_.return_value = mock_table
+        
+        with patch('src.repository.article_repository.get_supabase_client', return_value=mock_client):
+            rows, total = await article_repository.get_page("user123", "fake_jwt", before=40, limit=10, summary=True)
+            
+            assert rows == [{"id": 3}]
+            assert total is None
+            mock_table.select.assert_called_once_with(article_repository.HISTORY_SUMMARY_COLUMNS, count=None)
+            mock_table.lt.assert_called_once_with('history_index', 40)
+    
+    @pytest.mark.asyncio
+    async def test_get_by_id_success(self):
         mock_data = {
             "id": 1,
             "url": "https://example.com",
@@ -44,17 +77,18 @@ class TestArticleRepository:
         mock_table.select.return_value = mock_table
         mock_table.eq.return_value = mock_table
         mock_table.single.return_value = mock_table
-        mock_table.execute.return_value = mock_response
+        mock_table.execute = AsyncMock(return_value=mock_response)
         
         mock_client.from_.return_value = mock_table
         
         with patch('src.repository.article_repository.get_supabase_client', return_value=mock_client):
-            result = article_repository.get_by_id(1, "fake_jwt")
+            result = await article_repository.get_by_id(1, "fake_jwt")
             
             assert result == mock_data
             assert result["id"] == 1
     
-    def test_save_success(self):
+    @pytest.mark.asyncio
+    async def test_save_success(self):
         analysis_data = {
             "article": {
                 "url": "https://example.com",
@@ -71,69 +105,144 @@ class TestArticleRepository:
             "input_by_user": "user123"
         }
         
-        mock_article_response = Mock()
-        mock_article_response.data = [{"id": 1}]
-        
-        mock_ai_response = Mock()
-        mock_ai_response.data = [{"id": 1}]
-        
-        mock_history_check_response = Mock()
-        mock_history_check_response.data = [{"history_index": 5}]
-        
-        mock_history_insert_response = Mock()
-        mock_history_insert_response.data = [{"id": 1}]
-        
-        with patch('src.repository.article_repository.supabase_admin_client') as mock_admin:
-            with patch('src.repository.article_repository.get_supabase_client') as mock_user:
-                mock_admin_table = Mock()
-                mock_admin_table.insert.return_value = mock_admin_table
-                mock_admin_table.execute.side_effect = [mock_article_response, mock_ai_response]
-                mock_admin.table.return_value = mock_admin_table
-                
-                mock_user_client = Mock()
-                mock_user_table = Mock()
-                mock_user_table.select.return_value = mock_user_table
-                mock_user_table.eq.return_value = mock_user_table
-                mock_user_table.order.return_value = mock_user_table
-                mock_user_table.limit.return_value = mock_user_table
-                mock_user_table.insert.return_value = mock_user_table
-                mock_user_table.execute.side_effect = [mock_history_check_response, mock_history_insert_response]
-                mock_user_client.from_.return_value = mock_user_table
-                mock_user_client.table.return_value = mock_user_table
-                mock_user.return_value = mock_user_client
-                
-                result = article_repository.save(analysis_data, "fake_jwt")
-                
-                assert result is not None
+        saved = {"id": 1, "url": "https://example.com", "ai_result": [{"id": 2, "truthness_label": "Reliable"}]}
+        
+        with patch('src.repository.article_repository.get_admin_client') as mock_get_admin:
+            mock_admin = mock_get_admin.return_value
+            mock_admin.rpc.return_value.execute = AsyncMock(return_value=Mock(data=saved))
+            
+            result = await article_repository.save(analysis_data, "fake_jwt")
+            
+            assert result == saved
+            # Article, AI Result and Input History are written by one RPC call
+            mock_admin.rpc.assert_called_once()
+            mock_admin.table.assert_not_called()
+            name, params = mock_admin.rpc.call_args[0]
+            assert name == 'save_analysis'
+            assert params['p_user_id'] == "user123"
+            assert params['p_article']['canonical_url'] == "https://example.com/"
+            assert params['p_article']['title'] == "Test"
+            assert params['p_ai_result']['truthness_score'] == 0.85
+            assert params['p_ai_result']['is_satire'] is False
+    
+    @pytest.mark.asyncio
+    async def test_save_submitted(self):
+        analysis_data = {
+            "article": {"url": "https://example.com/a", "canonical_url": "https://example.com/a", "title": "T", "source": "example.com"},
+            "ai_result": {"genre": "Real News", "truthness_label": "Reliable", "truthness_score": 0.85, "related_articles": []},
+            "input_by_user": "user123"
+        }
+
+        with patch('src.repository.article_repository.get_admin_client') as mock_get_admin:
+            mock_admin = mock_get_admin.return_value
+            mock_admin.rpc.return_value.execute = AsyncMock(return_value=Mock(data={"id": 1}))
+
+            await article_repository.save(analysis_data, "fake_jwt", submitted=True)
+
+        assert mock_admin.rpc.call_args[0][0] == 'save_submitted_analysis'
+    
+    @pytest.mark.asyncio
+    async def test_clear_success(self):
+        with patch('src.repository.article_repository.get_admin_client') as mock_get_admin:
+            mock_admin = mock_get_admin.return_value
+            mock_admin.rpc.return_value.execute = AsyncMock(return_value=Mock(data=None))
+            
+            result = await article_repository.clear("user123", "fake_jwt")
+        
+        assert result == True
+        # One request, so the history delete and the orphan cleanup share a transaction
+        mock_admin.rpc.assert_called_once_with('clear_history', {'p_user_id': "user123"})
+        mock_admin.table.assert_not_called()
+        mock_admin.from_.assert_not_called()
     
-    def test_clear_success(self):
-        mock_history_response = Mock()
-        mock_history_response.data = [
-            {"article_id": 1},
-            {"article_id": 2}
-        ]
+    @pytest.mark.asyncio
+    async def test_clear_failure_is_raised(self):
+        with patch('src.repository.article_repository.get_admin_client') as mock_get_admin:
+            mock_get_admin.return_value.rpc.return_value.execute = AsyncMock(side_effect=Exception("Database error"))
+            
+            with pytest.raises(Exception):
+                await article_repository.clear("user123", "fake_jwt")
+    
+    @pytest.mark.asyncio
+    async def test_has_analyzed_uses_single_limited_query(self):
+        mock_client = Mock()
+        mock_table = Mock()
+        mock_table.select.return_value = mock_table
+        mock_table.eq.return_value = mock_table
+        mock_table.in_.return_value = mock_table
+        mock_table.limit.return_value = mock_table
+        mock_table.execute = AsyncMock(return_value=Mock(data=[{"article": {"canonical_url": "https://example.com/story"}}]))
+        mock_client.from_.return_value = mock_table
+        
+        with patch('src.repository.article_repository.get_supabase_client', return_value=mock_client):
+            assert await article_repository.has_analyzed("user123", "https://example.com/story", "fake_jwt") is True
+        
+        mock_table.execute.assert_called_once()
+        mock_table.eq.assert_called_once_with('input_by_user', "user123")
+        mock_table.in_.assert_called_once_with('article.canonical_url', ["https://example.com/story"])
+        mock_table.limit.assert_called_once_with(1)
+    
+    @pytest.mark.asyncio
+    async def test_find_analyzed_returns_matching_urls(self):
+        mock_client = Mock()
+        mock_table = Mock()
+        mock_table.select.return_value = mock_table
+        mock_table.eq.return_value = mock_table
+        mock_table.in_.return_value = mock_table
+        mock_table.limit.return_value = mock_table
+        mock_table.execute = AsyncMock(return_value=Mock(data=[{"article": {"canonical_url": "https://example.com/a"}}]))
+        mock_client.from_.return_value = mock_table
+        
+        with patch('src.repository.article_repository.get_supabase_client', return_value=mock_client):
+            result = await article_repository.find_analyzed("user123", ["https://example.com/a", "https://example.com/b"], "fake_jwt")
+        
+        assert result == {"https://example.com/a"}
+        mock_table.limit.assert_called_once_with(2)
+    
+    @pytest.mark.asyncio
+    async def test_find_by_canonical_url(self):
+        mock_table = Mock()
+        mock_table.select.return_value = mock_table
+        mock_table.eq.return_value = mock_table
+        mock_table.is_.return_value = mock_table
+        mock_table.limit.return_value = mock_table
+        mock_table.execute = AsyncMock(return_value=Mock(data=[{"id": 4, "ai_result": [{"id": 5}]}]))
+        
+        with patch('src.repository.article_repository.get_admin_client') as mock_get_admin:
+            mock_admin = mock_get_admin.return_value
+            mock_admin.from_.return_value = mock_table
+            result = await article_repository.find_by_canonical_url("https://example.com/story")
+        
+        assert result == {"article_id": 4, "ai_result_id": 5}
+        mock_table.eq.assert_called_once_with('canonical_url', "https://example.com/story")
+        # Articles scored from user-submitted content are never shared
+        mock_table.is_.assert_called_once_with('submitted_by', 'null')
+        mock_table.limit.assert_called_once_with(1)
+    
+    @pytest.mark.asyncio
+    async def test_find_by_canonical_url_missing(self):
+        mock_table = Mock()
+        mock_table.select.return_value = mock_table
+        mock_table.eq.return_value = mock_table
+        mock_table.is_.return_value = mock_table
+        mock_table.limit.return_value = mock_table
+        mock_table.execute = AsyncMock(return_value=Mock(data=[]))
+        
+        with patch('src.repository.article_repository.get_admin_client') as mock_get_admin:
+            mock_admin = mock_get_admin.return_value
+            mock_admin.from_.return_value = mock_table
+            assert await article_repository.find_by_canonical_url("https://example.com/story") is None
+    
+    @pytest.mark.asyncio
+    async def test_link_to_history(self):
+        with patch('src.repository.article_repository.get_admin_client') as mock_get_admin:
+            mock_admin = mock_get_admin.return_value
+            mock_admin.rpc.return_value.execute = AsyncMock(return_value=Mock(data={"id": 7}))
+            result = await article_repository.link_to_history("user123", 7, 9, "fake_jwt")
         
-        mock_delete_response = Mock()
-        mock_delete_response.data = []
-        
-        with patch('src.repository.article_repository.get_supabase_client') as mock_user:
-            with patch('src.repository.article_repository.supabase_admin_client') as mock_admin:
-                mock_user_client = Mock()
-                mock_user_table = Mock()
-                mock_user_table.select.return_value = mock_user_table
-                mock_user_table.eq.return_value = mock_user_table
-                mock_user_table.delete.return_value = mock_user_table
-                mock_user_table.execute.side_effect = [mock_history_response, mock_delete_response]
-                mock_user_client.from_.return_value = mock_user_table
-                mock_user_client.table.return_value = mock_user_table
-                mock_user.return_value = mock_user_client
-                
-                mock_admin_table = Mock()
-                mock_admin_table.delete.return_value = mock_admin_table
-                mock_admin_table.in_.return_value = mock_admin_table
-                mock_admin_table.execute.return_value = mock_delete_response
-                mock_admin.table.return_value = mock_admin_table
-                
-                result = article_repository.clear("user123", "fake_jwt")
-                
-                assert result == True
+        assert result == {"id": 7}
+        mock_admin.rpc.assert_called_once_with('link_analysis', {
+            'p_user_id': "user123",
+            'p_article_id': 7,
+            'p_ai_result_id': 9
+        })
@@ -2,8 +2,10 @@ import pytest
 from fastapi.testclient import TestClient
 from unittest.mock import Mock, patch
 from src.main import app
+from src.config import settings
 from src.routes.article_routes import router as article_router
 from src.middleware.auth import auth_handler
+from src.services.article_service import article_cache
 
 
 async def mock_get_user_with_token():
@@ -18,17 +20,64 @@ app.dependency_overrides[auth_handler.get_current_user] = mock_get_current_user
 client = TestClient(app)
 
 
+class FakeGenerations:
+    """Stands in for the Redis history generations shared by all workers"""
+
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key, default=None):
+        return self.values.get(key, default)
+
+    def incr(self, key):
+        self.values[key] = self.values.get(key, 0) + 1
+        return self.values[key]
+
+
 class TestArticleRoutes:
+
+    def setup_method(self):
+        article_cache.clear()
     
     def test_get_article_history_success(self):
-        mock_history = [{"id": 1, "article": {"url": "https://example.com"}}]
+        mock_history = [{"id": 1, "history_index": 1, "article": {"url": "https://example.com"}}]
+        mock_page = {"items": mock_history, "total": 1, "next_before": None}
         
-        with patch('src.routes.article_routes.article_service.get_article_history', return_value=mock_history):
+        with patch('src.routes.article_routes.article_service.get_article_history', return_value=mock_page) as mock_get_history:
             response = client.get("/api/v1/articles/history", headers={"Authorization": "Bearer fake_token"})
             
             assert response.status_code == 200
             assert response.json()["data"] == mock_history
             assert response.json()["error"] is None
+            assert response.headers["X-Total-Count"] == "1"
+            assert "X-Next-Cursor" not in response.headers
+            mock_get_history.assert_called_once_with(
+                "test_user_id", "fake_jwt_token",
+                before=None, limit=settings.HISTORY_PAGE_SIZE, summary=False
+            )
+    
+    def test_get_article_history_page(self):
+        mock_page = {"items": [{"id": 7, "history_index": 30}], "total": None, "next_before": 30}
+        
+        with patch('src.routes.article_routes.article_service.get_article_history', return_value=mock_page) as mock_get_history:
+            response = client.get(
+                "/api/v1/articles/history?before=31&limit=1&fields=summary",
+                headers={"Authorization": "Bearer fake_token"}
+            )
+            
+            assert response.status_code == 200
+            assert response.headers["X-Next-Cursor"] == "30"
+            assert "X-Total-Count" not in response.headers
+            mock_get_history.assert_called_once_with(
+                "test_user_id", "fake_jwt_token", before=31, limit=1, summary=True
+            )
+    
+    def test_get_article_history_invalid_limit(self):
+        response = client.get(
+            f"/api/v1/articles/history?limit={settings.HISTORY_MAX_PAGE_SIZE + 1}",
+            headers={"Authorization": "Bearer fake_token"}
+        )
+        assert response.status_code == 422
     
     def test_get_article_history_unauthorized(self):
         app.dependency_overrides.clear()
@@ -68,6 +117,90 @@ class TestArticleRoutes:
             
             assert response.status_code == 422
     
+    def test_analyze_articles_batch_success(self):
+        mock_results = [
+            {"url": "https://example.com/a", "data": {"id": 1}, "error": None},
+            {"url": "https://example.com/b", "data": None, "error": {"message": "Failed to pull article"}}
+        ]
+        
+        with patch('src.routes.article_routes.article_service.analyze_articles', return_value=mock_results) as mock_analyze:
+            response = client.post(
+                "/api/v1/articles/analyze/batch",
+                json={"urls": ["https://example.com/a", "https://example.com/b"]},
+                headers={"Authorization": "Bearer fake_token"}
+            )
+            
+            assert response.status_code == 200
+            assert response.json()["data"] == mock_results
+            mock_analyze.assert_called_once_with(
+                ["https://example.com/a", "https://example.com/b"], "test_user_id", "fake_jwt_token"
+            )
+    
+    def test_analyze_article_content_text(self):
+        mock_analysis = {"article": {"url": None}, "ai_result": {"truthness_label": "Reliable"}}
+        
+        with patch('src.routes.article_routes.article_service.analyze_content', return_value=mock_analysis) as mock_analyze:
+            response = client.post(
+                "/api/v1/articles/analyze/text",
+                json={"text": "Officials confirmed the report.", "title": "Report"},
+                headers={"Authorization": "Bearer fake_token"}
+            )
+            
+            assert response.status_code == 200
+            assert response.json()["data"] == mock_analysis
+            mock_analyze.assert_called_once_with(
+                "test_user_id", "fake_jwt_token",
+                text="Officials confirmed the report.", html=None, title="Report", url=None
+            )
+    
+    def test_analyze_article_content_html_with_url(self):
+        with patch('src.routes.article_routes.article_service.analyze_content', return_value={"id": 1}) as mock_analyze:
+            response = client.post(
+                "/api/v1/articles/analyze/text",
+                json={"html": "<html></html>", "url": "https://example.com/article"},
+                headers={"Authorization": "Bearer fake_token"}
+            )
+            
+            assert response.status_code == 200
+            assert mock_analyze.call_args.kwargs["url"] == "https://example.com/article"
+            assert mock_analyze.call_args.kwargs["html"] == "<html></html>"
+    
+    @pytest.mark.parametrize("body", [
+        {},
+        {"text": "body", "html": "<p>body</p>"},
+        {"text": ""},
+        {"text": "body", "url": "not-a-valid-url"},
+    ])
+    def test_analyze_article_content_invalid(self, body):
+        with patch('src.routes.article_routes.article_service.analyze_content') as mock_analyze:
+            response = client.post(
+                "/api/v1/articles/analyze/text",
+                json=body,
+                headers={"Authorization": "Bearer fake_token"}
+            )
+            
+            assert response.status_code == 422
+            mock_analyze.assert_not_called()
+    
+    def test_analyze_articles_batch_too_many_urls(self):
+        urls = [f"https://example.com/{i}" for i in range(settings.BATCH_MAX_URLS + 1)]
+        response = client.post(
+            "/api/v1/articles/analyze/batch",
+            json={"urls": urls},
+            headers={"Authorization": "Bearer fake_token"}
+        )
+        
+        assert response.status_code == 422
+    
+    def test_analyze_articles_batch_empty(self):
+        response = client.post(
+            "/api/v1/articles/analyze/batch",
+            json={"urls": []},
+            headers={"Authorization": "Bearer fake_token"}
+        )
+        
+        assert response.status_code == 422
+    
     def test_get_article_by_id_success(self):
         mock_article = {"id": 1, "article": {"url": "https://example.com"}}
         
@@ -83,3 +216,91 @@ class TestArticleRoutes:
     def test_get_article_by_id_invalid_id(self):
         response = client.get("/api/v1/articles/invalid", headers={"Authorization": "Bearer fake_token"})
         assert response.status_code == 422
+
+
+class TestArticleResponseCache:
+
+    mock_article = {"id": 1, "title": "Test", "ai_result": [{"id": 1, "truthness_label": "Reliable"}]}
+
+    def setup_method(self):
+        article_cache.clear()
+
+    def test_repeat_views_skip_the_database(self):
+        with patch('src.routes.article_routes.article_service.get_article_by_id', return_value=self.mock_article) as mock_get:
+            first = client.get("/api/v1/articles/1", headers={"Authorization": "Bearer fake_token"})
+            second = client.get("/api/v1/articles/1", headers={"Authorization": "Bearer fake_token"})
+
+        assert first.json() == {"data": self.mock_article, "error": None}
+        assert second.content == first.content
+        assert second.headers["ETag"] == first.headers["ETag"]
+        assert first.headers["Cache-Control"].startswith("private, max-age=")
+        assert "stale-while-revalidate=" in first.headers["Cache-Control"]
+        mock_get.assert_called_once_with(1, "test_user_id", "fake_jwt_token")
+
+    def test_if_none_match_gets_304(self):
+        with patch('src.routes.article_routes.article_service.get_article_by_id', return_value=self.mock_article):
+            etag = client.get("/api/v1/articles/1", headers={"Authorization": "Bearer fake_token"}).headers["ETag"]
+            response = client.get(
+                "/api/v1/articles/1",
+                headers={"Authorization": "Bearer fake_token", "If-None-Match": f'"other", W/{etag}'}
+            )
+            changed = client.get(
+                "/api/v1/articles/1",
+                headers={"Authorization": "Bearer fake_token", "If-None-Match": '"other"'}
+            )
+
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["ETag"] == etag
+        assert changed.status_code == 200
+
+    def test_cached_per_owner(self):
+        async def other_user():
+            return ("other_user_id", "other_jwt_token")
+
+        with patch('src.routes.article_routes.article_service.get_article_by_id', return_value=self.mock_article) as mock_get:
+            client.get("/api/v1/articles/1", headers={"Authorization": "Bearer fake_token"})
+            with patch.dict(app.dependency_overrides, {auth_handler.get_user_with_token: other_user}):
+                client.get("/api/v1/articles/1", headers={"Authorization": "Bearer other_token"})
+
+        assert mock_get.call_count == 2
+        assert mock_get.call_args.args == (1, "other_user_id", "other_jwt_token")
+
+    def test_errors_are_not_cached(self):
+        with patch('src.routes.article_routes.article_service.get_article_by_id', return_value=None):
+            assert client.get("/api/v1/articles/1", headers={"Authorization": "Bearer fake_token"}).status_code == 404
+        with patch('src.routes.article_routes.article_service.get_article_by_id', return_value=self.mock_article):
+            assert client.get("/api/v1/articles/1", headers={"Authorization": "Bearer fake_token"}).status_code == 200
+
+    def test_clearing_history_invalidates(self):
+        with patch('src.routes.article_routes.article_service.get_article_by_id', return_value=self.mock_article) as mock_get:
+            client.get("/api/v1/articles/1", headers={"Authorization": "Bearer fake_token"})
+            with patch('src.services.article_service.article_repository.clear', return_value=True):
+                client.delete("/api/v1/articles/history", headers={"Authorization": "Bearer fake_token"})
+            client.get("/api/v1/articles/1", headers={"Authorization": "Bearer fake_token"})
+
+        assert mock_get.call_count == 2
+    
+    def test_clearing_history_on_another_worker_invalidates(self):
+        generations = FakeGenerations()
+        with patch('src.services.article_service.history_generations', generations):
+            with patch('src.routes.article_routes.article_service.get_article_by_id', return_value=self.mock_article) as mock_get:
+                client.get("/api/v1/articles/1", headers={"Authorization": "Bearer fake_token"})
+                client.get("/api/v1/articles/1", headers={"Authorization": "Bearer fake_token"})
+                # Another worker cleared the history, so this worker's local entry was not dropped
+                generations.incr("test_user_id")
+                client.get("/api/v1/articles/1", headers={"Authorization": "Bearer fake_token"})
+
+        assert mock_get.call_count == 2
+    
+    def test_unreadable_generation_skips_the_cache(self):
+        generations = Mock()
+        generations.get.side_effect = ConnectionError("redis down")
+        with patch('src.services.article_service.history_generations', generations):
+            with patch('src.routes.article_routes.article_service.get_article_by_id', return_value=self.mock_article) as mock_get:
+                first = client.get("/api/v1/articles/1", headers={"Authorization": "Bearer fake_token"})
+                client.get("/api/v1/articles/1", headers={"Authorization": "Bearer fake_token"})
+
+        assert first.status_code == 200
+        assert mock_get.call_count == 2
+        assert len(article_cache.local) == 0
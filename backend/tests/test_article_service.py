@@ -1,7 +1,13 @@
+import threading
 import pytest
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import Mock, patch, MagicMock, AsyncMock
 from datetime import datetime
-from src.services.article_service import ArticleService
+from src.lib.article_fetcher import FetchError
+from src.lib.cache import LRUCache, TieredCache
+from src.lib.urls import canonicalize_url
+from src.services.article_service import ArticleService, article_cache, predict_scheduled_batch, predict_shadow_batch
+from src.services.inference_scheduler import InferenceScheduler
+from src.services.shadow_scorer import ShadowScorer
 from fastapi import HTTPException
 
 
@@ -12,74 +18,116 @@ class TestArticleService:
         assert 'theonion.com' in ArticleService.SATIRICAL_DOMAINS
         assert 'babylonbee.com' in ArticleService.SATIRICAL_DOMAINS
     
-    def test_get_article_history_success(self):
+    @pytest.mark.asyncio
+    async def test_get_article_history_success(self):
         mock_history = [
-            {"id": 1, "url": "https://example.com/article1"},
-            {"id": 2, "url": "https://example.com/article2"}
+            {"id": 1, "history_index": 2, "article": {"url": "https://example.com/article1"}},
+            {"id": 2, "history_index": 1, "article": {"url": "https://example.com/article2"}}
         ]
         
-        with patch('src.services.article_service.article_repository.get_all', return_value=mock_history):
-            result = ArticleService.get_article_history("user123")
-            assert result == mock_history
-            assert len(result) == 2
+        with patch('src.services.article_service.article_repository.get_page', return_value=(mock_history, 2)) as mock_get_page:
+            result = await ArticleService.get_article_history("user123", limit=10)
+            assert result == {"items": mock_history, "total": 2, "next_before": None}
+            mock_get_page.assert_called_once_with(
+                "user123", None, before=None, limit=11, summary=False, with_total=True
+            )
     
-    def test_get_article_history_empty(self):
-        with patch('src.services.article_service.article_repository.get_all', return_value=None):
-            result = ArticleService.get_article_history("user123")
-            assert result == []
+    @pytest.mark.asyncio
+    async def test_get_article_history_next_cursor(self):
+        mock_history = [{"id": i, "history_index": i} for i in (9, 8, 7)]
+        
+        with patch('src.services.article_service.article_repository.get_page', return_value=(mock_history, None)) as mock_get_page:
+            result = await ArticleService.get_article_history("user123", before=10, limit=2, summary=True)
+            assert [item["id"] for item in result["items"]] == [9, 8]
+            assert result["next_before"] == 8
+            assert result["total"] is None
+            mock_get_page.assert_called_once_with(
+                "user123", None, before=10, limit=3, summary=True, with_total=False
+            )
     
-    def test_get_article_history_exception(self):
-        with patch('src.services.article_service.article_repository.get_all', side_effect=Exception("Database error")):
+    @pytest.mark.asyncio
+    async def test_get_article_history_empty(self):
+        with patch('src.services.article_service.article_repository.get_page', return_value=(None, 0)):
+            result = await ArticleService.get_article_history("user123")
+            assert result == {"items": [], "total": 0, "next_before": None}
+    
+    @pytest.mark.asyncio
+    async def test_get_article_history_exception(self):
+        with patch('src.services.article_service.article_repository.get_page', side_effect=Exception("Database error")):
             with pytest.raises(HTTPException) as exc_info:
-                ArticleService.get_article_history("user123")
+                await ArticleService.get_article_history("user123")
             
             assert exc_info.value.status_code == 500
             assert "Failed to retrieve article history" in str(exc_info.value.detail)
     
-    def test_clear_history_success(self):
+    @pytest.mark.asyncio
+    async def test_clear_history_success(self):
         with patch('src.services.article_service.article_repository.clear', return_value=True):
-            result = ArticleService.clear_history("user123")
+            result = await ArticleService.clear_history("user123")
             assert result == []
     
-    def test_clear_history_failure(self):
+    @pytest.mark.asyncio
+    async def test_clear_history_invalidates_article_cache(self):
+        article_cache.local.set(("user123", 1), ("body", 0))
+        article_cache.local.set(("other", 1), ("body", 0))
+
+        with patch('src.services.article_service.article_repository.clear', return_value=True):
+            await ArticleService.clear_history("user123")
+
+        assert article_cache.local.get(("user123", 1)) is None
+        assert article_cache.local.get(("other", 1)) is not None
+        article_cache.clear()
+    
+    @pytest.mark.asyncio
+    async def test_clear_history_failure(self):
         with patch('src.services.article_service.article_repository.clear', return_value=False):
-            result = ArticleService.clear_history("user123")
+            result = await ArticleService.clear_history("user123")
             assert result is None
     
-    def test_clear_history_exception(self):
+    @pytest.mark.asyncio
+    async def test_clear_history_exception(self):
         with patch('src.services.article_service.article_repository.clear', side_effect=Exception("Database error")):
             with pytest.raises(HTTPException) as exc_info:
-                ArticleService.clear_history("user123")
+                await ArticleService.clear_history("user123")
             
             assert exc_info.value.status_code == 500
             assert "Failed to clear article history" in str(exc_info.value.detail)
     
-    def test_pull_article_success(self):
+    @pytest.mark.asyncio
+    async def test_pull_article_success(self):
         mock_article = MagicMock()
         mock_article.title = "Test Article"
         mock_article.authors = ["John Doe"]
         mock_article.text = "Article content"
         mock_article.publish_date = None
+        mock_article.canonical_link = "https://www.example.com/article/?utm_source=feed"
         
-        with patch('src.services.article_service.Article', return_value=mock_article):
-            result = ArticleService.pull_article("https://example.com/article")
-            
-            assert result["url"] == "https://example.com/article"
-            assert result["source"] == "example.com"
-            assert result["title"] == "Test Article"
-            assert result["authors"] == ["John Doe"]
-            assert result["text"] == "Article content"
-            assert "collected_date" in result
-    
-    def test_pull_article_exception(self):
-        with patch('src.services.article_service.Article', side_effect=Exception("Network error")):
+        page = {"url": "https://example.com/article", "final_url": "https://example.com/article", "html": "<html></html>"}
+        
+        with patch('src.services.article_service.article_fetcher.fetch', new=AsyncMock(return_value=page)):
+            with patch('src.services.article_service.Article', return_value=mock_article):
+                result = await ArticleService.pull_article("https://example.com/article")
+                
+                mock_article.download.assert_called_once_with(input_html="<html></html>")
+                assert result["url"] == "https://example.com/article"
+                assert result["source"] == "example.com"
+                assert result["canonical_url"] == "https://example.com/article"
+                assert result["title"] == "Test Article"
+                assert result["authors"] == ["John Doe"]
+                assert result["text"] == "Article content"
+                assert "collected_date" in result
+    
+    @pytest.mark.asyncio
+    async def test_pull_article_exception(self):
+        with patch('src.services.article_service.article_fetcher.fetch', new=AsyncMock(side_effect=FetchError("Network error"))):
             with pytest.raises(HTTPException) as exc_info:
-                ArticleService.pull_article("https://example.com/article")
+                await ArticleService.pull_article("https://example.com/article")
             
             assert exc_info.value.status_code == 500
             assert "Failed to pull article" in str(exc_info.value.detail)
     
-    def test_ai_analysis(self):
+    @pytest.mark.asyncio
+    async def test_ai_analysis(self):
         ArticleService.vectorizer = MagicMock()
         ArticleService.model = MagicMock()
         
@@ -87,23 +135,41 @@ class TestArticleService:
         ArticleService.model.predict_proba.return_value = [[0.7, 0.3]]
         
         article = {"title": "Test", "text": "Content"}
-        result = ArticleService.ai_analysis(article)
+        result = await ArticleService.ai_analysis(article)
         
         assert "prediction" in result
         assert result["prediction"] == [0.7, 0.3]
     
-    def test_analyze_article_duplicate(self):
-        existing = [{"article": {"url": "https://example.com/test"}}]
-        
-        with patch('src.services.article_service.article_repository.get_all', return_value=existing):
-            with pytest.raises(HTTPException) as exc_info:
-                ArticleService.analyze_article("https://example.com/test", "user123")
+    @pytest.mark.asyncio
+    async def test_ai_analysis_without_batching_runs_off_the_event_loop(self):
+        threads = []
+        vectorizer, model = MagicMock(), MagicMock()
+        vectorizer.transform.side_effect = lambda texts: threads.append(threading.current_thread()) or [[0.1]]
+        model.predict_proba.return_value = [[0.7, 0.3]]
+        scheduler = InferenceScheduler(predict_scheduled_batch, max_wait_ms=0)
+
+        with patch.object(ArticleService, 'vectorizer', vectorizer), patch.object(ArticleService, 'model', model):
+            with patch('src.services.article_service.inference_scheduler', scheduler):
+                result = await ArticleService.ai_analysis({"title": "Test", "text": "Content"})
+
+        assert result["prediction"] == [0.7, 0.3]
+        assert threads == [threads[0]] and threads[0] is not threading.current_thread()
+    
+    @pytest.mark.asyncio
+    async def test_analyze_article_duplicate(self):
+        with patch('src.services.article_service.article_repository.has_analyzed', return_value=True) as mock_has_analyzed:
+            with patch('src.services.article_service.article_repository.get_page') as mock_get_page:
+                with pytest.raises(HTTPException) as exc_info:
+                    await ArticleService.analyze_article("https://example.com/test", "user123")
             
             assert exc_info.value.status_code == 409
             assert "already analyzed" in str(exc_info.value.detail)
+            mock_has_analyzed.assert_called_once_with("user123", "https://example.com/test", None)
+            mock_get_page.assert_not_called()
     
-    def test_analyze_article_reliable(self):
-        with patch('src.services.article_service.article_repository.get_all', return_value=[]):
+    @pytest.mark.asyncio
+    async def test_analyze_article_reliable(self):
+        with patch('src.services.article_service.article_repository.has_analyzed', return_value=False):
             mock_article = {
                 "url": "https://example.com/test",
                 "source": "example.com",
@@ -114,12 +180,13 @@ class TestArticleService:
             with patch.object(ArticleService, 'pull_article', return_value=mock_article):
                 with patch.object(ArticleService, 'ai_analysis', return_value={"prediction": [0.8, 0.2]}):
                     with patch('src.services.article_service.article_repository.save', return_value={"id": 1}):
-                        result = ArticleService.analyze_article("https://example.com/test", "user123")
+                        result = await ArticleService.analyze_article("https://example.com/test", "user123")
                         
                         assert result["id"] == 1
     
-    def test_analyze_article_unreliable(self):
-        with patch('src.services.article_service.article_repository.get_all', return_value=[]):
+    @pytest.mark.asyncio
+    async def test_analyze_article_unreliable(self):
+        with patch('src.services.article_service.article_repository.has_analyzed', return_value=False):
             mock_article = {
                 "url": "https://example.com/test",
                 "source": "example.com",
@@ -130,12 +197,13 @@ class TestArticleService:
             with patch.object(ArticleService, 'pull_article', return_value=mock_article):
                 with patch.object(ArticleService, 'ai_analysis', return_value={"prediction": [0.3, 0.7]}):
                     with patch('src.services.article_service.article_repository.save', return_value={"id": 1}):
-                        result = ArticleService.analyze_article("https://example.com/test", "user123")
+                        result = await ArticleService.analyze_article("https://example.com/test", "user123")
                         
                         assert result["id"] == 1
     
-    def test_analyze_article_satire(self):
-        with patch('src.services.article_service.article_repository.get_all', return_value=[]):
+    @pytest.mark.asyncio
+    async def test_analyze_article_satire(self):
+        with patch('src.services.article_service.article_repository.has_analyzed', return_value=False):
             mock_article = {
                 "url": "https://theonion.com/test",
                 "source": "theonion.com",
@@ -146,29 +214,442 @@ class TestArticleService:
             with patch.object(ArticleService, 'pull_article', return_value=mock_article):
                 with patch.object(ArticleService, 'ai_analysis', return_value={"prediction": [0.5, 0.5]}):
                     with patch('src.services.article_service.article_repository.save', return_value={"id": 1}):
-                        result = ArticleService.analyze_article("https://theonion.com/test", "user123")
+                        result = await ArticleService.analyze_article("https://theonion.com/test", "user123")
                         
                         assert result["id"] == 1
     
-    def test_get_article_by_id_success(self):
+    @pytest.mark.asyncio
+    async def test_get_article_by_id_success(self):
         mock_article = {"id": 1, "title": "Test"}
         
         with patch('src.services.article_service.article_repository.get_by_id', return_value=mock_article):
-            result = ArticleService.get_article_by_id(1, "user123")
+            result = await ArticleService.get_article_by_id(1, "user123")
             assert result == mock_article
     
-    def test_get_article_by_id_not_found(self):
+    @pytest.mark.asyncio
+    async def test_get_article_by_id_not_found(self):
         with patch('src.services.article_service.article_repository.get_by_id', return_value=None):
             with pytest.raises(HTTPException) as exc_info:
-                ArticleService.get_article_by_id(999, "user123")
+                await ArticleService.get_article_by_id(999, "user123")
             
             assert exc_info.value.status_code == 404
             assert "Article not found" in str(exc_info.value.detail)
     
-    def test_get_article_by_id_exception(self):
+    @pytest.mark.asyncio
+    async def test_get_article_by_id_exception(self):
         with patch('src.services.article_service.article_repository.get_by_id', side_effect=Exception("Database error")):
             with pytest.raises(HTTPException) as exc_info:
-                ArticleService.get_article_by_id(1, "user123")
+                await ArticleService.get_article_by_id(1, "user123")
             
             assert exc_info.value.status_code == 500
             assert "Failed to retrieve article" in str(exc_info.value.detail)
+    
+    @pytest.mark.asyncio
+    async def test_ai_analysis_batch_single_model_call(self):
+        ArticleService.vectorizer = MagicMock()
+        ArticleService.model = MagicMock()
+        
+        ArticleService.vectorizer.transform.return_value = [[0.1], [0.2], [0.3]]
+        ArticleService.model.predict_proba.return_value = [[0.7, 0.3], [0.2, 0.8], [0.5, 0.5]]
+        
+        articles = [{"title": f"Title {i}", "text": "Content"} for i in range(3)]
+        result = await ArticleService.ai_analysis_batch(articles)
+        
+        assert [r["prediction"] for r in result] == [[0.7, 0.3], [0.2, 0.8], [0.5, 0.5]]
+        ArticleService.vectorizer.transform.assert_called_once_with(
+            ["Title 0 Content", "Title 1 Content", "Title 2 Content"]
+        )
+        ArticleService.model.predict_proba.assert_called_once()
+    
+    @pytest.mark.asyncio
+    async def test_analyze_articles_per_item_results(self):
+        existing = {"https://example.com/old"}
+        urls = ["https://example.com/a", "https://example.com/old", "https://example.com/broken"]
+        
+        def fake_pull(url):
+            if url.endswith("broken"):
+                raise HTTPException(status_code=500, detail={"message": "Failed to pull article", "error": "timeout"})
+            return {"url": url, "source": "example.com", "title": "Test", "text": "Content"}
+        
+        with patch('src.services.article_service.article_repository.find_analyzed', return_value=existing):
+            with patch.object(ArticleService, 'pull_article', side_effect=fake_pull):
+                with patch.object(ArticleService, 'ai_analysis_batch', return_value=[{"prediction": [0.8, 0.2]}]) as mock_batch:
+                    with patch('src.services.article_service.article_repository.save', return_value={"id": 1}):
+                        results = await ArticleService.analyze_articles(urls, "user123")
+        
+        mock_batch.assert_called_once()
+        assert [r["url"] for r in results] == urls
+        assert results[0]["data"] == {"id": 1}
+        assert results[0]["error"] is None
+        assert results[1]["error"]["message"] == "Article already analyzed"
+        assert results[2]["error"]["error"] == "timeout"
+    
+    @pytest.mark.asyncio
+    async def test_analyze_articles_save_error(self):
+        mock_article = {"url": "https://example.com/a", "source": "example.com", "title": "Test", "text": "Content"}
+        
+        with patch('src.services.article_service.article_repository.find_analyzed', return_value=set()):
+            with patch.object(ArticleService, 'pull_article', return_value=mock_article):
+                with patch.object(ArticleService, 'ai_analysis_batch', return_value=[{"prediction": [0.3, 0.7]}]):
+                    with patch('src.services.article_service.article_repository.save', side_effect=Exception("Database error")):
+                        results = await ArticleService.analyze_articles(["https://example.com/a"], "user123")
+        
+        assert results[0]["data"] is None
+        assert results[0]["error"]["message"] == "Failed to save article analysis"
+    
+    @pytest.mark.asyncio
+    async def test_analyze_articles_links_redirected_duplicates(self):
+        cache = TieredCache(LRUCache(max_size=10))
+        urls = ["https://short.example.com/x1", "https://short.example.com/x2", "https://example.com/new"]
+        known = {"https://example.com/original": {"article_id": 4, "ai_result_id": 5}}
+        linked = {"id": 4, "ai_result": [{"id": 5}]}
+        
+        def fake_pull(url):
+            canonical_url = "https://example.com/original" if "short." in url else url
+            return {"url": url, "canonical_url": canonical_url, "source": "example.com", "title": "Test", "text": "Content"}
+        
+        def fake_has_analyzed(user_id, canonical_url, user_jwt):
+            # The first redirect links the known article into the history
+            return canonical_url == "https://example.com/original" and mock_link.called
+        
+        with patch('src.services.article_service.analysis_cache', cache), \
+                patch('src.services.article_service.article_repository.find_analyzed', return_value=set()), \
+                patch('src.services.article_service.article_repository.has_analyzed', side_effect=fake_has_analyzed), \
+                patch('src.services.article_service.article_repository.find_by_canonical_url', side_effect=known.get), \
+                patch('src.services.article_service.article_repository.link_to_history', return_value=linked) as mock_link, \
+                patch.object(ArticleService, 'pull_article', side_effect=fake_pull), \
+                patch.object(ArticleService, 'ai_analysis_batch', return_value=[{"prediction": [0.8, 0.2]}]) as mock_batch, \
+                patch('src.services.article_service.article_repository.save', return_value={"id": 1}) as mock_save:
+            results = await ArticleService.analyze_articles(urls, "user123")
+        
+        assert results[0]["data"] == linked
+        assert results[1]["error"]["message"] == "Article already analyzed"
+        assert results[2]["data"] == {"id": 1}
+        mock_link.assert_called_once_with("user123", 4, 5, None)
+        assert [article["url"] for article in mock_batch.call_args[0][0]] == ["https://example.com/new"]
+        mock_save.assert_called_once()
+        assert await cache.get("https://short.example.com/x1") == {"article_id": 4, "ai_result_id": 5}
+    
+    @pytest.mark.asyncio
+    async def test_analyze_articles_scores_same_page_once(self):
+        urls = ["https://short.example.com/x1", "https://example.com/new?ref=home"]
+        
+        def fake_pull(url):
+            return {"url": url, "canonical_url": "https://example.com/new", "source": "example.com", "title": "Test", "text": "Content"}
+        
+        with patch('src.services.article_service.article_repository.find_analyzed', return_value=set()), \
+                patch('src.services.article_service.article_repository.has_analyzed', return_value=False), \
+                patch('src.services.article_service.article_repository.find_by_canonical_url', return_value=None), \
+                patch.object(ArticleService, 'pull_article', side_effect=fake_pull), \
+                patch.object(ArticleService, 'ai_analysis_batch', return_value=[{"prediction": [0.8, 0.2]}]) as mock_batch, \
+                patch('src.services.article_service.article_repository.save', return_value={"id": 1}):
+            results = await ArticleService.analyze_articles(urls, "user123")
+        
+        assert len(mock_batch.call_args[0][0]) == 1
+        assert [result["data"] for result in results].count({"id": 1}) == 1
+        assert [result["error"]["message"] for result in results if result["error"]] == ["Duplicate article in batch"]
+    
+    @pytest.mark.asyncio
+    async def test_analyze_article_cache_hit_skips_download(self):
+        cache = TieredCache(LRUCache(max_size=10))
+        saved = {"id": 7, "ai_result": [{"id": 9}]}
+        mock_article = {"url": "https://example.com/viral", "source": "example.com", "title": "Test", "text": "Content"}
+        
+        with patch('src.services.article_service.analysis_cache', cache):
+            with patch('src.services.article_service.article_repository.has_analyzed', return_value=False):
+                with patch.object(ArticleService, 'pull_article', return_value=mock_article) as mock_pull:
+                    with patch.object(ArticleService, 'ai_analysis', return_value={"prediction": [0.8, 0.2]}):
+                        with patch('src.services.article_service.article_repository.save', return_value=saved) as mock_save:
+                            with patch('src.services.article_service.article_repository.link_to_history', return_value=saved) as mock_link:
+                                await ArticleService.analyze_article("https://example.com/viral", "user1")
+                                result = await ArticleService.analyze_article("https://EXAMPLE.com/viral#comments", "user2")
+        
+        assert result == saved
+        assert mock_pull.call_count == 1
+        assert mock_save.call_count == 1
+        mock_link.assert_called_once_with("user2", 7, 9, None)
+    
+    @pytest.mark.asyncio
+    async def test_analyze_article_stale_cache_entry(self):
+        cache = TieredCache(LRUCache(max_size=10))
+        await cache.set("https://example.com/gone", {"article_id": 1, "ai_result_id": 2})
+        mock_article = {"url": "https://example.com/gone", "source": "example.com", "title": "Test", "text": "Content"}
+        
+        with patch('src.services.article_service.analysis_cache', cache):
+            with patch('src.services.article_service.article_repository.has_analyzed', return_value=False):
+                with patch('src.services.article_service.article_repository.link_to_history', side_effect=Exception("foreign key violation")):
+                    with patch.object(ArticleService, 'pull_article', return_value=mock_article) as mock_pull:
+                        with patch.object(ArticleService, 'ai_analysis', return_value={"prediction": [0.8, 0.2]}):
+                            with patch('src.services.article_service.article_repository.save', return_value={"id": 3}):
+                                result = await ArticleService.analyze_article("https://example.com/gone", "user1")
+        
+        assert result == {"id": 3}
+        mock_pull.assert_called_once()
+        assert await cache.get("https://example.com/gone") is None
+    
+    @pytest.mark.asyncio
+    async def test_analyze_article_duplicate_tracking_variant(self):
+        with patch('src.services.article_service.article_repository.has_analyzed', return_value=True) as mock_has_analyzed:
+            with pytest.raises(HTTPException) as exc_info:
+                await ArticleService.analyze_article("https://example.com/story?utm_source=twitter&fbclid=abc", "user123")
+            
+            assert exc_info.value.status_code == 409
+            mock_has_analyzed.assert_called_once_with("user123", "https://example.com/story", None)
+    
+    @pytest.mark.asyncio
+    async def test_analyze_article_reuses_existing_row_by_canonical_url(self):
+        cache = TieredCache(LRUCache(max_size=10))
+        existing = {"article_id": 4, "ai_result_id": 5}
+        
+        with patch('src.services.article_service.analysis_cache', cache):
+            with patch('src.services.article_service.article_repository.has_analyzed', return_value=False):
+                with patch('src.services.article_service.article_repository.find_by_canonical_url', return_value=existing) as mock_find:
+                    with patch('src.services.article_service.article_repository.link_to_history', return_value={"id": 4}) as mock_link:
+                        with patch.object(ArticleService, 'pull_article') as mock_pull:
+                            result = await ArticleService.analyze_article("https://www.example.com/story/amp?utm_medium=social", "user123")
+        
+        assert result == {"id": 4}
+        mock_find.assert_called_once_with("https://example.com/story")
+        mock_link.assert_called_once_with("user123", 4, 5, None)
+        mock_pull.assert_not_called()
+        assert await cache.get("https://example.com/story") == existing
+    
+    @pytest.mark.asyncio
+    async def test_analyze_article_page_canonical_matches_history(self):
+        mock_article = {
+            "url": "https://short.example.com/x1",
+            "canonical_url": "https://example.com/original",
+            "source": "short.example.com",
+            "title": "Test",
+            "text": "Content"
+        }
+        
+        def fake_has_analyzed(user_id, canonical_url, user_jwt):
+            return canonical_url == "https://example.com/original"
+        
+        with patch('src.services.article_service.article_repository.has_analyzed', side_effect=fake_has_analyzed):
+            with patch('src.services.article_service.article_repository.find_by_canonical_url', return_value=None):
+                with patch.object(ArticleService, 'pull_article', return_value=mock_article):
+                    with pytest.raises(HTTPException) as exc_info:
+                        await ArticleService.analyze_article("https://short.example.com/x1", "user123")
+        
+        assert exc_info.value.status_code == 409
+
+
+class TestModelVersions:
+
+    def test_predict_texts_uses_requested_version(self):
+        vectorizer, model = MagicMock(), MagicMock()
+        model.predict_proba.return_value = [[0.4, 0.6]]
+
+        with patch.object(ArticleService, 'vectorizer', None), patch.object(ArticleService, 'model', None):
+            with patch('src.services.article_service.model_registry.get', return_value=(vectorizer, model)) as mock_get:
+                assert ArticleService.predict_texts(["text"], "v2") == [[0.4, 0.6]]
+
+        mock_get.assert_called_once_with("v2")
+
+    @pytest.mark.asyncio
+    async def test_activate_model_prepares_before_swapping(self):
+        calls = []
+
+        with patch('src.services.article_service.model_registry.prepare', side_effect=lambda v: calls.append(("prepare", v))):
+            with patch('src.services.article_service.model_registry.activate', side_effect=lambda v, p: calls.append(("activate", v, p)) or {"version": v}):
+                result = await ArticleService.activate_model("v2")
+
+        assert result == {"version": "v2"}
+        assert calls == [("prepare", "v2"), ("activate", "v2", True)]
+
+    @pytest.mark.asyncio
+    async def test_activate_model_failure_does_not_swap(self):
+        with patch('src.services.article_service.model_registry.prepare', side_effect=ValueError("Checksum mismatch")):
+            with patch('src.services.article_service.model_registry.activate') as mock_activate:
+                with pytest.raises(ValueError):
+                    await ArticleService.activate_model("v2")
+
+        mock_activate.assert_not_called()
+
+
+class TestShadowScoring:
+
+    @pytest.mark.asyncio
+    async def test_batch_predictions_go_to_shadow_scorer(self):
+        vectorizer, model = MagicMock(), MagicMock()
+        model.predict_proba.return_value = [[0.7, 0.3], [0.2, 0.8]]
+        articles = [{"title": f"Title {i}", "text": "Content"} for i in range(2)]
+
+        with patch.object(ArticleService, 'vectorizer', vectorizer), patch.object(ArticleService, 'model', model):
+            with patch('src.services.article_service.shadow_scorer.submit') as mock_submit:
+                result = await ArticleService.ai_analysis_batch(articles)
+
+        assert [r["prediction"] for r in result] == [[0.7, 0.3], [0.2, 0.8]]
+        texts, predictions, primary_seconds, _ = mock_submit.call_args.args
+        assert texts == ["Title 0 Content", "Title 1 Content"]
+        assert predictions == [[0.7, 0.3], [0.2, 0.8]]
+        assert primary_seconds >= 0
+
+    @pytest.mark.asyncio
+    async def test_shadow_failure_does_not_change_response(self):
+        vectorizer, model = MagicMock(), MagicMock()
+        model.predict_proba.return_value = [[0.7, 0.3]]
+        shadow = ShadowScorer(Mock(side_effect=RuntimeError("boom")), version="v2", sample_rate=1.0)
+
+        with patch.object(ArticleService, 'vectorizer', vectorizer), patch.object(ArticleService, 'model', model):
+            with patch('src.services.article_service.shadow_scorer', shadow):
+                result = await ArticleService.ai_analysis({"title": "Title", "text": "Content"})
+        shadow.shutdown()
+
+        assert result == {"prediction": [0.7, 0.3]}
+        assert shadow.stats()["errors"] == 1
+    
+    def test_shadow_batch_does_not_use_live_pool(self):
+        model = MagicMock()
+        model.predict_proba.return_value = [[0.4, 0.6]]
+
+        with patch.object(ArticleService, 'vectorizer', None), patch.object(ArticleService, 'model', None), \
+                patch('src.services.article_service.settings.SHADOW_MODEL_VERSION', "v2"), \
+                patch('src.services.article_service.settings.SHADOW_POOL_SIZE', 0), \
+                patch('src.services.article_service.submit_cpu') as mock_submit_cpu, \
+                patch('src.services.article_service.model_registry.get', return_value=(MagicMock(), model)) as mock_get:
+            predictions = predict_shadow_batch(["Title Content"])
+
+        assert predictions == [[0.4, 0.6]]
+        mock_get.assert_called_once_with("v2")
+        mock_submit_cpu.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_shadow_model_is_prepared_at_startup(self):
+        shadow = ShadowScorer(Mock(), version="v2", sample_rate=1.0)
+
+        with patch('src.services.article_service.shadow_scorer', shadow), \
+                patch('src.services.article_service.settings.SHADOW_MODEL_VERSION', "v2"), \
+                patch('src.services.article_service.settings.SHADOW_POOL_SIZE', 0), \
+                patch('src.services.article_service.model_registry.prepare') as mock_prepare:
+            await ArticleService.prepare_shadow_model()
+        shadow.shutdown()
+
+        mock_prepare.assert_called_once_with("v2")
+    
+    @pytest.mark.asyncio
+    async def test_shadow_model_failure_does_not_block_startup(self):
+        shadow = ShadowScorer(Mock(), version="v2", sample_rate=1.0)
+
+        with patch('src.services.article_service.shadow_scorer', shadow), \
+                patch('src.services.article_service.settings.SHADOW_POOL_SIZE', 0), \
+                patch('src.services.article_service.model_registry.prepare', side_effect=FileNotFoundError("v2")):
+            await ArticleService.prepare_shadow_model()
+        shadow.shutdown()
+
+
+class TestAnalyzeContent:
+
+    ARTICLE_HTML = (
+        "<html><head><title>Parsed title</title>"
+        '<link rel="canonical" href="https://example.com/original"></head><body><article>'
+        + "<p>Officials confirmed the report in a statement on Tuesday, the agency said.</p>" * 5
+        + "</article></body></html>"
+    )
+
+    @pytest.mark.asyncio
+    async def test_text_without_url_is_scored_not_saved(self):
+        with patch.object(ArticleService, 'ai_analysis', return_value={"prediction": [0.8, 0.2]}) as mock_ai:
+            with patch('src.services.article_service.article_repository.save') as mock_save:
+                with patch.object(ArticleService, 'pull_article') as mock_pull:
+                    result = await ArticleService.analyze_content("user123", text="Body text", title="Title")
+
+        assert result["ai_result"]["truthness_label"] == "Reliable"
+        assert result["article"]["title"] == "Title"
+        assert result["article"]["url"] is None
+        assert mock_ai.call_args.args[0]["text"] == "Body text"
+        mock_save.assert_not_called()
+        mock_pull.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_html_is_parsed_locally(self):
+        with patch.object(ArticleService, 'ai_analysis', return_value={"prediction": [0.3, 0.7]}) as mock_ai:
+            with patch('src.services.article_service.article_fetcher.fetch') as mock_fetch:
+                result = await ArticleService.analyze_content("user123", html=self.ARTICLE_HTML)
+
+        article = mock_ai.call_args.args[0]
+        assert article["title"] == "Parsed title"
+        assert "Officials confirmed the report" in article["text"]
+        assert result["ai_result"]["truthness_label"] == "Unreliable"
+        mock_fetch.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_with_url_is_saved_to_history(self):
+        with patch('src.services.article_service.article_repository.has_analyzed', return_value=False):
+            with patch('src.services.article_service.article_repository.find_by_canonical_url', return_value=None):
+                with patch('src.services.article_service.article_repository.save', return_value={"id": 9}) as mock_save:
+                    with patch.object(ArticleService, 'ai_analysis', return_value={"prediction": [0.8, 0.2]}):
+                        with patch.object(ArticleService, 'pull_article') as mock_pull:
+                            result = await ArticleService.analyze_content(
+                                "user123", "jwt", html=self.ARTICLE_HTML, url="https://example.com/amp/story"
+                            )
+
+        assert result == {"id": 9}
+        mock_pull.assert_not_called()
+        saved = mock_save.call_args.args[0]
+        assert saved["article"]["url"] == "https://example.com/amp/story"
+        # The submitted HTML's canonical link can't pick the URL it is saved under
+        assert saved["article"]["canonical_url"] == canonicalize_url("https://example.com/amp/story")
+        assert mock_save.call_args.kwargs["submitted"] is True
+
+    @pytest.mark.asyncio
+    async def test_submitted_content_is_not_shared(self):
+        """User A submits text for a URL; user B analyzing that URL gets a downloaded result"""
+        url = "https://example.com/story"
+        rows, histories = [], {}
+
+        async def has_analyzed(user_id, canonical_url, user_jwt=None):
+            return canonical_url in histories.get(user_id, set())
+
+        async def find_by_canonical_url(canonical_url):
+            for row in rows:
+                if row["canonical_url"] == canonical_url and not row["submitted"]:
+                    return {"article_id": row["id"], "ai_result_id": row["id"]}
+            return None
+
+        async def save(analysis, user_jwt=None, submitted=False):
+            row = {"id": len(rows) + 1, "submitted": submitted, **analysis["article"], **analysis["ai_result"]}
+            rows.append(row)
+            histories.setdefault(analysis["input_by_user"], set()).add(row["canonical_url"])
+            return {"id": row["id"], "ai_result": [{"id": row["id"], "truthness_label": row["truthness_label"]}]}
+
+        async def ai_analysis(article):
+            # Planted text scores as fake; the real page as reliable
+            return {"prediction": [0.1, 0.9] if "planted" in article["text"] else [0.9, 0.1]}
+
+        downloaded = {"url": url, "canonical_url": url, "title": "Real", "source": "example.com",
+                      "authors": [], "collected_date": "2025-01-01", "publish_date": None, "text": "real story"}
+        cache = TieredCache(LRUCache())
+        with patch('src.services.article_service.analysis_cache', cache), \
+                patch.multiple('src.services.article_service.article_repository',
+                               has_analyzed=has_analyzed, find_by_canonical_url=find_by_canonical_url, save=save), \
+                patch.object(ArticleService, 'ai_analysis', side_effect=ai_analysis), \
+                patch.object(ArticleService, 'pull_article', return_value=downloaded) as mock_pull:
+            planted = await ArticleService.analyze_content("user-a", "jwt-a", text="planted story", url=url)
+            fresh = await ArticleService.analyze_article(url, "user-b", "jwt-b")
+
+        assert planted["ai_result"][0]["truthness_label"] == "Unreliable"
+        assert fresh["id"] != planted["id"]
+        assert fresh["ai_result"][0]["truthness_label"] == "Reliable"
+        mock_pull.assert_called_once_with(url)
+        # Only the downloaded analysis is cached for the URL
+        assert (await cache.get(canonicalize_url(url)))["article_id"] == fresh["id"]
+
+    @pytest.mark.asyncio
+    async def test_with_url_already_analyzed(self):
+        with patch('src.services.article_service.article_repository.has_analyzed', return_value=True):
+            with pytest.raises(HTTPException) as exc_info:
+                await ArticleService.analyze_content("user123", text="Body", url="https://example.com/story")
+
+        assert exc_info.value.status_code == 409
+
+    @pytest.mark.asyncio
+    async def test_no_article_text(self):
+        with patch.object(ArticleService, 'ai_analysis') as mock_ai:
+            with pytest.raises(HTTPException) as exc_info:
+                await ArticleService.analyze_content("user123", html="<html><body></body></html>")
+
+        assert exc_info.value.status_code == 422
+        mock_ai.assert_not_called()
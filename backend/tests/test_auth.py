@@ -0,0 +1,182 @@
+import time
+import pytest
+from unittest.mock import patch
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from jose import jwt
+from src.middleware import auth as auth_module
+from src.middleware.auth import AuthMiddleware
+from src.middleware.jwt_backends import PyJWTVerifier, UnknownSigningKey
+
+
+SECRET = "test-secret-for-hs256-tokens-0123456789"
+
+
+def make_token(sub="user123", expires_in=3600, **claims):
+    payload = {"sub": sub, "aud": "authenticated", **claims}
+    if expires_in is not None:
+        payload["exp"] = int(time.time()) + expires_in
+    return jwt.encode(payload, SECRET, algorithm="HS256")
+
+
+def make_auth(cache_size=100):
+    return AuthMiddleware(cache_size=cache_size, verifier=PyJWTVerifier("authenticated", secret=SECRET))
+
+
+def bearer(token):
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+
+class TestAuthMiddleware:
+
+    def test_verify_token_valid(self):
+        payload = make_auth().verify_token(make_token())
+        assert payload["sub"] == "user123"
+
+    def test_verify_token_invalid_signature(self):
+        token = jwt.encode({"sub": "user123", "aud": "authenticated"}, "other-secret", algorithm="HS256")
+        with pytest.raises(ValueError) as exc_info:
+            make_auth().verify_token(token)
+        assert "Invalid token" in str(exc_info.value)
+
+    def test_verify_token_expired(self):
+        with pytest.raises(ValueError):
+            make_auth().verify_token(make_token(expires_in=-10))
+
+    def test_repeated_token_is_decoded_once(self):
+        auth = make_auth()
+        token = make_token()
+
+        with patch.object(auth.verifier, 'verify', wraps=auth.verifier.verify) as mock_decode:
+            for _ in range(5):
+                assert auth.verify_token(token)["sub"] == "user123"
+
+        assert mock_decode.call_count == 1
+        stats = auth.cache_stats()
+        assert stats["hits"] == 4
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.8
+
+    def test_cache_keys_are_not_raw_tokens(self):
+        auth = make_auth()
+        token = make_token()
+        auth.verify_token(token)
+
+        key = next(iter(auth._cache._entries))
+        assert isinstance(key, bytes) and len(key) == 32
+        assert token.encode() not in key
+
+    def test_cached_claims_expire_with_token(self):
+        auth = make_auth()
+        token = make_token(expires_in=60)
+        auth.verify_token(token)
+
+        # Once the token's exp has passed the cached claims are dropped and the
+        # token goes through full verification again
+        with patch.object(auth_module.time, 'time', return_value=time.time() + 120):
+            with patch.object(auth.verifier, 'verify', side_effect=ValueError("Token expired")) as mock_decode:
+                with pytest.raises(ValueError):
+                    auth.verify_token(token)
+
+        mock_decode.assert_called_once()
+        assert len(auth._cache) == 0
+
+    def test_cache_entry_ttl_matches_exp(self):
+        auth = make_auth()
+        token = make_token(expires_in=600)
+
+        with patch.object(auth._cache, 'set', wraps=auth._cache.set) as mock_set:
+            auth.verify_token(token)
+
+        ttl = mock_set.call_args.kwargs["ttl_seconds"]
+        assert 590 < ttl <= 600
+
+    def test_token_without_exp_is_not_cached(self):
+        auth = make_auth()
+        auth.verify_token(make_token(expires_in=None))
+        assert len(auth._cache) == 0
+
+    def test_invalid_token_is_not_cached(self):
+        auth = make_auth()
+        with pytest.raises(ValueError):
+            auth.verify_token("not-a-jwt")
+        assert len(auth._cache) == 0
+
+    def test_cache_is_bounded(self):
+        auth = make_auth(cache_size=2)
+        for i in range(5):
+            auth.verify_token(make_token(sub=f"user{i}"))
+
+        assert len(auth._cache) == 2
+        assert auth.cache_stats()["evictions"] == 3
+
+    def test_cache_disabled(self):
+        auth = make_auth(cache_size=0)
+        token = make_token()
+
+        with patch.object(auth.verifier, 'verify', wraps=auth.verifier.verify) as mock_decode:
+            auth.verify_token(token)
+            auth.verify_token(token)
+
+        assert mock_decode.call_count == 2
+        assert auth.cache_stats() == {"enabled": False}
+
+    @pytest.mark.asyncio
+    async def test_dependencies_share_cache(self):
+        auth = make_auth()
+        token = make_token()
+
+        assert await auth.get_current_user(bearer(token)) == "user123"
+        assert await auth.get_user_with_token(bearer(token)) == ("user123", token)
+        assert auth.cache_stats()["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_missing_sub_is_rejected(self):
+        auth = make_auth()
+        token = jwt.encode(
+            {"aud": "authenticated", "exp": int(time.time()) + 60},
+            SECRET,
+            algorithm="HS256"
+        )
+
+        with pytest.raises(HTTPException) as exc_info:
+            await auth.get_user_with_token(bearer(token))
+
+        assert exc_info.value.status_code == 401
+        assert exc_info.value.detail["code"] == "INVALID_TOKEN"
+
+    @pytest.mark.asyncio
+    async def test_unknown_signing_key_is_refreshed_off_the_event_loop(self):
+        verifier = PyJWTVerifier("authenticated", secret=SECRET)
+        auth = AuthMiddleware(cache_size=100, verifier=verifier)
+        token = make_token()
+        rotated = {"done": False}
+
+        def verify(token):
+            if not rotated["done"]:
+                raise UnknownSigningKey("new-key")
+            return {"sub": "user123", "exp": int(time.time()) + 60}
+
+        async def refresh_keys():
+            rotated["done"] = True
+
+        with patch.object(verifier, 'verify', side_effect=verify), \
+                patch.object(verifier, 'refresh_keys', side_effect=refresh_keys) as mock_refresh:
+            assert await auth.get_current_user(bearer(token)) == "user123"
+
+        mock_refresh.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_signing_key_still_unknown_after_refresh_is_rejected(self):
+        verifier = PyJWTVerifier("authenticated", secret=SECRET)
+        auth = AuthMiddleware(cache_size=100, verifier=verifier)
+
+        with patch.object(verifier, 'verify', side_effect=UnknownSigningKey("made-up")), \
+                patch.object(verifier, 'refresh_keys') as mock_refresh:
+            with pytest.raises(HTTPException) as exc_info:
+                await auth.get_current_user(bearer(make_token()))
+
+        assert exc_info.value.status_code == 401
+        assert "unknown signing key" in exc_info.value.detail["error"]
+        mock_refresh.assert_awaited_once()
+
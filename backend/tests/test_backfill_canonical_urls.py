@@ -0,0 +1,82 @@
+import json
+from functools import partial
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+import httpx
+import pytest
+from unittest.mock import patch
+from src.cli import backfill_canonical_urls
+from src.config import settings
+from src.lib import supabase_client
+
+
+class FakeArticles:
+    """PostgREST stand-in for the Article reads and updates the backfill makes"""
+
+    def __init__(self, rows):
+        self.rows = {row["id"]: dict(row) for row in rows}
+        self.updates = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        assert unquote(urlsplit(str(request.url)).path) == "/rest/v1/Article"
+        params = dict(parse_qsl(request.url.query.decode()))
+        if request.method == "PATCH":
+            article_id = int(params["id"][3:])
+            self.rows[article_id].update(json.loads(request.content))
+            self.updates.append(article_id)
+            return httpx.Response(200, json=[self.rows[article_id]])
+
+        after_id = int(params["id"][3:])
+        rows = sorted((row for row in self.rows.values() if row["id"] > after_id), key=lambda row: row["id"])
+        return httpx.Response(200, json=rows[:int(params["limit"])])
+
+
+@pytest.fixture
+def articles():
+    articles = FakeArticles([
+        # Backfilled by the migration with the raw url
+        {"id": 1, "url": "https://www.example.com/story/?utm_source=x", "canonical_url": "https://www.example.com/story/?utm_source=x"},
+        {"id": 2, "url": "https://example.com/other", "canonical_url": None},
+        # Already canonical
+        {"id": 3, "url": "https://example.com/done", "canonical_url": "https://example.com/done"},
+        # Refined from the page's <link rel="canonical"> at save time
+        {"id": 4, "url": "https://m.example.com/a?id=1", "canonical_url": "https://example.com/articles/1"},
+        {"id": 5, "url": "http://Example.com/Caps#top", "canonical_url": "http://Example.com/Caps#top"},
+    ])
+    with patch.object(settings, 'SUPABASE_URL', "https://project.supabase.co"), \
+            patch.object(settings, 'SUPABASE_SERVICE_ROLE_KEY', "service-role-key"), \
+            patch.object(supabase_client, 'create_http_client',
+                         partial(supabase_client.create_http_client, httpx.MockTransport(articles))):
+        yield articles
+
+
+class TestBackfillCanonicalUrls:
+
+    def test_backfilled_canonical_url(self):
+        assert backfill_canonical_urls.backfilled_canonical_url(
+            {"url": "https://www.example.com/story/", "canonical_url": "https://www.example.com/story/"}
+        ) == "https://example.com/story"
+        assert backfill_canonical_urls.backfilled_canonical_url(
+            {"url": "https://example.com/story", "canonical_url": "https://example.com/story"}
+        ) is None
+        assert backfill_canonical_urls.backfilled_canonical_url(
+            {"url": "https://m.example.com/a", "canonical_url": "https://example.com/a"}
+        ) is None
+
+    def test_canonicalizes_rows_in_batches(self, articles):
+        summary = backfill_canonical_urls.main(["--batch-size", "2"])
+
+        assert summary == {"scanned": 5, "updated": 3}
+        assert sorted(articles.updates) == [1, 2, 5]
+        assert articles.rows[1]["canonical_url"] == "https://example.com/story"
+        assert articles.rows[2]["canonical_url"] == "https://example.com/other"
+        assert articles.rows[4]["canonical_url"] == "https://example.com/articles/1"
+
+        # A second run has nothing left to do
+        assert backfill_canonical_urls.main([])["updated"] == 0
+
+    def test_dry_run(self, articles):
+        summary = backfill_canonical_urls.main(["--dry-run"])
+
+        assert summary["updated"] == 3
+        assert articles.updates == []
@@ -0,0 +1,411 @@
+"""
+Microbenchmarks for hot paths that don't need a live server.
+
+Run with ./run_tests.sh --benchmark for the timing tables.
+"""
+import asyncio
+import json
+import pickle
+import warnings
+import statistics
+import subprocess
+import sys
+import time
+import pytest
+from unittest.mock import patch
+from jose import jwt
+from src.middleware.auth import AuthMiddleware
+from src.middleware.cors import CORSMiddleware
+from src.middleware.jwt_backends import JoseVerifier, PyJWTVerifier
+from src.repository import article_repository
+from src.services.article_service import ArticleService
+from src.services.shadow_scorer import ShadowScorer
+from src.lib.cache import LRUCache, TieredCache
+from src.lib.features import SortedVocabulary, TfidfFeatureExtractor
+from src.lib.lean_model import export_artifacts, load_artifacts
+from src.lib.timing import request_timings, stage
+
+
+HISTORY_SIZES = [10, 1_000, 10_000]
+
+
+def history_row(index: int):
+    return {
+        "id": index,
+        "created_at": "2025-01-01T00:00:00",
+        "history_index": index,
+        "input_by_user": "user123",
+        "article": {
+            "id": index,
+            "url": f"https://example.com/news/{index}",
+            "canonical_url": f"https://example.com/news/{index}",
+            "title": f"Article {index}",
+            "source": "example.com",
+            "collected_date": "2025-01-01T00:00:00",
+            "ai_result": [{
+                "id": index,
+                "genre": "Real News",
+                "truthness_label": "Reliable",
+                "truthness_score": 0.9,
+                "related_articles": [],
+                "is_satire": False
+            }]
+        }
+    }
+
+
+class FakeHistoryTable:
+    """
+    Stand-in for PostgREST over an indexed "Input History" table.
+    Responses are JSON round-tripped like a real HTTP response body.
+    """
+    
+    def __init__(self, size: int):
+        self.rows = [history_row(i) for i in range(size)]
+        self.by_canonical_url = {row["article"]["canonical_url"]: row for row in self.rows}
+        self._filters = {}
+    
+    def from_(self, table):
+        self._filters = {}
+        return self
+    
+    def select(self, columns):
+        return self
+    
+    def eq(self, column, value):
+        self._filters[column] = value
+        return self
+    
+    def in_(self, column, values):
+        self._filters[column] = values
+        return self
+    
+    def order(self, column, desc=False):
+        return self
+    
+    def limit(self, count):
+        self._filters["limit"] = count
+        return self
+    
+    async def execute(self):
+        if "article.canonical_url" in self._filters:
+            rows = [
+                {"article": {"canonical_url": url}}
+                for url in self._filters["article.canonical_url"]
+                if url in self.by_canonical_url
+            ][:self._filters.get("limit")]
+        else:
+            rows = self.rows
+        return type("Response", (), {"data": json.loads(json.dumps(rows))})()
+
+
+async def full_scan_duplicate_check(table: FakeHistoryTable, url: str):
+    """The previous duplicate check: fetch the whole history and scan it"""
+    history = (await table.from_('Input History').select('*').eq('input_by_user', "user123").order('history_index', desc=True).execute()).data
+    return any(item['article']['url'] == url for item in history)
+
+
+def run(loop, coroutine_function, *args):
+    return loop.run_until_complete(coroutine_function(*args))
+
+
+def submit_new_article(loop, url: str):
+    return run(loop, ArticleService.analyze_article, url, "user123")
+
+
+@pytest.fixture
+def event_loop_for_benchmark():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+class TestDuplicateCheckBenchmark:
+    
+    @pytest.mark.parametrize("history_size", HISTORY_SIZES)
+    def test_indexed_duplicate_check(self, benchmark, history_size, event_loop_for_benchmark):
+        table = FakeHistoryTable(history_size)
+        
+        with patch('src.repository.article_repository.get_supabase_client', return_value=table):
+            result = benchmark(
+                run, event_loop_for_benchmark,
+                article_repository.has_analyzed, "user123", "https://example.com/news/new", "jwt"
+            )
+        
+        assert result is False
+    
+    @pytest.mark.parametrize("history_size", HISTORY_SIZES)
+    def test_full_scan_duplicate_check(self, benchmark, history_size, event_loop_for_benchmark):
+        table = FakeHistoryTable(history_size)
+        result = benchmark(run, event_loop_for_benchmark, full_scan_duplicate_check, table, "https://example.com/news/new")
+        
+        assert result is False
+    
+    @pytest.mark.parametrize("history_size", HISTORY_SIZES)
+    def test_submit_latency(self, benchmark, history_size, event_loop_for_benchmark):
+        table = FakeHistoryTable(history_size)
+        mock_article = {"url": "https://example.com/news/new", "source": "example.com", "title": "New", "text": "Content"}
+        
+        with patch('src.repository.article_repository.get_supabase_client', return_value=table):
+            with patch('src.services.article_service.analysis_cache', TieredCache(LRUCache(max_size=1))):
+                with patch('src.services.article_service.article_repository.find_by_canonical_url', return_value=None):
+                    with patch.object(ArticleService, 'pull_article', return_value=mock_article):
+                        with patch.object(ArticleService, 'ai_analysis', return_value={"prediction": [0.8, 0.2]}):
+                            with patch('src.services.article_service.article_repository.save', return_value={"id": 1}):
+                                result = benchmark(submit_new_article, event_loop_for_benchmark, "https://example.com/news/new")
+        
+        assert result == {"id": 1}
+    
+    def test_duplicate_check_stays_flat_as_history_grows(self, event_loop_for_benchmark):
+        def median_seconds(table):
+            timings = []
+            for _ in range(200):
+                start_time = time.perf_counter()
+                run(event_loop_for_benchmark, article_repository.has_analyzed, "user123", "https://example.com/news/5", "jwt")
+                timings.append(time.perf_counter() - start_time)
+            return statistics.median(timings)
+        
+        small, large = FakeHistoryTable(10), FakeHistoryTable(10_000)
+        with patch('src.repository.article_repository.get_supabase_client', return_value=small):
+            small_median = median_seconds(small)
+        with patch('src.repository.article_repository.get_supabase_client', return_value=large):
+            large_median = median_seconds(large)
+        
+        print(f"\nDuplicate check median: 10 rows {small_median * 1e6:.1f}us, 10k rows {large_median * 1e6:.1f}us")
+        assert large_median < small_median * 3
+
+
+class TestJWTVerificationBenchmark:
+    
+    SECRET = "benchmark-secret-for-hs256-tokens"
+    
+    def make_auth(self, cache_size, backend="pyjwt"):
+        if backend == "jose":
+            verifier = JoseVerifier(self.SECRET, "authenticated")
+        else:
+            verifier = PyJWTVerifier("authenticated", secret=self.SECRET)
+        return AuthMiddleware(cache_size=cache_size, verifier=verifier)
+    
+    def make_token(self):
+        payload = {"sub": "user123", "aud": "authenticated", "exp": int(time.time()) + 3600}
+        return jwt.encode(payload, self.SECRET, algorithm="HS256")
+    
+    def test_uncached_verification(self, benchmark):
+        auth, token = self.make_auth(cache_size=0), self.make_token()
+        assert benchmark(auth.verify_token, token)["sub"] == "user123"
+    
+    def test_uncached_verification_jose(self, benchmark):
+        auth, token = self.make_auth(cache_size=0, backend="jose"), self.make_token()
+        assert benchmark(auth.verify_token, token)["sub"] == "user123"
+    
+    def test_cached_verification(self, benchmark):
+        auth, token = self.make_auth(cache_size=100), self.make_token()
+        assert benchmark(auth.verify_token, token)["sub"] == "user123"
+    
+    def test_cache_beats_full_verification(self):
+        def median_seconds(auth, token):
+            auth.verify_token(token)
+            timings = []
+            for _ in range(500):
+                start_time = time.perf_counter()
+                auth.verify_token(token)
+                timings.append(time.perf_counter() - start_time)
+            return statistics.median(timings)
+        
+        token = self.make_token()
+        uncached = median_seconds(self.make_auth(cache_size=0), token)
+        cached = median_seconds(self.make_auth(cache_size=100), token)
+        
+        jose = median_seconds(self.make_auth(cache_size=0, backend="jose"), token)
+        
+        print(
+            f"\nJWT verification median: jose {jose * 1e6:.1f}us, "
+            f"pyjwt {uncached * 1e6:.1f}us, cached {cached * 1e6:.1f}us"
+        )
+        assert cached < uncached / 2
+
+
+class TestCORSPreflightBenchmark:
+    
+    PREVIEW_ORIGIN = b"https://fake-news-detector-frontend-abc123-daltongorhams-projects.vercel.app"
+    
+    async def preflight(self, middleware, origin):
+        scope = {
+            "type": "http",
+            "method": "OPTIONS",
+            "path": "/api/v1/articles/history",
+            "headers": [
+                (b"origin", origin),
+                (b"access-control-request-method", b"GET"),
+                (b"access-control-request-headers", b"authorization"),
+            ],
+        }
+        messages = []
+        
+        async def send(message):
+            messages.append(message)
+        
+        await middleware(scope, None, send)
+        return messages[0]["status"]
+    
+    def make_middleware(self):
+        async def app(scope, receive, send):
+            raise AssertionError("preflight reached the app")
+        
+        return CORSMiddleware(
+            app,
+            allow_origins=["http://localhost:5173"],
+            allow_origin_regex=r"https://fake-news-detector-frontend-[a-zA-Z0-9-]+-daltongorhams-projects\.vercel\.app",
+        )
+    
+    @pytest.mark.parametrize("origin", [b"http://localhost:5173", PREVIEW_ORIGIN])
+    def test_preflight(self, benchmark, origin, event_loop_for_benchmark):
+        middleware = self.make_middleware()
+        status = benchmark(run, event_loop_for_benchmark, self.preflight, middleware, origin)
+        assert status == 200
+
+
+@pytest.fixture(scope="module")
+def vectorizer():
+    from src.repository.model_repository import MODEL_DIR
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        with open(f"{MODEL_DIR}/vectorizer.pkl", "rb") as f:
+            return pickle.load(f)
+
+
+@pytest.fixture(scope="module")
+def articles(vectorizer):
+    words = sorted(vectorizer.vocabulary_) + ["the", "and", "of", "to", "a"] * 500
+    return [
+        " ".join(words[(i * 7919 + j * 104729) % len(words)] for j in range(2000))
+        for i in range(16)
+    ]
+
+
+class TestFeatureExtractionBenchmark:
+    
+    def test_sklearn_transform(self, benchmark, vectorizer, articles):
+        assert benchmark(vectorizer.transform, articles).shape[0] == len(articles)
+    
+    def test_extractor_transform(self, benchmark, vectorizer, articles):
+        extractor = TfidfFeatureExtractor.from_vectorizer(vectorizer)
+        assert benchmark(extractor.transform, articles).shape[0] == len(articles)
+    
+    def test_extractor_transform_sorted_vocabulary(self, benchmark, vectorizer, articles):
+        extractor = TfidfFeatureExtractor(SortedVocabulary.from_dict(vectorizer.vocabulary_), vectorizer.idf_)
+        assert benchmark(extractor.transform, articles).shape[0] == len(articles)
+    
+    def test_extractor_beats_sklearn(self, vectorizer, articles):
+        def median_seconds(transform):
+            timings = []
+            for _ in range(15):
+                start_time = time.perf_counter()
+                transform(articles)
+                timings.append(time.perf_counter() - start_time)
+            return statistics.median(timings)
+        
+        extractor = TfidfFeatureExtractor.from_vectorizer(vectorizer)
+        sklearn_median = median_seconds(vectorizer.transform)
+        extractor_median = median_seconds(extractor.transform)
+        
+        print(f"\nTF-IDF median for {len(articles)} articles: sklearn {sklearn_median * 1e3:.1f}ms, extractor {extractor_median * 1e3:.1f}ms")
+        assert extractor_median < sklearn_median
+
+
+@pytest.fixture(scope="module")
+def model_files(tmp_path_factory, vectorizer, articles):
+    """vectorizer.pkl plus a small fitted model.pkl, and the lean export of both"""
+    from sklearn.linear_model import LogisticRegression
+    model = LogisticRegression().fit(vectorizer.transform(articles), [i % 2 for i in range(len(articles))])
+    directory = tmp_path_factory.mktemp("model")
+    (directory / "vectorizer.pkl").write_bytes(pickle.dumps(vectorizer))
+    (directory / "model.pkl").write_bytes(pickle.dumps(model))
+    export_artifacts(vectorizer, model, str(directory / "lean"))
+    return directory
+
+
+class TestModelStartupBenchmark:
+    
+    def test_load_lean_artifacts(self, benchmark, model_files):
+        benchmark(load_artifacts, str(model_files / "lean"))
+    
+    def test_lean_cold_start_beats_pickles(self, model_files):
+        """Time a fresh interpreter loading each format, imports included"""
+        load_pickles = (
+            "import pickle, warnings; warnings.simplefilter('ignore')\n"
+            f"pickle.load(open({str(model_files / 'vectorizer.pkl')!r}, 'rb'))\n"
+            f"pickle.load(open({str(model_files / 'model.pkl')!r}, 'rb'))"
+        )
+        load_lean = (
+            "from src.lib.lean_model import load_artifacts\n"
+            f"load_artifacts({str(model_files / 'lean')!r})"
+        )
+        
+        def median_seconds(code):
+            timings = []
+            for _ in range(3):
+                start_time = time.perf_counter()
+                subprocess.run([sys.executable, "-c", code], check=True)
+                timings.append(time.perf_counter() - start_time)
+            return statistics.median(timings)
+        
+        pickle_median = median_seconds(load_pickles)
+        lean_median = median_seconds(load_lean)
+        
+        print(f"\nCold model load median: pickles {pickle_median * 1e3:.0f}ms, lean {lean_median * 1e3:.0f}ms")
+        assert lean_median < pickle_median
+
+
+class TestShadowScoringBenchmark:
+    """What shadow scoring adds to the response path: only the submit call"""
+    
+    PREDICTION = [[0.7, 0.3]]
+    
+    def make_scorer(self, sample_rate):
+        # A slow shadow model keeps the queue full, the worst case for callers
+        def slow_predict(texts):
+            time.sleep(0.01)
+            return self.PREDICTION * len(texts)
+        return ShadowScorer(slow_predict, version="candidate", sample_rate=sample_rate, max_queue_size=10)
+    
+    @pytest.mark.parametrize("sample_rate", [0.0, 0.1, 1.0])
+    def test_submit(self, benchmark, sample_rate):
+        scorer = self.make_scorer(sample_rate)
+        try:
+            benchmark(scorer.submit, ["Title Content"], self.PREDICTION, 0.005, "default")
+        finally:
+            scorer.shutdown()
+    
+    def test_submit_p99_stays_small(self):
+        scorer = self.make_scorer(1.0)
+        timings = []
+        try:
+            for _ in range(2000):
+                start_time = time.perf_counter()
+                scorer.submit(["Title Content"], self.PREDICTION, 0.005, "default")
+                timings.append(time.perf_counter() - start_time)
+        finally:
+            scorer.shutdown()
+        
+        p99 = statistics.quantiles(timings, n=100)[98]
+        print(f"\nShadow submit p99: {p99 * 1e6:.1f}us, dropped {scorer.stats()['dropped']} of 2000")
+        # Far below a single inference, so request latency doesn't move
+        assert p99 < 0.001
+
+
+class TestStageTimingBenchmark:
+    """Cost of one timing span, paid a handful of times per request"""
+    
+    def test_span(self, benchmark):
+        def span():
+            with stage("fetch"):
+                pass
+        benchmark(span)
+    
+    def test_span_in_request(self, benchmark):
+        token = request_timings.set({})
+        try:
+            self.test_span(benchmark)
+        finally:
+            request_timings.reset(token)
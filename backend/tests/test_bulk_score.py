@@ -0,0 +1,244 @@
+import csv
+import json
+import os
+import subprocess
+import sys
+import httpx
+import pytest
+from unittest.mock import patch
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from src.cli import bulk_score
+from src.config import settings
+from src.lib.article_fetcher import ArticleFetcher
+from src.lib.lean_model import export_artifacts
+from src.repository.model_repository import write_manifest
+
+
+TEXTS = [
+    "officials confirm the report in a statement",
+    "shocking secret cure that doctors hate",
+    "the agency statement confirms the figures",
+    "you won't believe this miracle trick",
+]
+
+ARTICLE_HTML = (
+    "<html><head><title>Fetched story</title></head><body><article>"
+    + "<p>Officials confirm the report in a statement released by the agency on Tuesday.</p>" * 5
+    + "</article></body></html>"
+)
+
+
+def local_site(request: httpx.Request) -> httpx.Response:
+    """Local stand-in for article sites"""
+    if request.url.path == "/story":
+        return httpx.Response(200, html=ARTICLE_HTML)
+    return httpx.Response(404, text="not found")
+
+
+@pytest.fixture
+def model_version(tmp_path):
+    vectorizer = TfidfVectorizer().fit(TEXTS)
+    model = LogisticRegression().fit(vectorizer.transform(TEXTS), [0, 1, 0, 1])
+    versions_dir = tmp_path / "versions"
+    export_artifacts(vectorizer, model, str(versions_dir / "bulk"))
+    write_manifest(str(versions_dir / "bulk"), "bulk")
+    with patch.object(settings, 'MODEL_VERSIONS_DIR', str(versions_dir)):
+        yield str(versions_dir)
+
+
+@pytest.fixture
+def fetcher():
+    fetcher = ArticleFetcher(transport=httpx.MockTransport(local_site))
+    with patch('src.cli.bulk_score.article_fetcher', fetcher):
+        yield fetcher
+
+
+def write_jsonl(path, records):
+    path.write_text("".join(json.dumps(record) + "\n" for record in records))
+
+
+def read_jsonl(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def score(*args):
+    return bulk_score.main([*args, "--model-version", "bulk", "--workers", "0", "--progress-every", "0"])
+
+
+class TestReadRecords:
+
+    def test_jsonl_skips_blank_lines_and_resumes(self, tmp_path):
+        path = tmp_path / "in.jsonl"
+        path.write_text('{"id": 1}\n\n{"id": 2}\n{"id": 3}\n')
+
+        assert [offset for offset, _ in bulk_score.read_records(str(path), "jsonl")] == [0, 1, 2]
+        assert list(bulk_score.read_records(str(path), "jsonl", start=2)) == [(2, {"id": 3})]
+
+    def test_csv_with_large_multiline_fields(self, tmp_path):
+        path = tmp_path / "in.csv"
+        text = "line one\nline two " + "x" * 200_000
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=["id", "text"])
+            writer.writeheader()
+            writer.writerow({"id": "a", "text": text})
+            writer.writerow({"id": "b", "text": "short"})
+
+        records = list(bulk_score.read_records(str(path), "csv"))
+        assert records == [(0, {"id": "a", "text": text}), (1, {"id": "b", "text": "short"})]
+
+    def test_chunked(self):
+        assert list(bulk_score.chunked(range(5), 2)) == [[0, 1], [2, 3], [4]]
+
+
+class TestScoreChunk:
+
+    def test_scores_text_and_reports_missing(self, model_version):
+        rows = bulk_score.score_chunk([
+            (0, {"id": 7, "title": "Report", "text": TEXTS[0], "url": "https://news.example.com/a"}),
+            (1, {"text": "  "}),
+            (2, {"text": TEXTS[1], "_fetch_error": "https://x.example.com returned HTTP 404"}),
+        ], "bulk")
+
+        assert [row["offset"] for row in rows] == [0, 1, 2]
+        assert rows[0]["id"] == "7"
+        assert rows[0]["source"] == "news.example.com"
+        assert rows[0]["truthness_label"] == "Reliable"
+        assert sum(rows[0]["prediction"]) == pytest.approx(1.0)
+        assert rows[1]["error"] == "No text to score"
+        assert "HTTP 404" in rows[2]["error"]
+        assert rows[2]["prediction"] is None
+
+
+class TestBulkScoreCommand:
+
+    def test_scores_jsonl_and_fetches_missing_text(self, tmp_path, model_version, fetcher):
+        source, output = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+        write_jsonl(source, [
+            {"id": 1, "title": "Report", "text": TEXTS[0]},
+            {"id": 2, "url": "https://news.example.com/story"},
+            {"id": 3, "url": "https://news.example.com/missing"},
+            {"id": 4, "text": TEXTS[3]},
+        ])
+
+        summary = score(str(source), "-o", str(output), "--batch-size", "3")
+
+        rows = read_jsonl(output)
+        assert summary["records"] == 4 and summary["errors"] == 1
+        assert [row["id"] for row in rows] == ["1", "2", "3", "4"]
+        assert rows[1]["title"] == "Fetched story"
+        assert rows[1]["truthness_label"] == "Reliable"
+        assert "404" in rows[2]["error"]
+        assert rows[3]["truthness_label"] == "Unreliable"
+
+        checkpoint = json.loads((tmp_path / "out.jsonl.checkpoint.json").read_text())
+        assert checkpoint["offset"] == 4
+        assert checkpoint["output_bytes"] == os.path.getsize(output)
+
+    def test_csv_with_empty_html_column(self, tmp_path, model_version, fetcher):
+        source, output = tmp_path / "in.csv", tmp_path / "out.jsonl"
+        with open(source, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=["id", "url", "text", "html"])
+            writer.writeheader()
+            writer.writerow({"id": 1, "url": "", "text": TEXTS[0], "html": ""})
+            writer.writerow({"id": 2, "url": "https://news.example.com/story", "text": "", "html": ""})
+            writer.writerow({"id": 3, "url": "https://news.example.com/inline", "text": "", "html": ARTICLE_HTML})
+
+        summary = score(str(source), "-o", str(output))
+
+        rows = read_jsonl(output)
+        assert summary["errors"] == 0
+        assert rows[0]["truthness_label"] == "Reliable"
+        assert rows[1]["title"] == "Fetched story"
+        assert rows[2]["title"] == "Fetched story"
+    
+    def test_html_without_url(self, tmp_path, model_version):
+        source, output = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+        write_jsonl(source, [{"id": 1, "html": ARTICLE_HTML}])
+
+        summary = score(str(source), "-o", str(output))
+
+        rows = read_jsonl(output)
+        assert summary["errors"] == 0
+        assert rows[0]["title"] == "Fetched story"
+        assert rows[0]["truthness_label"] is not None
+
+    def test_resume_continues_after_checkpoint(self, tmp_path, model_version, fetcher):
+        source, output = tmp_path / "in.csv", tmp_path / "out.jsonl"
+        with open(source, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=["id", "text"])
+            writer.writeheader()
+            for i in range(10):
+                writer.writerow({"id": i, "text": TEXTS[i % 4]})
+        score(str(source), "-o", str(output), "--batch-size", "4")
+        complete = read_jsonl(output)
+
+        # Interrupted after the first chunk, with a partial line after it
+        first_chunk = "".join(json.dumps(row) + "\n" for row in complete[:4])
+        output.write_text(first_chunk + '{"offset": 4, "trunc')
+        checkpoint_path = tmp_path / "out.jsonl.checkpoint.json"
+        checkpoint = json.loads(checkpoint_path.read_text())
+        checkpoint.update(offset=4, output_bytes=len(first_chunk.encode()))
+        checkpoint_path.write_text(json.dumps(checkpoint))
+
+        summary = score(str(source), "-o", str(output), "--batch-size", "4", "--resume")
+
+        assert summary["records"] == 6
+        assert read_jsonl(output) == complete
+
+    def test_refuses_to_overwrite(self, tmp_path, model_version):
+        source, output = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+        write_jsonl(source, [{"text": TEXTS[0]}])
+        output.write_text("existing\n")
+
+        with pytest.raises(SystemExit):
+            score(str(source), "-o", str(output))
+        assert output.read_text() == "existing\n"
+
+        score(str(source), "-o", str(output), "--overwrite")
+        assert len(read_jsonl(output)) == 1
+
+    def test_resume_without_checkpoint_keeps_output(self, tmp_path, model_version):
+        source, output = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+        write_jsonl(source, [{"text": TEXTS[0]}])
+        output.write_text("existing\n")
+
+        with pytest.raises(SystemExit):
+            score(str(source), "-o", str(output), "--resume")
+        assert output.read_text() == "existing\n"
+
+    def test_parquet_output(self, tmp_path, model_version):
+        pq = pytest.importorskip("pyarrow.parquet")
+        source, output = tmp_path / "in.jsonl", tmp_path / "out.parquet"
+        write_jsonl(source, [{"id": i, "text": TEXTS[i % 4]} for i in range(5)])
+
+        score(str(source), "-o", str(output), "--batch-size", "2", "--rows-per-file", "4")
+
+        assert sorted(os.listdir(output)) == ["part-000000000000.parquet", "part-000000000004.parquet"]
+        table = pq.read_table(str(output))
+        assert table.column("offset").to_pylist() == [0, 1, 2, 3, 4]
+
+    def test_parquet_ignores_stray_part_files(self, tmp_path, model_version):
+        pytest.importorskip("pyarrow.parquet")
+        source, output = tmp_path / "in.jsonl", tmp_path / "out.parquet"
+        write_jsonl(source, [{"id": 0, "text": TEXTS[0]}])
+        output.mkdir()
+        (output / "part-notes.txt").write_text("keep me")
+
+        score(str(source), "-o", str(output), "--overwrite")
+
+        assert sorted(os.listdir(output)) == ["part-000000000000.parquet", "part-notes.txt"]
+
+    def test_process_pool(self, tmp_path, model_version):
+        source, output = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+        write_jsonl(source, [{"id": i, "text": TEXTS[i % 4]} for i in range(50)])
+
+        subprocess.run(
+            [sys.executable, "-m", "src.cli.bulk_score", str(source), "-o", str(output),
+             "--model-version", "bulk", "--workers", "2", "--batch-size", "8"],
+            check=True, capture_output=True, env={**os.environ, "MODEL_VERSIONS_DIR": model_version},
+        )
+
+        rows = read_jsonl(output)
+        assert [row["offset"] for row in rows] == list(range(50))
+        assert all(row["error"] is None for row in rows)
@@ -0,0 +1,175 @@
+import asyncio
+import pytest
+from unittest.mock import patch
+from src.lib.cache import LRUCache, StaleWhileRevalidateCache, TieredCache
+
+
+class FakeSharedCache:
+    def __init__(self):
+        self.values = {}
+    
+    def get(self, key, default=None):
+        return self.values.get(key, default)
+    
+    def set(self, key, value, ttl_seconds=None):
+        self.values[key] = value
+    
+    def delete(self, key):
+        self.values.pop(key, None)
+
+
+class BrokenSharedCache:
+    def get(self, key, default=None):
+        raise ConnectionError("redis down")
+    
+    def set(self, key, value, ttl_seconds=None):
+        raise ConnectionError("redis down")
+    
+    def delete(self, key):
+        raise ConnectionError("redis down")
+
+
+class TestLRUCache:
+    
+    def test_get_and_set(self):
+        cache = LRUCache(max_size=2)
+        cache.set("a", 1)
+        
+        assert cache.get("a") == 1
+        assert cache.get("missing") is None
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+    
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(max_size=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+        assert cache.stats()["evictions"] == 1
+    
+    def test_entries_expire(self):
+        cache = LRUCache(max_size=2, ttl_seconds=10)
+        with patch('src.lib.cache.time.monotonic', return_value=100.0):
+            cache.set("a", 1)
+        with patch('src.lib.cache.time.monotonic', return_value=105.0):
+            assert cache.get("a") == 1
+        with patch('src.lib.cache.time.monotonic', return_value=111.0):
+            assert cache.get("a") is None
+        assert len(cache) == 0
+
+
+class TestTieredCache:
+    
+    @pytest.mark.asyncio
+    async def test_reads_through_to_shared_backend(self):
+        shared = FakeSharedCache()
+        shared.values["key"] = {"article_id": 1}
+        cache = TieredCache(LRUCache(max_size=10), shared)
+        
+        assert await cache.get("key") == {"article_id": 1}
+        assert cache.local.get("key") == {"article_id": 1}
+    
+    @pytest.mark.asyncio
+    async def test_writes_both_tiers(self):
+        shared = FakeSharedCache()
+        cache = TieredCache(LRUCache(max_size=10), shared)
+        await cache.set("key", "value")
+        
+        assert shared.values["key"] == "value"
+        await cache.delete("key")
+        assert "key" not in shared.values
+        assert await cache.get("key") is None
+    
+    @pytest.mark.asyncio
+    async def test_shared_backend_failures_are_ignored(self):
+        cache = TieredCache(LRUCache(max_size=10), BrokenSharedCache())
+        await cache.set("key", "value")
+        
+        assert await cache.get("key") == "value"
+        assert await cache.get("other") is None
+        await cache.delete("key")
+
+
+class Loader:
+    def __init__(self, *values):
+        self.values = list(values)
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        value = self.values.pop(0)
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+
+class TestStaleWhileRevalidateCache:
+
+    def test_delete_where(self):
+        cache = LRUCache()
+        for key in [("a", 1), ("a", 2), ("b", 1)]:
+            cache.set(key, key)
+
+        assert cache.delete_where(lambda key: key[0] == "a") == 2
+        assert cache.get(("b", 1)) == ("b", 1)
+        assert len(cache) == 1
+
+    @pytest.mark.asyncio
+    async def test_fresh_entries_are_not_reloaded(self):
+        cache = StaleWhileRevalidateCache(fresh_seconds=60)
+        load = Loader("v1")
+
+        assert await cache.get_or_load("k", load) == "v1"
+        assert await cache.get_or_load("k", load) == "v1"
+        assert load.calls == 1
+        assert cache.stats()["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_stale_entry_served_while_revalidated(self):
+        cache = StaleWhileRevalidateCache(fresh_seconds=0)
+        load = Loader("v1", "v2")
+        await cache.get_or_load("k", load)
+
+        # Served stale; only one reload starts however many requests see it
+        assert await cache.get_or_load("k", load) == "v1"
+        assert await cache.get_or_load("k", load) == "v1"
+        await asyncio.sleep(0)
+
+        assert load.calls == 2
+        assert cache.stats()["revalidations"] == 1
+        assert cache.local.get("k")[0] == "v2"
+
+    @pytest.mark.asyncio
+    async def test_failed_revalidation_drops_entry(self, capsys):
+        cache = StaleWhileRevalidateCache(fresh_seconds=0)
+        await cache.get_or_load("k", Loader("v1"))
+
+        assert await cache.get_or_load("k", Loader(LookupError("gone"))) == "v1"
+        await asyncio.sleep(0)
+
+        assert cache.local.get("k") is None
+        assert cache.stats()["revalidation_failures"] == 1
+        assert "Warning: Cache revalidation failed" in capsys.readouterr().out
+
+    @pytest.mark.asyncio
+    async def test_invalidate_discards_loads_in_flight(self):
+        cache = StaleWhileRevalidateCache()
+        started, release = asyncio.Event(), asyncio.Event()
+
+        async def slow_load():
+            started.set()
+            await release.wait()
+            return "old"
+
+        request = asyncio.create_task(cache.get_or_load(("user", 1), slow_load))
+        await started.wait()
+        cache.invalidate(lambda key: key[0] == "user")
+        release.set()
+
+        assert await request == "old"
+        assert cache.local.get(("user", 1)) is None
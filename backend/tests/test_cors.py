@@ -0,0 +1,160 @@
+import pytest
+from unittest.mock import patch
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from src.main import app
+from src.middleware.cors import CORSMiddleware
+
+
+LOCALHOST_ORIGIN = "http://localhost:5173"
+PREVIEW_ORIGIN = "https://fake-news-detector-frontend-abc123-daltongorhams-projects.vercel.app"
+client = TestClient(app)
+
+
+def make_client(**options):
+    """A bare app behind the CORS middleware, with one route that counts calls"""
+    test_app = FastAPI()
+    test_app.state.calls = 0
+
+    @test_app.get("/items")
+    async def items():
+        test_app.state.calls += 1
+        return {"ok": True}
+
+    test_app.add_middleware(
+        CORSMiddleware,
+        allow_origins=[LOCALHOST_ORIGIN],
+        allow_origin_regex=r"https://preview-[a-z0-9]+\.example\.com",
+        expose_headers=["X-Total-Count"],
+        **options
+    )
+    return TestClient(test_app), test_app
+
+
+class TestPreflight:
+
+    def test_allowed_origin(self):
+        response = client.options(
+            "/api/v1/user/profile",
+            headers={
+                "origin": LOCALHOST_ORIGIN,
+                "access-control-request-method": "GET",
+                "access-control-request-headers": "Authorization, Content-Type",
+            }
+        )
+
+        assert response.status_code == 200
+        assert response.headers["access-control-allow-origin"] == LOCALHOST_ORIGIN
+        assert response.headers["access-control-allow-credentials"] == "true"
+        assert response.headers["access-control-allow-headers"] == "Authorization, Content-Type"
+        assert "DELETE" in response.headers["access-control-allow-methods"]
+        assert response.headers["access-control-max-age"] == "3600"
+        assert response.headers["vary"] == "Origin"
+
+    def test_preview_deployment_origin(self):
+        response = client.options(
+            "/api/v1/articles/history",
+            headers={"origin": PREVIEW_ORIGIN, "access-control-request-method": "GET"}
+        )
+
+        assert response.status_code == 200
+        assert response.headers["access-control-allow-origin"] == PREVIEW_ORIGIN
+
+    def test_options_without_request_method(self):
+        response = client.options("/api/v1/articles", headers={"origin": LOCALHOST_ORIGIN})
+        assert response.status_code == 200
+
+    @pytest.mark.parametrize("origin", [
+        "https://evil.example.com",
+        "https://evil.daltongorhams-projects.vercel.app",
+        PREVIEW_ORIGIN + ".evil.com",
+    ])
+    def test_disallowed_origin(self, origin):
+        response = client.options(
+            "/api/v1/articles",
+            headers={"origin": origin, "access-control-request-method": "GET"}
+        )
+
+        assert response.status_code == 400
+        assert "access-control-allow-origin" not in response.headers
+
+    def test_disallowed_method(self):
+        test_client, _ = make_client(allow_methods=["GET"])
+        response = test_client.options(
+            "/items",
+            headers={"origin": LOCALHOST_ORIGIN, "access-control-request-method": "DELETE"}
+        )
+
+        assert response.status_code == 400
+
+    def test_preflight_never_reaches_routes(self):
+        test_client, test_app = make_client()
+        response = test_client.options(
+            "/items",
+            headers={"origin": LOCALHOST_ORIGIN, "access-control-request-method": "GET"}
+        )
+
+        assert response.status_code == 200
+        assert test_app.state.calls == 0
+
+
+class TestSimpleRequests:
+
+    def test_allowed_origin_gets_cors_headers(self):
+        test_client, _ = make_client()
+        response = test_client.get("/items", headers={"origin": LOCALHOST_ORIGIN})
+
+        assert response.status_code == 200
+        assert response.headers["access-control-allow-origin"] == LOCALHOST_ORIGIN
+        assert response.headers["access-control-allow-credentials"] == "true"
+        assert response.headers["access-control-expose-headers"] == "X-Total-Count"
+        assert "access-control-allow-methods" not in response.headers
+
+    def test_disallowed_origin_gets_no_cors_headers(self):
+        test_client, test_app = make_client()
+        response = test_client.get("/items", headers={"origin": "https://evil.example.com"})
+
+        assert response.status_code == 200
+        assert "access-control-allow-origin" not in response.headers
+        assert test_app.state.calls == 1
+
+    def test_request_without_origin_is_untouched(self):
+        test_client, _ = make_client()
+        response = test_client.get("/items")
+
+        assert response.status_code == 200
+        assert not any(name.startswith("access-control") for name in response.headers)
+
+    def test_app_exposes_pagination_headers(self):
+        response = client.get("/healthz", headers={"origin": LOCALHOST_ORIGIN})
+
+        assert response.headers["access-control-allow-origin"] == LOCALHOST_ORIGIN
+        assert response.headers["access-control-expose-headers"] == "X-Total-Count, X-Next-Cursor"
+
+
+class TestOriginMatching:
+
+    def test_regex_decision_is_cached(self):
+        middleware = CORSMiddleware(None, allow_origin_regex=r"https://preview-[a-z0-9]+\.example\.com")
+        origin = b"https://preview-1.example.com"
+
+        with patch.object(middleware, 'allow_origin_regex', wraps=middleware.allow_origin_regex) as mock_regex:
+            assert middleware.is_allowed_origin(origin)
+            assert middleware.is_allowed_origin(origin)
+            assert not middleware.is_allowed_origin(b"https://other.example.com")
+            assert not middleware.is_allowed_origin(b"https://other.example.com")
+
+        assert mock_regex.fullmatch.call_count == 2
+
+    def test_exact_origins_skip_the_regex(self):
+        middleware = CORSMiddleware(None, allow_origins=[LOCALHOST_ORIGIN], allow_origin_regex=r"nothing")
+
+        assert middleware.is_allowed_origin(LOCALHOST_ORIGIN.encode())
+        assert len(middleware._origin_cache) == 0
+
+    def test_origin_cache_is_bounded(self):
+        middleware = CORSMiddleware(None, allow_origin_regex=r"https://.*", origin_cache_size=4)
+        for i in range(10):
+            middleware.is_allowed_origin(f"https://site{i}.example.com".encode())
+
+        assert len(middleware._origin_cache) == 4
@@ -0,0 +1,70 @@
+import os
+import threading
+import pytest
+from unittest.mock import patch
+from src.lib import executors
+
+
+def current_thread_name():
+    return threading.current_thread().name
+
+
+class TestExecutors:
+    
+    @pytest.mark.asyncio
+    async def test_run_io_uses_worker_thread(self):
+        thread_name = await executors.run_io(current_thread_name)
+        assert thread_name.startswith("io-worker")
+    
+    @pytest.mark.asyncio
+    async def test_run_io_passes_arguments(self):
+        result = await executors.run_io(sorted, [3, 1, 2], reverse=True)
+        assert result == [3, 2, 1]
+    
+    @pytest.mark.asyncio
+    async def test_run_cpu_without_process_pool_stays_off_loop(self):
+        with patch.object(executors.settings, 'CPU_POOL_SIZE', 0):
+            thread_name = await executors.run_cpu(current_thread_name)
+        assert thread_name.startswith("io-worker")
+    
+    def test_call_cpu_without_process_pool_runs_inline(self):
+        with patch.object(executors.settings, 'CPU_POOL_SIZE', 0):
+            assert executors.call_cpu(os.getpid) == os.getpid()
+    
+    def test_call_cpu_uses_process_pool(self):
+        with patch.object(executors.settings, 'CPU_POOL_SIZE', 1):
+            try:
+                assert executors.call_cpu(os.getpid) != os.getpid()
+            finally:
+                executors.shutdown()
+    
+    def test_submit_cpu_without_process_pool_returns_done_future(self):
+        with patch.object(executors.settings, 'CPU_POOL_SIZE', 0):
+            future = executors.submit_cpu(os.getpid)
+            failed = executors.submit_cpu(int, "not a number")
+        assert future.done() and future.result() == os.getpid()
+        with pytest.raises(ValueError):
+            failed.result()
+    
+    def test_submit_cpu_uses_process_pool(self):
+        with patch.object(executors.settings, 'CPU_POOL_SIZE', 1):
+            try:
+                assert executors.submit_cpu(os.getpid).result(timeout=30) != os.getpid()
+            finally:
+                executors.shutdown()
+    
+    def test_shadow_pool_is_separate_from_cpu_pool(self):
+        with patch.object(executors.settings, 'CPU_POOL_SIZE', 1), \
+                patch.object(executors.settings, 'SHADOW_MODEL_VERSION', "v2"), \
+                patch.object(executors.settings, 'SHADOW_POOL_SIZE', 1):
+            try:
+                shadow_pid = executors.call_shadow(os.getpid)
+                assert shadow_pid != os.getpid()
+                assert shadow_pid != executors.call_cpu(os.getpid)
+            finally:
+                executors.shutdown()
+    
+    def test_no_shadow_pool_without_shadow_model(self):
+        with patch.object(executors.settings, 'SHADOW_MODEL_VERSION', None):
+            assert executors.get_shadow_executor() is None
+            assert executors.call_shadow(os.getpid) == os.getpid()
@@ -0,0 +1,119 @@
+import pickle
+import warnings
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+from src.lib.features import SortedVocabulary, TfidfFeatureExtractor
+from src.repository.model_repository import MODEL_DIR, get_vectorizer
+
+
+@pytest.fixture(scope="module")
+def vectorizer():
+    with warnings.catch_warnings():
+        # Pickled with an older scikit-learn
+        warnings.simplefilter("ignore")
+        with open(f"{MODEL_DIR}/vectorizer.pkl", "rb") as f:
+            return pickle.load(f)
+
+
+@pytest.fixture(scope="module")
+def texts(vectorizer):
+    rng = np.random.default_rng(0)
+    words = list(vectorizer.vocabulary_) + ["the", "and", "a", "I", "Über", "naïve", "2024", "foo_bar", "x"]
+    texts = []
+    for length in [0, 1, 5, 200, 3000]:
+        tokens = rng.choice(words, size=length)
+        punctuation = rng.choice(["", "", ",", ".", "'s", "!\n"], size=length)
+        texts.append(" ".join(
+            (token.upper() if i % 7 == 0 else token) + mark
+            for i, (token, mark) in enumerate(zip(tokens, punctuation))
+        ))
+    texts.append("Breaking: Officials CONFIRM the report, sources say... (AP) — it's 100% true?!")
+    texts.append("only unknownzzz tokens here")
+    return texts
+
+
+def assert_same_features(expected, actual):
+    assert actual.shape == expected.shape
+    assert actual.dtype == expected.dtype
+    np.testing.assert_array_equal(actual.indptr, expected.indptr)
+    np.testing.assert_array_equal(actual.indices, expected.indices)
+    np.testing.assert_allclose(actual.data, expected.data, rtol=1e-12, atol=0)
+
+
+class TestTfidfFeatureExtractor:
+
+    def test_matches_pickled_vectorizer(self, vectorizer, texts):
+        extractor = TfidfFeatureExtractor.from_vectorizer(vectorizer)
+        assert_same_features(vectorizer.transform(texts), extractor.transform(texts))
+
+    def test_rows_do_not_depend_on_batch(self, vectorizer, texts):
+        extractor = TfidfFeatureExtractor.from_vectorizer(vectorizer)
+        batch = extractor.transform(texts)
+
+        for i, text in enumerate(texts):
+            assert_same_features(batch[i], extractor.transform([text]))
+
+    def test_empty_batch(self, vectorizer):
+        extractor = TfidfFeatureExtractor.from_vectorizer(vectorizer)
+        assert extractor.transform([]).shape == (0, len(vectorizer.vocabulary_))
+
+    def test_rejects_single_string(self, vectorizer):
+        with pytest.raises(ValueError):
+            TfidfFeatureExtractor.from_vectorizer(vectorizer).transform("one text")
+
+    @pytest.mark.parametrize("options", [
+        {"norm": "l1"},
+        {"norm": None, "sublinear_tf": True},
+        {"use_idf": False, "lowercase": False},
+        {"token_pattern": r"(?u)\b\w+\b", "smooth_idf": False},
+        {"dtype": np.float32},
+    ])
+    def test_matches_other_settings(self, texts, options):
+        vectorizer = TfidfVectorizer(**options).fit(texts)
+        extractor = TfidfFeatureExtractor.from_vectorizer(vectorizer)
+        expected = vectorizer.transform(texts)
+        actual = extractor.transform(texts)
+
+        assert actual.dtype == expected.dtype
+        np.testing.assert_allclose(actual.toarray(), expected.toarray(), rtol=1e-6)
+
+    @pytest.mark.parametrize("options", [
+        {"ngram_range": (1, 2)},
+        {"analyzer": "char"},
+        {"strip_accents": "unicode"},
+        {"binary": True},
+    ])
+    def test_rejects_unsupported_settings(self, texts, options):
+        vectorizer = TfidfVectorizer(**options).fit(texts)
+        with pytest.raises(ValueError) as exc_info:
+            TfidfFeatureExtractor.from_vectorizer(vectorizer)
+        assert next(iter(options)) in str(exc_info.value)
+
+
+class TestSortedVocabulary:
+
+    def test_matches_dict_vocabulary(self, vectorizer, texts):
+        with_dict = TfidfFeatureExtractor.from_vectorizer(vectorizer)
+        with_arrays = TfidfFeatureExtractor(SortedVocabulary.from_dict(vectorizer.vocabulary_), vectorizer.idf_)
+        assert_same_features(with_dict.transform(texts), with_arrays.transform(texts))
+
+    def test_lookup(self):
+        vocabulary = SortedVocabulary.from_dict({"news": 2, "fake": 0, "report": 1})
+        columns = vocabulary.lookup(["report", "zzz", "fake", "aaa", "news", "newsroom", "new"])
+        assert columns.tolist() == [1, -1, 0, -1, 2, -1, -1]
+
+    def test_long_tokens_are_not_truncated_into_matches(self):
+        vocabulary = SortedVocabulary.from_dict({"news": 0, "report": 1})
+        assert vocabulary.lookup(["reporter", "reports" * 10]).tolist() == [-1, -1]
+
+    def test_empty(self):
+        assert SortedVocabulary.from_dict({"news": 0}).lookup([]).tolist() == []
+
+
+class TestGetVectorizer:
+
+    def test_returns_extractor(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            assert isinstance(get_vectorizer(), TfidfFeatureExtractor)
@@ -15,3 +15,21 @@ def test_health_check():
     assert data["status"] == "healthy"
     assert "service" in data
     assert "version" in data
+
+def test_model_health():
+    """Test that the model health endpoint reports load stats"""
+    response = client.get("/healthz/model")
+    
+    assert response.status_code == 200
+    data = response.json()
+    assert "loaded" in data
+    assert "current_resident_bytes" in data
+
+def test_inference_health():
+    """Test that the inference endpoint reports scheduler metrics"""
+    response = client.get("/healthz/inference")
+    
+    assert response.status_code == 200
+    data = response.json()
+    assert "queue_depth" in data
+    assert "batch_size_histogram" in data
@@ -0,0 +1,123 @@
+import threading
+import pytest
+from concurrent.futures import Future
+from src.services.inference_scheduler import InferenceScheduler
+
+
+class TestInferenceScheduler:
+    
+    def test_coalesces_concurrent_submissions(self):
+        calls = []
+        
+        def predict_batch(items):
+            calls.append(list(items))
+            return [item * 2 for item in items]
+        
+        scheduler = InferenceScheduler(predict_batch, max_batch_size=8, max_wait_ms=200)
+        try:
+            futures = [scheduler.submit(i) for i in range(8)]
+            results = [future.result(timeout=5) for future in futures]
+        finally:
+            scheduler.shutdown()
+        
+        assert results == [i * 2 for i in range(8)]
+        assert len(calls) == 1
+        assert scheduler.stats()["largest_batch_size"] == 8
+    
+    def test_respects_max_batch_size(self):
+        scheduler = InferenceScheduler(lambda items: list(items), max_batch_size=3, max_wait_ms=200)
+        try:
+            futures = [scheduler.submit(i) for i in range(7)]
+            assert [future.result(timeout=5) for future in futures] == list(range(7))
+        finally:
+            scheduler.shutdown()
+        
+        stats = scheduler.stats()
+        assert stats["items"] == 7
+        assert stats["largest_batch_size"] <= 3
+        assert stats["batches"] >= 3
+    
+    def test_predict_from_many_threads(self):
+        scheduler = InferenceScheduler(lambda items: [item + 1 for item in items], max_batch_size=32, max_wait_ms=20)
+        results = {}
+        
+        def worker(i):
+            results[i] = scheduler.predict(i, timeout=5)
+        
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        scheduler.shutdown()
+        
+        assert results == {i: i + 1 for i in range(20)}
+        assert scheduler.stats()["batches"] < 20
+    
+    def test_errors_reach_every_caller(self):
+        def predict_batch(items):
+            raise RuntimeError("model failure")
+        
+        scheduler = InferenceScheduler(predict_batch, max_batch_size=4, max_wait_ms=50)
+        try:
+            futures = [scheduler.submit(i) for i in range(2)]
+            for future in futures:
+                with pytest.raises(RuntimeError):
+                    future.result(timeout=5)
+        finally:
+            scheduler.shutdown()
+    
+    def test_disabled_does_not_block_the_caller(self):
+        release = threading.Event()
+        threads = []
+
+        def predict_batch(items):
+            threads.append(threading.current_thread())
+            release.wait(5)
+            return ["ok" for _ in items]
+
+        scheduler = InferenceScheduler(predict_batch, max_batch_size=32, max_wait_ms=0)
+        assert scheduler.enabled is False
+
+        future = scheduler.submit("text")
+        assert not future.done()
+        release.set()
+
+        assert future.result(timeout=5) == "ok"
+        assert threads[0] is not threading.current_thread()
+        assert scheduler.stats()["batches"] == 1
+        assert scheduler.stats()["queue_depth"] == 0
+
+    def test_keeps_max_in_flight_batches_running(self):
+        pending = []
+        two_started = threading.Event()
+
+        def predict_batch(items):
+            # Hand the batch off like the process pool does, without waiting for it
+            future = Future()
+            pending.append((items, future))
+            if len(pending) == 2:
+                two_started.set()
+            return future
+
+        def resolve_started():
+            for items, future in list(pending):
+                if not future.done():
+                    future.set_result([item * 10 for item in items])
+
+        scheduler = InferenceScheduler(predict_batch, max_batch_size=2, max_wait_ms=1, max_in_flight=2)
+        try:
+            futures = [scheduler.submit(i) for i in range(6)]
+            assert two_started.wait(5)
+            # Both slots are busy, so nothing else starts until a batch finishes
+            assert len(pending) == 2
+            assert not any(future.done() for future in futures)
+
+            while not all(future.done() for future in futures):
+                resolve_started()
+            assert [future.result(timeout=5) for future in futures] == [i * 10 for i in range(6)]
+        finally:
+            resolve_started()
+            scheduler.shutdown()
+
+        assert scheduler.stats()["items"] == 6
@@ -0,0 +1,271 @@
+import asyncio
+import json
+import threading
+import time
+import httpx
+import jwt as pyjwt
+import pytest
+from unittest.mock import patch
+from cryptography.hazmat.primitives.asymmetric import ec, rsa
+from jwt.algorithms import ECAlgorithm, RSAAlgorithm
+from src.config import settings
+from src.middleware.jwt_backends import (
+    JoseVerifier,
+    JWKSKeySet,
+    PyJWTVerifier,
+    UnknownSigningKey,
+    create_verifier,
+)
+
+
+SECRET = "test-secret-for-hs256-tokens-0123456789"
+AUDIENCE = "authenticated"
+
+
+def claims(**extra):
+    return {"sub": "user123", "aud": AUDIENCE, "exp": int(time.time()) + 3600, **extra}
+
+
+class SigningKey:
+    """A private key plus its public JWK, like one entry of Supabase's JWKS"""
+
+    def __init__(self, kid: str, algorithm: str):
+        self.kid = kid
+        self.algorithm = algorithm
+        if algorithm == "RS256":
+            self.private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+            self.jwk = RSAAlgorithm.to_jwk(self.private_key.public_key(), as_dict=True)
+        else:
+            self.private_key = ec.generate_private_key(ec.SECP256R1())
+            self.jwk = ECAlgorithm.to_jwk(self.private_key.public_key(), as_dict=True)
+        self.jwk.update({"kid": kid, "alg": algorithm, "use": "sig"})
+
+    def sign(self, payload: dict) -> str:
+        return pyjwt.encode(payload, self.private_key, algorithm=self.algorithm, headers={"kid": self.kid})
+
+
+@pytest.fixture(scope="module")
+def rsa_key():
+    return SigningKey("rsa-1", "RS256")
+
+
+@pytest.fixture(scope="module")
+def ec_key():
+    return SigningKey("ec-1", "ES256")
+
+
+def jwks_file(tmp_path, *keys):
+    path = tmp_path / "jwks.json"
+    path.write_text(json.dumps({"keys": [key.jwk for key in keys]}))
+    return str(path)
+
+
+class JWKSServer:
+    """MockTransport serving whatever keys are currently published"""
+
+    def __init__(self, *keys):
+        self.keys = list(keys)
+        self.requests = 0
+
+    def handler(self, request):
+        self.requests += 1
+        return httpx.Response(200, json={"keys": [key.jwk for key in self.keys]})
+
+    def key_set(self, min_refresh_seconds=60):
+        return JWKSKeySet(
+            url="https://project.supabase.co/auth/v1/.well-known/jwks.json",
+            transport=httpx.MockTransport(self.handler),
+            min_refresh_seconds=min_refresh_seconds,
+        )
+
+
+class TestPyJWTVerifier:
+
+    def test_hs256_with_shared_secret(self):
+        verifier = PyJWTVerifier(AUDIENCE, secret=SECRET)
+        token = pyjwt.encode(claims(), SECRET, algorithm="HS256")
+        assert verifier.verify(token)["sub"] == "user123"
+
+    def test_rs256_and_es256_from_jwks_file(self, tmp_path, rsa_key, ec_key):
+        verifier = PyJWTVerifier(AUDIENCE, jwks=JWKSKeySet(path=jwks_file(tmp_path, rsa_key, ec_key)))
+
+        assert verifier.verify(rsa_key.sign(claims()))["sub"] == "user123"
+        assert verifier.verify(ec_key.sign(claims(sub="user456")))["sub"] == "user456"
+
+    def test_rejects_wrong_audience(self, tmp_path, ec_key):
+        verifier = PyJWTVerifier(AUDIENCE, jwks=JWKSKeySet(path=jwks_file(tmp_path, ec_key)))
+        with pytest.raises(ValueError) as exc_info:
+            verifier.verify(ec_key.sign(claims(aud="someone-else")))
+        assert "Invalid token" in str(exc_info.value)
+
+    def test_rejects_expired(self, tmp_path, ec_key):
+        verifier = PyJWTVerifier(AUDIENCE, jwks=JWKSKeySet(path=jwks_file(tmp_path, ec_key)))
+        with pytest.raises(ValueError):
+            verifier.verify(ec_key.sign(claims(exp=int(time.time()) - 10)))
+
+    def test_rejects_signature_from_unpublished_key(self, tmp_path, ec_key):
+        impostor = SigningKey("ec-1", "ES256")
+        verifier = PyJWTVerifier(AUDIENCE, jwks=JWKSKeySet(path=jwks_file(tmp_path, ec_key)))
+        with pytest.raises(ValueError):
+            verifier.verify(impostor.sign(claims()))
+
+    def test_rejects_hs256_when_only_jwks_is_configured(self, tmp_path, rsa_key):
+        verifier = PyJWTVerifier(AUDIENCE, jwks=JWKSKeySet(path=jwks_file(tmp_path, rsa_key)))
+        token = pyjwt.encode(claims(), SECRET, algorithm="HS256", headers={"kid": "rsa-1"})
+        with pytest.raises(ValueError) as exc_info:
+            verifier.verify(token)
+        assert "not allowed" in str(exc_info.value)
+
+    def test_rejects_algorithm_key_mismatch(self, tmp_path, rsa_key, ec_key):
+        # An ES256 token that names the RSA key
+        mislabeled = pyjwt.encode(claims(), ec_key.private_key, algorithm="ES256", headers={"kid": "rsa-1"})
+        verifier = PyJWTVerifier(AUDIENCE, jwks=JWKSKeySet(path=jwks_file(tmp_path, rsa_key, ec_key)))
+        with pytest.raises(ValueError) as exc_info:
+            verifier.verify(mislabeled)
+        assert "not a ES256 key" in str(exc_info.value)
+
+    def test_rejects_unsigned_token(self):
+        verifier = PyJWTVerifier(AUDIENCE, secret=SECRET)
+        token = pyjwt.encode(claims(), None, algorithm="none")
+        with pytest.raises(ValueError):
+            verifier.verify(token)
+
+    def test_rejects_garbage(self):
+        with pytest.raises(ValueError):
+            PyJWTVerifier(AUDIENCE, secret=SECRET).verify("not-a-jwt")
+
+
+class TestJWKSKeySet:
+
+    def test_fetched_once(self, ec_key):
+        server = JWKSServer(ec_key)
+        verifier = PyJWTVerifier(AUDIENCE, jwks=server.key_set())
+        verifier.load_keys()
+
+        for _ in range(5):
+            verifier.verify(ec_key.sign(claims()))
+
+        assert server.requests == 1
+
+    def test_verify_never_fetches(self, ec_key):
+        server = JWKSServer(ec_key)
+        verifier = PyJWTVerifier(AUDIENCE, jwks=server.key_set(min_refresh_seconds=0))
+
+        with pytest.raises(UnknownSigningKey):
+            verifier.verify(ec_key.sign(claims()))
+        assert server.requests == 0
+
+    @pytest.mark.asyncio
+    async def test_refreshes_on_unknown_kid(self, rsa_key, ec_key):
+        server = JWKSServer(ec_key)
+        verifier = PyJWTVerifier(AUDIENCE, jwks=server.key_set(min_refresh_seconds=0))
+        verifier.load_keys()
+        verifier.verify(ec_key.sign(claims()))
+
+        # Key rotation: a new key is published and tokens start using it
+        server.keys.append(rsa_key)
+        with pytest.raises(UnknownSigningKey):
+            verifier.verify(rsa_key.sign(claims()))
+        await verifier.refresh_keys()
+        assert verifier.verify(rsa_key.sign(claims()))["sub"] == "user123"
+        assert server.requests == 2
+        assert verifier.stats()["jwks"]["keys"] == ["ec-1", "rsa-1"]
+
+    @pytest.mark.asyncio
+    async def test_refresh_runs_off_the_event_loop(self, ec_key):
+        threads = []
+        server = JWKSServer(ec_key)
+        handler = server.handler
+
+        def recording_handler(request):
+            threads.append(threading.current_thread())
+            return handler(request)
+
+        key_set = JWKSKeySet(url="https://example.com/jwks.json", transport=httpx.MockTransport(recording_handler))
+        await key_set.refresh_async()
+
+        assert threads and threads[0] is not threading.main_thread()
+        assert key_set.get_key("ec-1") is not None
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_share_one_refresh(self, ec_key):
+        server = JWKSServer(ec_key)
+        handler = server.handler
+        release = threading.Event()
+
+        def slow_handler(request):
+            release.wait(timeout=5)
+            return handler(request)
+
+        key_set = JWKSKeySet(
+            url="https://example.com/jwks.json",
+            transport=httpx.MockTransport(slow_handler),
+            min_refresh_seconds=0,
+        )
+        refreshes = [asyncio.ensure_future(key_set.refresh_async()) for _ in range(10)]
+        await asyncio.sleep(0.05)
+        release.set()
+        await asyncio.gather(*refreshes)
+
+        assert server.requests == 1
+        assert key_set.get_key("ec-1") is not None
+
+    @pytest.mark.asyncio
+    async def test_unknown_kid_refresh_is_rate_limited(self, ec_key):
+        server = JWKSServer(ec_key)
+        key_set = server.key_set(min_refresh_seconds=60)
+        key_set.refresh()
+
+        for _ in range(10):
+            await key_set.refresh_async()
+            with pytest.raises(ValueError) as exc_info:
+                key_set.get_key("made-up")
+            assert "unknown signing key" in str(exc_info.value)
+
+        assert server.requests == 1
+
+    @pytest.mark.asyncio
+    async def test_fetch_failure_keeps_existing_keys(self, ec_key):
+        server = JWKSServer(ec_key)
+        key_set = server.key_set(min_refresh_seconds=0)
+        key_set.refresh()
+
+        server.handler = lambda request: httpx.Response(503)
+        key_set._transport = httpx.MockTransport(server.handler)
+        await key_set.refresh_async()
+        with pytest.raises(ValueError):
+            key_set.get_key("other")
+
+        assert key_set.get_key("ec-1") is not None
+        assert key_set.stats()["fetch_errors"] == 1
+
+    def test_requires_a_source(self):
+        with pytest.raises(ValueError):
+            JWKSKeySet()
+
+
+class TestCreateVerifier:
+
+    def test_jose_backend(self):
+        with patch.object(settings, 'JWT_BACKEND', "jose"), patch.object(settings, 'SUPABASE_JWT_SECRET', SECRET):
+            verifier = create_verifier(AUDIENCE)
+
+        assert isinstance(verifier, JoseVerifier)
+        token = pyjwt.encode(claims(), SECRET, algorithm="HS256")
+        assert verifier.verify(token)["sub"] == "user123"
+
+    def test_pyjwt_backend_with_jwks_file(self, tmp_path, ec_key):
+        with patch.object(settings, 'JWT_BACKEND', "pyjwt"), \
+                patch.object(settings, 'SUPABASE_JWT_SECRET', SECRET), \
+                patch.object(settings, 'JWKS_FILE', jwks_file(tmp_path, ec_key)), \
+                patch.object(settings, 'JWKS_URL', None):
+            verifier = create_verifier(AUDIENCE)
+
+        assert isinstance(verifier, PyJWTVerifier)
+        assert verifier.algorithms == ["HS256", "RS256", "ES256"]
+        assert verifier.verify(ec_key.sign(claims()))["sub"] == "user123"
+
+    def test_unknown_backend(self):
+        with patch.object(settings, 'JWT_BACKEND', "other"):
+            with pytest.raises(ValueError):
+                create_verifier(AUDIENCE)
@@ -0,0 +1,269 @@
+import json
+import pickle
+import subprocess
+import sys
+import warnings
+import numpy as np
+import pytest
+from unittest.mock import Mock, patch
+from sklearn.linear_model import LogisticRegression
+from sklearn.naive_bayes import MultinomialNB
+from sklearn.svm import LinearSVC
+from src.cli import export_model
+from src.config import settings
+from src.lib.features import SortedVocabulary, TfidfFeatureExtractor
+from src.lib.lean_model import LinearClassifier, export_artifacts, load_artifacts, read_meta
+from src.repository.model_repository import MODEL_DIR, ModelRegistry, read_active_version, verify_version
+
+
+@pytest.fixture(scope="module")
+def vectorizer():
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        with open(f"{MODEL_DIR}/vectorizer.pkl", "rb") as f:
+            return pickle.load(f)
+
+
+@pytest.fixture(scope="module")
+def corpus(vectorizer):
+    """Random articles, labelled by which half of the vocabulary they lean on"""
+    rng = np.random.default_rng(1)
+    terms = sorted(vectorizer.vocabulary_)
+    half = len(terms) // 2
+    texts, labels = [], []
+    for i in range(120):
+        label = i % 3
+        pool = terms[:half] if label == 0 else terms[half:] if label == 1 else terms
+        texts.append(" ".join(rng.choice(pool, size=150)))
+        labels.append(label)
+    return texts, np.array(labels)
+
+
+def fit(vectorizer, corpus, model, n_classes=2):
+    texts, labels = corpus
+    keep = labels < n_classes
+    texts = [text for text, kept in zip(texts, keep) if kept]
+    return model.fit(vectorizer.transform(texts), labels[keep]), texts
+
+
+class TestLeanModel:
+
+    @pytest.mark.parametrize("mmap", [True, False])
+    @pytest.mark.parametrize("model, n_classes", [
+        (LogisticRegression(max_iter=500), 2),
+        (LogisticRegression(max_iter=500), 3),
+        (MultinomialNB(), 2),
+        (MultinomialNB(), 3),
+    ])
+    def test_matches_sklearn(self, tmp_path, vectorizer, corpus, model, n_classes, mmap):
+        model, texts = fit(vectorizer, corpus, model, n_classes)
+        export_artifacts(vectorizer, model, str(tmp_path))
+        lean_vectorizer, lean_model = load_artifacts(str(tmp_path), mmap=mmap)
+
+        texts = texts + ["", "Breaking news: officials confirm the report"]
+        expected = model.predict_proba(vectorizer.transform(texts))
+        actual = lean_model.predict_proba(lean_vectorizer.transform(texts))
+
+        np.testing.assert_allclose(actual, expected, rtol=1e-9, atol=1e-12)
+        np.testing.assert_array_equal(lean_model.classes_, model.classes_)
+
+    @pytest.mark.parametrize("mmap", [True, False])
+    def test_multiclass_liblinear_matches_sklearn(self, tmp_path, vectorizer, corpus, mmap):
+        try:
+            model, texts = fit(vectorizer, corpus, LogisticRegression(solver="liblinear"), 3)
+            X = vectorizer.transform(texts)
+            expected = model.predict_proba(X)
+        except ValueError:
+            # Newer sklearn refuses to fit these, but older pickles still hold them.
+            # Their predict_proba was the normalized one-vs-rest sigmoids below
+            model, texts = fit(vectorizer, corpus, LogisticRegression(max_iter=500), 3)
+            model.solver = "liblinear"
+            X = vectorizer.transform(texts)
+            expected = model._predict_proba_lr(X)
+        meta = export_artifacts(vectorizer, model, str(tmp_path))
+        lean_vectorizer, lean_model = load_artifacts(str(tmp_path), mmap=mmap)
+
+        assert meta["classifier"] == "ovr"
+        actual = lean_model.predict_proba(lean_vectorizer.transform(texts))
+        np.testing.assert_allclose(actual, expected, rtol=1e-9, atol=1e-12)
+
+    def test_artifact_layout(self, tmp_path, vectorizer, corpus):
+        model, _ = fit(vectorizer, corpus, LogisticRegression(max_iter=500))
+        meta = export_artifacts(vectorizer, model, str(tmp_path))
+
+        assert read_meta(str(tmp_path)) == meta
+        assert meta["classifier"] == "logistic"
+        assert meta["n_features"] == len(vectorizer.vocabulary_)
+        assert sorted(path.name for path in tmp_path.iterdir()) == [
+            "classes.npy", "coef.npy", "idf.npy", "intercept.npy", "meta.json",
+            "vocabulary_columns.npy", "vocabulary_terms.npy",
+        ]
+
+        # Plain arrays only: every file loads without pickle
+        for name in meta["arrays"]:
+            np.load(tmp_path / f"{name}.npy", allow_pickle=False)
+
+    def test_arrays_are_memory_mapped(self, tmp_path, vectorizer, corpus):
+        model, _ = fit(vectorizer, corpus, LogisticRegression(max_iter=500))
+        export_artifacts(vectorizer, model, str(tmp_path))
+
+        lean_vectorizer, lean_model = load_artifacts(str(tmp_path))
+        assert isinstance(lean_vectorizer.vocabulary, SortedVocabulary)
+        for array in (lean_vectorizer.vocabulary.terms, lean_vectorizer.idf, lean_model.coef):
+            assert isinstance(array, np.memmap)
+            assert not array.flags.writeable
+
+        in_memory, _ = load_artifacts(str(tmp_path), mmap=False)
+        assert isinstance(in_memory.vocabulary, dict)
+
+    def test_string_labels(self, tmp_path, vectorizer, corpus):
+        texts, labels = corpus
+        names = np.array(["real", "fake", "satire"], dtype=object)[labels]
+        model = LogisticRegression(max_iter=500).fit(vectorizer.transform(texts), names)
+        export_artifacts(vectorizer, model, str(tmp_path))
+
+        _, lean_model = load_artifacts(str(tmp_path))
+        assert lean_model.classes_.tolist() == ["fake", "real", "satire"]
+
+    def test_rejects_unsupported_model(self, tmp_path, vectorizer, corpus):
+        model, _ = fit(vectorizer, corpus, LinearSVC())
+        with pytest.raises(ValueError) as exc_info:
+            export_artifacts(vectorizer, model, str(tmp_path))
+        assert "LinearSVC" in str(exc_info.value)
+        assert read_meta(str(tmp_path)) is None
+
+    def test_rejects_unknown_format_version(self, tmp_path, vectorizer, corpus):
+        model, _ = fit(vectorizer, corpus, LogisticRegression(max_iter=500))
+        export_artifacts(vectorizer, model, str(tmp_path))
+        meta = json.loads((tmp_path / "meta.json").read_text())
+        meta["format_version"] = 99
+        (tmp_path / "meta.json").write_text(json.dumps(meta))
+
+        with pytest.raises(ValueError):
+            load_artifacts(str(tmp_path))
+
+    def test_extreme_scores_do_not_overflow(self):
+        model = LinearClassifier("logistic", np.array([[1.0]]), np.array([0.0]), np.array([0, 1]))
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            probabilities = model.predict_proba(np.array([[-1000.0], [1000.0]]))
+        np.testing.assert_array_equal(probabilities, [[1.0, 0.0], [0.0, 1.0]])
+
+
+class TestExportCommand:
+
+    def test_exports_pickles(self, tmp_path, vectorizer, corpus, capsys):
+        model, _ = fit(vectorizer, corpus, LogisticRegression(max_iter=500))
+        model_dir, out_dir = tmp_path / "model", tmp_path / "lean"
+        model_dir.mkdir()
+        (model_dir / "vectorizer.pkl").write_bytes(pickle.dumps(vectorizer))
+        (model_dir / "model.pkl").write_bytes(pickle.dumps(model))
+
+        export_model.main(["--model-dir", str(model_dir), "--out", str(out_dir)])
+
+        assert read_meta(str(out_dir))["classifier"] == "logistic"
+        assert "Exported logistic model" in capsys.readouterr().out
+
+    def test_exports_version(self, tmp_path, vectorizer, corpus, capsys):
+        model, _ = fit(vectorizer, corpus, LogisticRegression(max_iter=500))
+        model_dir, versions_dir = tmp_path / "model", tmp_path / "versions"
+        model_dir.mkdir()
+        (model_dir / "vectorizer.pkl").write_bytes(pickle.dumps(vectorizer))
+        (model_dir / "model.pkl").write_bytes(pickle.dumps(model))
+
+        with patch.object(settings, 'MODEL_VERSIONS_DIR', str(versions_dir)):
+            export_model.main(["--model-dir", str(model_dir), "--version", "v2", "--activate"])
+            manifest = verify_version("v2")
+            active = read_active_version()
+
+        assert manifest["format"] == "lean"
+        assert active == "v2"
+        assert "Activated model version v2" in capsys.readouterr().out
+
+
+class TestModelRegistryFormats:
+
+    def test_auto_prefers_lean_artifacts(self, tmp_path, vectorizer, corpus):
+        model, _ = fit(vectorizer, corpus, LogisticRegression(max_iter=500))
+        export_artifacts(vectorizer, model, str(tmp_path))
+        registry = ModelRegistry()
+
+        with patch.object(settings, 'MODEL_FORMAT', "auto"), \
+                patch.object(settings, 'MODEL_ARTIFACT_DIR', str(tmp_path)), \
+                patch('src.repository.model_repository.get_model') as get_model:
+            stats = registry.load()
+            lean_vectorizer, lean_model = registry.get()
+
+        get_model.assert_not_called()
+        assert stats["format"] == "lean"
+        assert isinstance(lean_vectorizer, TfidfFeatureExtractor)
+        assert isinstance(lean_model, LinearClassifier)
+
+    def test_auto_falls_back_to_pickles(self, tmp_path):
+        registry = ModelRegistry()
+
+        with patch.object(settings, 'MODEL_FORMAT', "auto"), \
+                patch.object(settings, 'MODEL_ARTIFACT_DIR', str(tmp_path)), \
+                patch('src.repository.model_repository.get_vectorizer', return_value=Mock()), \
+                patch('src.repository.model_repository.get_model', return_value=Mock()):
+            assert registry.load()["format"] == "pickle"
+
+    def test_reports_mapped_file_memory(self, tmp_path, vectorizer, corpus):
+        model, _ = fit(vectorizer, corpus, LogisticRegression(max_iter=500))
+        export_artifacts(vectorizer, model, str(tmp_path))
+        registry = ModelRegistry()
+
+        with patch.object(settings, 'MODEL_FORMAT', "lean"), \
+                patch.object(settings, 'MODEL_MMAP', True), \
+                patch.object(settings, 'MODEL_ARTIFACT_DIR', str(tmp_path)):
+            registry.load()
+            lean_vectorizer, _ = registry.get()
+            lean_vectorizer.transform(["touch the mapped pages"])
+            stats = registry.stats()
+
+        assert stats["mmap"] is True
+        memory = stats["memory"]
+        if memory is None:
+            pytest.skip("/proc/self/smaps_rollup is not available")
+        assert memory["process"]["rss_bytes"] > 0
+        assert memory["process"]["unique_bytes"] + memory["process"]["shared_bytes"] == memory["process"]["rss_bytes"]
+        # Mapped artifact pages are clean file pages, never private copies
+        mapped = memory["mapped_files"]
+        assert mapped["rss_bytes"] > 0
+        assert mapped["unique_bytes"] + mapped["shared_bytes"] == mapped["rss_bytes"]
+
+    def test_workers_share_mapped_pages(self, tmp_path, vectorizer, corpus):
+        model, _ = fit(vectorizer, corpus, LogisticRegression(max_iter=500))
+        export_artifacts(vectorizer, model, str(tmp_path))
+        lean_vectorizer, lean_model = load_artifacts(str(tmp_path))
+        # Fault every page in, as a worker that has scored articles would have
+        for array in (lean_vectorizer.vocabulary.terms, lean_vectorizer.idf, lean_model.coef):
+            array.view(np.uint8).sum()
+
+        # A second worker maps the same files while this one still holds them
+        script = (
+            "import json, os\n"
+            "from src.config import settings\n"
+            "from src.repository.model_repository import ModelRegistry\n"
+            f"settings.MODEL_FORMAT, settings.MODEL_ARTIFACT_DIR = 'lean', {str(tmp_path)!r}\n"
+            "registry = ModelRegistry()\n"
+            "vectorizer, model = registry.get()\n"
+            "for array in (vectorizer.vocabulary.terms, vectorizer.idf, model.coef):\n"
+            "    array.view('uint8').sum()\n"
+            "print(json.dumps(registry.stats()['memory']))\n"
+        )
+        output = subprocess.run([sys.executable, "-c", script], check=True, capture_output=True, text=True).stdout
+        memory = json.loads(output.strip().splitlines()[-1])
+        if memory is None:
+            pytest.skip("/proc/self/smaps is not available")
+
+        mapped = memory["mapped_files"]
+        assert mapped["shared_bytes"] > 0
+        assert mapped["unique_bytes"] == 0
+        assert mapped["pss_bytes"] < mapped["rss_bytes"]
+
+    def test_lean_requires_artifacts(self, tmp_path):
+        with patch.object(settings, 'MODEL_FORMAT', "lean"), \
+                patch.object(settings, 'MODEL_ARTIFACT_DIR', str(tmp_path)):
+            with pytest.raises(FileNotFoundError):
+                ModelRegistry().load()
@@ -0,0 +1,404 @@
+"""
+Load tests of the real ASGI app against local stand-ins, so they run in CI
+without the live deployment.
+
+Requests go through the whole middleware stack, auth with signed HS256
+JWTs, the routes, services and repositories. Supabase and article sites
+are replaced at the HTTP layer by httpx.MockTransport handlers with a small
+simulated latency. Each scenario runs three rounds and reports the best
+round's throughput and p50/p99 latency in the benchmark table's extra info.
+It fails when throughput falls or p99 grows by more than LOAD_TEST_MAX_SLOWDOWN (default 2x) against
+tests/load_baselines.json.
+
+Wall-clock timings are too noisy for shared runners, so the timed scenarios
+carry the `load` marker and are left out of the default run and CI
+(`./run_tests.sh --load` runs them). The default run sends every scenario
+once at a small scale and only checks the responses.
+
+Baselines are scaled by a CPU calibration run, so they carry across
+machines. Refresh them after an intended change with
+LOAD_TEST_UPDATE_BASELINES=1 ./run_tests.sh --load.
+"""
+import asyncio
+import json
+import os
+import pickle
+import re
+import statistics
+import time
+import warnings
+from collections import Counter
+from functools import partial
+from itertools import count
+from pathlib import Path
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+import httpx
+import jwt as pyjwt
+import numpy as np
+import pytest
+from unittest.mock import patch
+from sklearn.linear_model import LogisticRegression
+from src.config import settings
+from src.lib import supabase_client
+from src.lib.article_fetcher import ArticleFetcher
+from src.lib.features import TfidfFeatureExtractor
+from src.main import app
+from src.middleware.auth import auth_handler
+from src.middleware.jwt_backends import PyJWTVerifier
+from src.repository.model_repository import MODEL_DIR
+from src.services.article_service import ArticleService
+
+BASELINES_FILE = Path(__file__).with_name("load_baselines.json")
+JWT_SECRET = "load-test-secret-for-hs256-signed-tokens"
+SUPABASE_URL = "https://project.supabase.co"
+USER_ID = "load-test-user"
+HISTORY_SIZE = 1_000
+SUPABASE_LATENCY = 0.001
+SITE_LATENCY = 0.002
+LOAD_ROUNDS = 3
+
+PARAGRAPHS = [
+    "Officials confirmed the report on Tuesday, according to a statement released by the agency.",
+    "The figures were reviewed by independent auditors before publication, the ministry said.",
+    "Lawmakers are expected to debate the proposal next week after a committee hearing.",
+    "Analysts said the decision could affect prices in the coming months across the region.",
+]
+ARTICLE_HTML = (
+    "<html><head><title>Local story</title></head><body><article>"
+    + "".join(f"<p>{paragraph}</p>" for paragraph in PARAGRAPHS * 6)
+    + "</article></body></html>"
+)
+
+
+def make_token(user_id: str = USER_ID, secret: str = JWT_SECRET) -> str:
+    payload = {"sub": user_id, "aud": "authenticated", "role": "authenticated", "exp": int(time.time()) + 3600}
+    return pyjwt.encode(payload, secret, algorithm="HS256")
+
+
+def history_row(index: int):
+    return {
+        "id": index,
+        "created_at": "2025-01-01T00:00:00",
+        "history_index": index,
+        "input_by_user": USER_ID,
+        "article": {
+            "id": index,
+            "url": f"https://news.example.com/archive/{index}",
+            "canonical_url": f"https://news.example.com/archive/{index}",
+            "title": f"Article {index}",
+            "source": "news.example.com",
+            "collected_date": "2025-01-01T00:00:00",
+            "ai_result": [{
+                "id": index,
+                "genre": "Real News",
+                "truthness_label": "Reliable",
+                "truthness_score": 0.9,
+                "related_articles": [],
+                "is_satire": False
+            }]
+        }
+    }
+
+
+class FakeSupabase:
+    """
+    In-memory stand-in for the PostgREST endpoints the repositories call.
+    Each request waits `latency` seconds, like a round trip to the database.
+    """
+
+    def __init__(self, history_size: int = HISTORY_SIZE, latency: float = SUPABASE_LATENCY):
+        self.latency = latency
+        self.history = [history_row(i) for i in range(1, history_size + 1)]
+        self.articles = {row["article"]["canonical_url"]: row["article"] for row in self.history}
+        self.articles_by_id = {row["article"]["id"]: row["article"] for row in self.history}
+        self._ids = count(history_size + 1)
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        path = unquote(urlsplit(str(request.url)).path).removeprefix("/rest/v1/")
+        params = dict(parse_qsl(request.url.query.decode()))
+
+        if path == "Input History" and "article.canonical_url" in params:
+            urls = set(re.findall(r'"((?:[^"\\]|\\.)*)"', params["article.canonical_url"]))
+            rows = [
+                {"article": {"canonical_url": row["article"]["canonical_url"]}}
+                for row in self.history
+                if row["input_by_user"] == params["input_by_user"][3:] and row["article"]["canonical_url"] in urls
+            ]
+            return httpx.Response(200, json=rows[:int(params["limit"])])
+        if path == "Input History":
+            return self._history_page(request, params)
+        if path == "Article" and "canonical_url" in params:
+            article = self.articles.get(params["canonical_url"][3:])
+            rows = [{"id": article["id"], "ai_result": [{"id": article["ai_result"][0]["id"]}]}] if article else []
+            return httpx.Response(200, json=rows)
+        if path == "Article" and "id" in params:
+            article = self.articles_by_id.get(int(params["id"][3:]))
+            if article is None:
+                return httpx.Response(406, json={
+                    "message": "JSON object requested, multiple (or no) rows returned",
+                    "code": "PGRST116", "hint": None, "details": "The result contains 0 rows"
+                })
+            return httpx.Response(200, json=article)
+        if path == "rpc/save_analysis":
+            return httpx.Response(200, json=self._save(json.loads(request.content)))
+        return httpx.Response(404, json={
+            "message": f"No stand-in for {request.method} {path}", "code": "PGRST000", "hint": None, "details": None
+        })
+
+    def _history_page(self, request: httpx.Request, params: dict) -> httpx.Response:
+        rows = [row for row in self.history if row["input_by_user"] == params["input_by_user"][3:]]
+        if "history_index" in params:
+            before = int(params["history_index"][3:])
+            rows = [row for row in rows if row["history_index"] < before]
+        page = sorted(rows, key=lambda row: row["history_index"], reverse=True)[:int(params["limit"])]
+        headers = {}
+        if "count=" in request.headers.get("prefer", ""):
+            headers["content-range"] = f"0-{max(len(page) - 1, 0)}/{len(rows)}"
+        return httpx.Response(200, json=page, headers=headers)
+
+    def _save(self, body: dict) -> dict:
+        article_id = next(self._ids)
+        article = {
+            **body["p_article"],
+            "id": article_id,
+            "ai_result": [{**body["p_ai_result"], "id": article_id}],
+        }
+        self.articles[article["canonical_url"]] = article
+        self.articles_by_id[article_id] = article
+        self.history.append({
+            "id": article_id,
+            "created_at": article["collected_date"],
+            "history_index": article_id,
+            "input_by_user": body["p_user_id"],
+            "article": article,
+        })
+        return article
+
+
+async def article_site(request: httpx.Request) -> httpx.Response:
+    """Stand-in for article sites: every path is a story"""
+    await asyncio.sleep(SITE_LATENCY)
+    return httpx.Response(200, html=ARTICLE_HTML)
+
+
+def calibrate() -> float:
+    """Median seconds of a fixed CPU workload, to scale baselines to this machine"""
+    timings = []
+    for _ in range(5):
+        start_time = time.perf_counter()
+        sum(i * i for i in range(200_000))
+        json.loads(json.dumps([history_row(i) for i in range(200)]))
+        timings.append(time.perf_counter() - start_time)
+    return statistics.median(timings)
+
+
+@pytest.fixture(scope="module")
+def model():
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        with open(f"{MODEL_DIR}/vectorizer.pkl", "rb") as f:
+            vectorizer = pickle.load(f)
+    rng = np.random.default_rng(0)
+    terms = sorted(vectorizer.vocabulary_)
+    texts = [" ".join(rng.choice(terms, size=200)) for _ in range(40)]
+    classifier = LogisticRegression(max_iter=200).fit(vectorizer.transform(texts), [i % 2 for i in range(40)])
+    return TfidfFeatureExtractor.from_vectorizer(vectorizer), classifier
+
+
+@pytest.fixture(scope="module")
+def stand_ins(model):
+    """Point the app at the local stand-ins for the duration of the module"""
+    vectorizer, classifier = model
+    overrides = dict(app.dependency_overrides)
+    # Other route tests override auth at import time; load tests verify real tokens
+    app.dependency_overrides.clear()
+    supabase = FakeSupabase()
+    with patch.object(settings, 'SUPABASE_URL', SUPABASE_URL), \
+            patch.object(settings, 'SUPABASE_ANON_KEY', "anon-key"), \
+            patch.object(settings, 'SUPABASE_SERVICE_ROLE_KEY', "service-role-key"), \
+            patch.object(supabase_client, 'create_http_client',
+                         partial(supabase_client.create_http_client, httpx.MockTransport(supabase))), \
+            patch('src.services.article_service.article_fetcher', ArticleFetcher(transport=httpx.MockTransport(article_site))), \
+            patch.object(auth_handler, 'verifier', PyJWTVerifier("authenticated", secret=JWT_SECRET)), \
+            patch.object(ArticleService, 'vectorizer', vectorizer), \
+            patch.object(ArticleService, 'model', classifier):
+        yield supabase
+    app.dependency_overrides.update(overrides)
+
+
+@pytest.fixture(scope="module")
+def baselines():
+    data = json.loads(BASELINES_FILE.read_text()) if BASELINES_FILE.exists() else {"scenarios": {}}
+    data["current_calibration_seconds"] = calibrate()
+    yield data
+    if os.getenv("LOAD_TEST_UPDATE_BASELINES") == "1":
+        data["calibration_seconds"] = data.pop("current_calibration_seconds")
+        BASELINES_FILE.write_text(json.dumps(data, indent=2, sort_keys=True) + "\n")
+
+
+async def run_load(make_request, requests: int, concurrency: int) -> dict:
+    """Send `requests` requests, `concurrency` at a time, and summarize their latencies"""
+    limit = asyncio.Semaphore(concurrency)
+    latencies, statuses = [], Counter()
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+        async def one(i):
+            async with limit:
+                start_time = time.perf_counter()
+                response = await make_request(client, i)
+                latencies.append(time.perf_counter() - start_time)
+                statuses[response.status_code] += 1
+
+        start_time = time.perf_counter()
+        await asyncio.gather(*[one(i) for i in range(requests)])
+        elapsed = time.perf_counter() - start_time
+
+    # Connections belong to this run's event loop
+    await supabase_client.aclose()
+    quantiles = statistics.quantiles(latencies, n=100)
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "statuses": dict(statuses),
+        "throughput_rps": round(requests / elapsed, 1),
+        "p50_ms": round(quantiles[49] * 1000, 2),
+        "p99_ms": round(quantiles[98] * 1000, 2),
+    }
+
+
+def check_against_baseline(baselines: dict, name: str, result: dict):
+    max_slowdown = float(os.getenv("LOAD_TEST_MAX_SLOWDOWN", "2.0"))
+    baseline = baselines["scenarios"].get(name)
+    if os.getenv("LOAD_TEST_UPDATE_BASELINES") == "1" or baseline is None:
+        baselines["scenarios"][name] = {"throughput_rps": result["throughput_rps"], "p99_ms": result["p99_ms"]}
+        return
+
+    scale = baselines["current_calibration_seconds"] / baselines["calibration_seconds"]
+    expected_p99 = baseline["p99_ms"] * scale
+    expected_throughput = baseline["throughput_rps"] / scale
+    print(
+        f"\n{name}: {result['throughput_rps']} req/s (baseline {expected_throughput:.1f}), "
+        f"p50 {result['p50_ms']}ms, p99 {result['p99_ms']}ms (baseline {expected_p99:.1f}ms)"
+    )
+    # A few milliseconds of slack, so one scheduler hiccup can't fail sub-millisecond scenarios
+    assert result["p99_ms"] <= expected_p99 * max_slowdown + 5, f"{name} p99 regressed: {result}"
+    assert result["throughput_rps"] >= expected_throughput / max_slowdown, f"{name} throughput regressed: {result}"
+
+
+STORY_IDS = count()
+
+
+def history_requests():
+    headers = {"Authorization": f"Bearer {make_token()}"}
+
+    async def request(client, i):
+        return await client.get("/api/v1/articles/history?limit=50", headers=headers)
+    return request
+
+
+def fresh_token_requests():
+    # A new token per request, so every signature is verified
+    tokens = [make_token(f"user-{i}") for i in range(200)]
+
+    async def request(client, i):
+        return await client.get(
+            "/api/v1/articles/history?limit=1&fields=summary",
+            headers={"Authorization": f"Bearer {tokens[i]}"}
+        )
+    return request
+
+
+def rejected_token_requests():
+    headers = {"Authorization": f"Bearer {make_token(secret='some-other-secret-for-hs256-tokens')}"}
+
+    async def request(client, i):
+        return await client.get("/api/v1/articles/history", headers=headers)
+    return request
+
+
+def article_view_requests():
+    # Repeat views of 20 articles, mostly answered from the article cache
+    headers = {"Authorization": f"Bearer {make_token()}"}
+
+    async def request(client, i):
+        return await client.get(f"/api/v1/articles/{i % 20 + 1}", headers=headers)
+    return request
+
+
+def analyze_requests():
+    headers = {"Authorization": f"Bearer {make_token()}"}
+
+    async def request(client, i):
+        url = f"https://news.example.com/story/{next(STORY_IDS)}"
+        return await client.post("/api/v1/articles/analyze", json={"url": url}, headers=headers)
+    return request
+
+
+def analyze_text_requests():
+    headers = {"Authorization": f"Bearer {make_token()}"}
+    text = " ".join(PARAGRAPHS * 6)
+
+    async def request(client, i):
+        return await client.post("/api/v1/articles/analyze/text", json={"text": text}, headers=headers)
+    return request
+
+
+def batch_requests():
+    headers = {"Authorization": f"Bearer {make_token()}"}
+
+    async def request(client, i):
+        urls = [f"https://news.example.com/story/{next(STORY_IDS)}" for _ in range(10)]
+        return await client.post("/api/v1/articles/analyze/batch", json={"urls": urls}, headers=headers)
+    return request
+
+
+# name: (request factory, requests, concurrency, expected status)
+SCENARIOS = {
+    "history": (history_requests, 200, 20, 200),
+    "auth": (fresh_token_requests, 200, 20, 200),
+    "auth_rejected": (rejected_token_requests, 200, 20, 401),
+    "article_views": (article_view_requests, 400, 20, 200),
+    "analyze": (analyze_requests, 100, 20, 200),
+    "analyze_text": (analyze_text_requests, 200, 20, 200),
+    "batch": (batch_requests, 20, 5, 200),
+}
+
+
+class TestScenarios:
+    """Every scenario once at a small scale, checking responses and not timings"""
+
+    @pytest.mark.parametrize("name", SCENARIOS)
+    def test_responses(self, name, stand_ins):
+        make_request, requests, concurrency, expected_status = SCENARIOS[name]
+        requests = min(requests, 2 * concurrency)
+
+        result = asyncio.run(run_load(make_request(), requests, concurrency))
+
+        assert result["statuses"] == {expected_status: requests}
+
+
+@pytest.mark.load
+class TestLoad:
+    """Timed rounds judged against the baselines; run with ./run_tests.sh --load"""
+
+    @pytest.mark.parametrize("name", SCENARIOS)
+    def test_scenario(self, name, benchmark, stand_ins, baselines):
+        make_request, requests, concurrency, expected_status = SCENARIOS[name]
+        make_request = make_request()
+        rounds = []
+        benchmark.pedantic(
+            lambda: rounds.append(asyncio.run(run_load(make_request, requests, concurrency))),
+            rounds=LOAD_ROUNDS, iterations=1
+        )
+        for result in rounds:
+            assert result["statuses"] == {expected_status: requests}
+
+        # Judge the best round, so one stall of a shared CI runner can't fail the scenario
+        result = min(rounds, key=lambda result: result["p99_ms"])
+        result["throughput_rps"] = max(result["throughput_rps"] for result in rounds)
+        benchmark.extra_info.update(result)
+        check_against_baseline(baselines, name, result)
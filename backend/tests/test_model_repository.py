@@ -0,0 +1,217 @@
+import os
+import pytest
+from unittest.mock import Mock, patch
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from src.config import settings
+from src.lib.lean_model import export_artifacts
+from src.repository.model_repository import (
+    ModelRegistry,
+    get_version_dir,
+    list_versions,
+    read_active_version,
+    read_manifest,
+    verify_version,
+    write_active_version,
+    write_manifest,
+)
+
+
+class TestModelRegistry:
+    
+    def test_load_once(self):
+        registry = ModelRegistry()
+        mock_vectorizer = Mock()
+        mock_model = Mock()
+        
+        with patch('src.repository.model_repository.get_vectorizer', return_value=mock_vectorizer) as get_vectorizer:
+            with patch('src.repository.model_repository.get_model', return_value=mock_model) as get_model:
+                assert registry.get() == (mock_vectorizer, mock_model)
+                assert registry.get() == (mock_vectorizer, mock_model)
+                registry.load()
+                
+                assert get_vectorizer.call_count == 1
+                assert get_model.call_count == 1
+    
+    def test_stats_after_load(self):
+        registry = ModelRegistry()
+        assert registry.stats()["loaded"] is False
+        
+        with patch('src.repository.model_repository.get_vectorizer', return_value=Mock()):
+            with patch('src.repository.model_repository.get_model', return_value=Mock()):
+                stats = registry.load()
+        
+        assert stats["loaded"] is True
+        assert stats["load_seconds"] >= 0
+        assert stats["resident_bytes"] > 0
+        assert stats["pid"] == stats["current_pid"]
+    
+    def test_load_failure_leaves_registry_unloaded(self):
+        registry = ModelRegistry()
+        
+        with patch('src.repository.model_repository.get_vectorizer', side_effect=FileNotFoundError("vectorizer.pkl")):
+            with pytest.raises(FileNotFoundError):
+                registry.load()
+        
+        assert registry.is_loaded is False
+
+
+TEXTS = [
+    "officials confirm the report",
+    "shocking secret cure doctors hate",
+    "agency statement confirms figures",
+    "you won't believe this miracle trick",
+]
+
+
+def export_version(versions_dir, version, labels=(0, 1, 0, 1)):
+    vectorizer = TfidfVectorizer().fit(TEXTS)
+    model = LogisticRegression().fit(vectorizer.transform(TEXTS), list(labels))
+    version_dir = os.path.join(versions_dir, version)
+    export_artifacts(vectorizer, model, version_dir)
+    return write_manifest(version_dir, version)
+
+
+@pytest.fixture
+def versions_dir(tmp_path):
+    with patch.object(settings, 'MODEL_VERSIONS_DIR', str(tmp_path)), \
+            patch.object(settings, 'MODEL_MAX_LOADED_VERSIONS', 2), \
+            patch.object(settings, 'MODEL_MMAP', True):
+        yield str(tmp_path)
+
+
+class TestModelVersions:
+
+    def test_manifest_checksums(self, versions_dir):
+        manifest = export_version(versions_dir, "v1")
+
+        assert manifest["version"] == "v1"
+        assert manifest["format"] == "lean"
+        assert "meta.json" in manifest["files"]
+        assert verify_version("v1") == read_manifest("v1")
+        assert [m["version"] for m in list_versions()] == ["v1"]
+
+    def test_verify_detects_modified_files(self, versions_dir):
+        export_version(versions_dir, "v1")
+        with open(os.path.join(versions_dir, "v1", "coef.npy"), "ab") as f:
+            f.write(b"\0")
+
+        with pytest.raises(ValueError) as exc_info:
+            verify_version("v1")
+        assert "coef.npy" in str(exc_info.value)
+
+    def test_missing_version(self, versions_dir):
+        with pytest.raises(FileNotFoundError):
+            read_manifest("v404")
+
+    @pytest.mark.parametrize("version", ["default", "../model", "", ".hidden", "a/b"])
+    def test_invalid_version_names(self, versions_dir, version):
+        with pytest.raises(ValueError):
+            get_version_dir(version)
+
+    def test_active_pointer(self, versions_dir):
+        assert read_active_version() is None
+        write_active_version("v2")
+        assert read_active_version() == "v2"
+
+
+class TestModelRegistryVersions:
+
+    def test_load_serves_active_version(self, versions_dir):
+        export_version(versions_dir, "v1")
+        write_active_version("v1")
+        registry = ModelRegistry()
+
+        with patch('src.repository.model_repository.get_model') as get_model:
+            stats = registry.load()
+
+        get_model.assert_not_called()
+        assert stats["version"] == "v1"
+        assert stats["format"] == "lean"
+        assert registry.active_version == "v1"
+
+    def test_activate_swaps_and_persists(self, versions_dir):
+        export_version(versions_dir, "v1")
+        export_version(versions_dir, "v2", labels=(1, 0, 1, 0))
+        registry = ModelRegistry()
+        registry.activate("v1")
+        old_vectorizer, old_model = registry.get()
+
+        stats = registry.activate("v2")
+
+        assert stats["version"] == "v2"
+        assert stats["swaps"] == 2
+        assert stats["warm_up_seconds"] >= 0
+        assert read_active_version() == "v2"
+        # Batches that picked up v1 can still be scored with it
+        assert registry.get("v1") == (old_vectorizer, old_model)
+        new_vectorizer, new_model = registry.get()
+        assert new_model.predict_proba(new_vectorizer.transform(TEXTS))[0, 1] > 0.5
+        assert old_model.predict_proba(old_vectorizer.transform(TEXTS))[0, 1] < 0.5
+
+    def test_rollback_to_default_is_persisted(self, versions_dir):
+        export_version(versions_dir, "v2")
+        registry = ModelRegistry()
+
+        with patch('src.repository.model_repository.load_model_files', return_value=(Mock(), Mock(), "pickle")):
+            registry.activate("default")
+            registry.activate("v2")
+            registry.activate("default")
+
+            # What a watcher in another worker, or a restarted worker, would read
+            assert read_active_version() == "default"
+            restarted = ModelRegistry()
+            restarted.load()
+
+        assert registry.active_version == "default"
+        assert restarted.active_version == "default"
+
+    def test_activate_same_version_is_not_a_swap(self, versions_dir):
+        export_version(versions_dir, "v1")
+        registry = ModelRegistry()
+        registry.activate("v1")
+        assert registry.activate("v1")["swaps"] == 1
+
+    def test_activate_without_persist(self, versions_dir):
+        export_version(versions_dir, "v1")
+        registry = ModelRegistry()
+        registry.activate("v1", persist=False)
+        assert registry.active_version == "v1"
+        assert read_active_version() is None
+
+    def test_failed_activation_keeps_serving(self, versions_dir):
+        export_version(versions_dir, "v1")
+        export_version(versions_dir, "v2")
+        os.remove(os.path.join(versions_dir, "v2", "idf.npy"))
+        registry = ModelRegistry()
+        registry.activate("v1")
+
+        with pytest.raises(ValueError):
+            registry.activate("v2")
+
+        assert registry.active_version == "v1"
+        assert read_active_version() == "v1"
+
+    def test_eviction_keeps_active_version(self, versions_dir):
+        for version in ("v1", "v2", "v3"):
+            export_version(versions_dir, version)
+        registry = ModelRegistry()
+        registry.activate("v1")
+        registry.prepare("v2")
+        registry.prepare("v3")
+
+        assert sorted(registry.stats()["loaded_versions"]) == ["v1", "v3"]
+        assert registry.active_version == "v1"
+
+    def test_versions_lists_default_and_exported(self, versions_dir):
+        export_version(versions_dir, "v1")
+        registry = ModelRegistry()
+        registry.activate("v1")
+
+        versions = registry.versions()
+
+        assert versions["active"] == "v1"
+        assert [(v["version"], v["loaded"], v["active"]) for v in versions["versions"]] == [
+            ("default", False, False),
+            ("v1", True, True),
+        ]
@@ -0,0 +1,234 @@
+"""
+Runs the save_analysis / link_analysis / clear_history migrations against a
+real Postgres.
+
+Set TEST_DATABASE_URL to a scratch database (e.g. a local `supabase start`
+or `docker run postgres`) and install psycopg to enable these tests. Each
+test builds the tables it needs in a throwaway schema.
+"""
+import json
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+psycopg = pytest.importorskip("psycopg")
+
+DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+pytestmark = pytest.mark.skipif(
+    not DATABASE_URL,
+    reason="Set TEST_DATABASE_URL to run the SQL function tests"
+)
+
+MIGRATIONS_DIR = Path(__file__).parent.parent / "supabase" / "migrations"
+
+BASE_SCHEMA = '''
+    create table "Article" (
+        id bigint generated by default as identity primary key,
+        url text,
+        title text,
+        source text,
+        collected_date timestamptz
+    );
+    create table "AI Result" (
+        id bigint generated by default as identity primary key,
+        article_id bigint references "Article" (id),
+        genre text,
+        truthness_label text,
+        truthness_score double precision,
+        related_articles jsonb,
+        is_satire boolean
+    );
+    create table "Input History" (
+        id bigint generated by default as identity primary key,
+        created_at timestamptz,
+        history_index bigint,
+        input_by_user uuid,
+        article_id bigint references "Article" (id),
+        ai_result_id bigint references "AI Result" (id)
+    );
+'''
+
+SUPABASE_ROLES = '''
+    do $$
+    begin
+        if not exists (select 1 from pg_roles where rolname = 'anon') then create role anon; end if;
+        if not exists (select 1 from pg_roles where rolname = 'authenticated') then create role authenticated; end if;
+        if not exists (select 1 from pg_roles where rolname = 'service_role') then create role service_role; end if;
+    end
+    $$;
+'''
+
+
+@pytest.fixture
+def schema():
+    name = f"test_{uuid.uuid4().hex[:12]}"
+    with psycopg.connect(DATABASE_URL, autocommit=True) as conn:
+        conn.execute(SUPABASE_ROLES)
+        conn.execute(f'create schema "{name}"')
+        conn.execute(f'set search_path to "{name}"')
+        conn.execute(BASE_SCHEMA)
+        for migration in sorted(MIGRATIONS_DIR.glob("*.sql")):
+            conn.execute(migration.read_text())
+    yield name
+    with psycopg.connect(DATABASE_URL, autocommit=True) as conn:
+        conn.execute(f'drop schema "{name}" cascade')
+
+
+def call(schema, function, *args):
+    with psycopg.connect(DATABASE_URL, autocommit=True) as conn:
+        conn.execute(f'set search_path to "{schema}"')
+        placeholders = ", ".join(["%s"] * len(args))
+        return conn.execute(f"select {function}({placeholders})", args).fetchone()[0]
+
+
+def save(schema, user_id, url, title="Title", function="save_analysis"):
+    article = {"url": url, "canonical_url": url, "title": title, "source": "example.com"}
+    ai_result = {
+        "genre": "Real News",
+        "truthness_label": "Reliable",
+        "truthness_score": 0.9,
+        "related_articles": [],
+        "is_satire": False,
+    }
+    return call(schema, function, user_id, json.dumps(article), json.dumps(ai_result))
+
+
+def history(schema, user_id):
+    with psycopg.connect(DATABASE_URL) as conn:
+        conn.execute(f'set search_path to "{schema}"')
+        rows = conn.execute(
+            'select history_index, article_id from "Input History" where input_by_user = %s order by history_index',
+            (user_id,)
+        ).fetchall()
+    return rows
+
+
+class TestSaveAnalysisSQL:
+
+    def test_save_returns_joined_row(self, schema):
+        user_id = str(uuid.uuid4())
+        result = save(schema, user_id, "https://example.com/story")
+
+        assert result["url"] == "https://example.com/story"
+        assert result["canonical_url"] == "https://example.com/story"
+        assert result["ai_result"][0]["truthness_label"] == "Reliable"
+        assert history(schema, user_id) == [(1, result["id"])]
+
+    def test_save_reuses_article_for_same_canonical_url(self, schema):
+        first_user, second_user = str(uuid.uuid4()), str(uuid.uuid4())
+        first = save(schema, first_user, "https://example.com/story")
+        second = save(schema, second_user, "https://example.com/story")
+
+        assert second["id"] == first["id"]
+        assert second["ai_result"][0]["id"] == first["ai_result"][0]["id"]
+        assert history(schema, second_user) == [(1, first["id"])]
+
+    def test_concurrent_saves_get_distinct_history_indexes(self, schema):
+        user_id = str(uuid.uuid4())
+        urls = [f"https://example.com/story-{i}" for i in range(20)]
+
+        with ThreadPoolExecutor(max_workers=10) as pool:
+            list(pool.map(lambda url: save(schema, user_id, url), urls))
+
+        indexes = [index for index, _ in history(schema, user_id)]
+        assert sorted(indexes) == list(range(1, len(urls) + 1))
+
+    def test_concurrent_saves_of_one_url_share_article(self, schema):
+        users = [str(uuid.uuid4()) for _ in range(10)]
+
+        with ThreadPoolExecutor(max_workers=10) as pool:
+            results = list(pool.map(lambda user_id: save(schema, user_id, "https://example.com/story"), users))
+
+        assert len({result["id"] for result in results}) == 1
+
+    def test_link_does_not_duplicate_history(self, schema):
+        user_id = str(uuid.uuid4())
+        saved = save(schema, user_id, "https://example.com/story")
+
+        call(schema, "link_analysis", user_id, saved["id"], saved["ai_result"][0]["id"])
+
+        assert len(history(schema, user_id)) == 1
+
+    def test_counter_is_seeded_from_existing_history(self, schema):
+        user_id = str(uuid.uuid4())
+        with psycopg.connect(DATABASE_URL, autocommit=True) as conn:
+            conn.execute(f'set search_path to "{schema}"')
+            conn.execute('insert into "History Counter" (user_id, last_index) values (%s, 41)', (user_id,))
+
+        save(schema, user_id, "https://example.com/story")
+
+        assert history(schema, user_id)[0][0] == 42
+
+    def test_submitted_analysis_is_never_reused(self, schema):
+        submitter, other_user = str(uuid.uuid4()), str(uuid.uuid4())
+        submitted = save(schema, submitter, "https://example.com/story", function="save_submitted_analysis")
+        downloaded = save(schema, other_user, "https://example.com/story")
+        resubmitted = save(schema, other_user, "https://example.com/other", function="save_submitted_analysis")
+
+        assert downloaded["id"] != submitted["id"]
+        assert history(schema, submitter) == [(1, submitted["id"])]
+        assert history(schema, other_user) == [(1, downloaded["id"]), (2, resubmitted["id"])]
+
+    def test_clear_history_deletes_only_orphaned_articles(self, schema):
+        user_id, other_user = str(uuid.uuid4()), str(uuid.uuid4())
+        shared = save(schema, user_id, "https://example.com/shared")
+        save(schema, other_user, "https://example.com/shared")
+        private = save(schema, user_id, "https://example.com/private")
+
+        call(schema, "clear_history", user_id)
+
+        with psycopg.connect(DATABASE_URL) as conn:
+            conn.execute(f'set search_path to "{schema}"')
+            article_ids = {row[0] for row in conn.execute('select id from "Article"').fetchall()}
+            result_article_ids = {row[0] for row in conn.execute('select article_id from "AI Result"').fetchall()}
+        assert history(schema, user_id) == []
+        assert history(schema, other_user) == [(1, shared["id"])]
+        assert article_ids == result_article_ids == {shared["id"]}
+        assert private["id"] not in article_ids
+
+    def test_clear_history_without_history(self, schema):
+        call(schema, "clear_history", str(uuid.uuid4()))
+
+    def test_relinking_leaves_no_gap_in_history_indexes(self, schema):
+        user_id = str(uuid.uuid4())
+        first = save(schema, user_id, "https://example.com/first")
+        call(schema, "link_analysis", user_id, first["id"], first["ai_result"][0]["id"])
+        second = save(schema, user_id, "https://example.com/second")
+
+        assert history(schema, user_id) == [(1, first["id"]), (2, second["id"])]
+
+    def test_link_to_cleared_article_returns_null(self, schema):
+        user_id, other_user = str(uuid.uuid4()), str(uuid.uuid4())
+        saved = save(schema, user_id, "https://example.com/story")
+        call(schema, "clear_history", user_id)
+
+        assert call(schema, "link_analysis", other_user, saved["id"], saved["ai_result"][0]["id"]) is None
+        assert history(schema, other_user) == []
+
+    def test_concurrent_clear_and_link_stay_consistent(self, schema):
+        owner = str(uuid.uuid4())
+        linkers = [str(uuid.uuid4()) for _ in range(10)]
+        saved = save(schema, owner, "https://example.com/story")
+        article_id, ai_result_id = saved["id"], saved["ai_result"][0]["id"]
+
+        def run(user_id):
+            if user_id == owner:
+                return call(schema, "clear_history", owner)
+            return call(schema, "link_analysis", user_id, article_id, ai_result_id)
+
+        # Raises if a link and the delete of its article interleave
+        with ThreadPoolExecutor(max_workers=11) as pool:
+            results = list(pool.map(run, linkers[:5] + [owner] + linkers[5:]))
+
+        linked = [user_id for user_id, result in zip(linkers[:5] + [None] + linkers[5:], results) if result]
+        with psycopg.connect(DATABASE_URL) as conn:
+            conn.execute(f'set search_path to "{schema}"')
+            article_exists = conn.execute('select exists (select 1 from "Article" where id = %s)', (article_id,)).fetchone()[0]
+        assert article_exists == bool(linked)
+        for user_id in linked:
+            assert history(schema, user_id) == [(1, article_id)]
+
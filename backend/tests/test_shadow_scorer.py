@@ -0,0 +1,88 @@
+import json
+import threading
+import numpy as np
+import pytest
+from unittest.mock import patch
+from src.services.shadow_scorer import ShadowScorer
+
+
+def drain(scorer, requests):
+    # Shutdown scores everything still queued
+    scorer.shutdown()
+    assert scorer.stats()["requests"] + scorer.stats()["errors"] == requests
+
+
+class TestShadowScorer:
+
+    def test_disabled_without_version(self):
+        scorer = ShadowScorer(lambda texts: [[0.5, 0.5]] * len(texts), version=None, sample_rate=1.0)
+        assert scorer.submit(["text"], [[0.5, 0.5]], 0.01) is False
+        assert scorer.stats()["sampled"] == 0
+
+    def test_logs_comparison(self, tmp_path):
+        log_path = tmp_path / "logs" / "shadow.jsonl"
+        scorer = ShadowScorer(
+            lambda texts: np.array([[0.9, 0.1], [0.3, 0.7], [0.6, 0.4]]),
+            version="v2", sample_rate=1.0, log_path=str(log_path),
+        )
+
+        assert scorer.submit(["a", "b", "c"], [[0.8, 0.2], [0.4, 0.6], [0.2, 0.8]], 0.004, "v1") is True
+        drain(scorer, 1)
+
+        record = json.loads(log_path.read_text())
+        assert record["primary_version"] == "v1"
+        assert record["shadow_version"] == "v2"
+        assert record["items"] == 3
+        assert record["agreements"] == 2
+        assert record["max_abs_difference"] == pytest.approx(0.4)
+        assert record["primary_ms"] == 4.0
+        assert record["latency_delta_ms"] == pytest.approx(record["shadow_ms"] - 4.0, abs=1e-3)
+
+        stats = scorer.stats()
+        assert stats["agreement_rate"] == pytest.approx(2 / 3, abs=1e-4)
+        assert stats["average_primary_ms"] == 4.0
+
+    def test_samples_fraction_of_requests(self):
+        scorer = ShadowScorer(lambda texts: [[0.5, 0.5]] * len(texts), version="v2", sample_rate=0.25, max_queue_size=1000)
+
+        with patch('src.services.shadow_scorer.random.random', side_effect=[0.1, 0.3, 0.5, 0.2]):
+            queued = [scorer.submit(["text"], [[0.5, 0.5]], 0.01) for _ in range(4)]
+        scorer.shutdown()
+
+        assert queued == [True, False, False, True]
+        assert scorer.stats()["sampled"] == 2
+
+    def test_drops_when_queue_is_full(self):
+        release = threading.Event()
+
+        def slow_predict(texts):
+            release.wait(5)
+            return [[0.5, 0.5]] * len(texts)
+
+        scorer = ShadowScorer(slow_predict, version="v2", sample_rate=1.0, max_queue_size=1)
+        try:
+            results = [scorer.submit(["text"], [[0.5, 0.5]], 0.01) for _ in range(5)]
+        finally:
+            release.set()
+            scorer.shutdown()
+
+        # One being scored and one queued at most; the rest never block the caller
+        assert results.count(True) <= 2
+        assert scorer.stats()["dropped"] == results.count(False)
+
+    def test_errors_are_counted_not_raised(self, capsys):
+        def broken(texts):
+            raise RuntimeError("model missing")
+
+        scorer = ShadowScorer(broken, version="v2", sample_rate=1.0)
+        scorer.submit(["text"], [[0.5, 0.5]], 0.01)
+        drain(scorer, 1)
+
+        assert scorer.stats()["errors"] == 1
+        assert "model missing" in capsys.readouterr().out
+
+    def test_shape_mismatch_is_an_error(self):
+        scorer = ShadowScorer(lambda texts: [[1.0, 0.0, 0.0]], version="v2", sample_rate=1.0)
+        scorer.submit(["text"], [[0.5, 0.5]], 0.01)
+        drain(scorer, 1)
+        assert scorer.stats()["errors"] == 1
@@ -0,0 +1,132 @@
+import httpx
+import pytest
+from unittest.mock import patch
+from src.config import settings
+from src.lib import supabase_client
+from src.lib.supabase_client import PoolMetrics, create_http_client
+
+
+class FakeNetworkStream:
+    """Stands in for the httpcore stream of one pooled connection"""
+
+
+def make_transport(streams):
+    """MockTransport that serves each request over the next stream in `streams`"""
+    seen_requests = []
+    stream_iter = iter(streams)
+
+    def handler(request):
+        seen_requests.append(request)
+        return httpx.Response(
+            200,
+            json=[{"id": 1}],
+            extensions={"network_stream": next(stream_iter)}
+        )
+
+    return httpx.MockTransport(handler), seen_requests
+
+
+class TestPoolMetricsTransport:
+
+    @pytest.mark.asyncio
+    async def test_counts_reused_connections(self):
+        first, second = FakeNetworkStream(), FakeNetworkStream()
+        transport, _ = make_transport([first, first, first, second])
+        metrics = PoolMetrics(max_connections=4)
+
+        async with create_http_client(transport, metrics) as client:
+            for _ in range(4):
+                await client.get("https://project.supabase.co/rest/v1/Article")
+
+        stats = metrics.stats()
+        assert stats["requests"] == 4
+        assert stats["connections_opened"] == 2
+        assert stats["connections_reused"] == 2
+        assert stats["reuse_rate"] == 0.5
+
+    @pytest.mark.asyncio
+    async def test_in_flight_released_when_body_is_read(self):
+        transport, _ = make_transport([FakeNetworkStream()])
+        metrics = PoolMetrics(max_connections=4)
+
+        async with create_http_client(transport, metrics) as client:
+            async with client.stream("GET", "https://project.supabase.co/rest/v1/Article") as response:
+                assert metrics.stats()["in_flight"] == 1
+                assert metrics.stats()["utilization"] == 0.25
+                await response.aread()
+
+        stats = metrics.stats()
+        assert stats["in_flight"] == 0
+        assert stats["peak_in_flight"] == 1
+
+    @pytest.mark.asyncio
+    async def test_counts_errors(self):
+        def handler(request):
+            raise httpx.ConnectError("refused")
+
+        metrics = PoolMetrics(max_connections=4)
+
+        async with create_http_client(httpx.MockTransport(handler), metrics) as client:
+            with pytest.raises(httpx.ConnectError):
+                await client.get("https://project.supabase.co/rest/v1/Article")
+
+        stats = metrics.stats()
+        assert stats["errors"] == 1
+        assert stats["in_flight"] == 0
+
+
+class TestGetSupabaseClient:
+
+    @pytest.mark.asyncio
+    async def test_user_clients_share_pool_with_own_jwt(self):
+        connection = FakeNetworkStream()
+        transport, seen_requests = make_transport([connection, connection])
+        metrics = PoolMetrics(max_connections=4)
+        shared_client = create_http_client(transport, metrics)
+
+        with patch.object(supabase_client, 'get_http_client', return_value=shared_client), \
+                patch.object(settings, 'SUPABASE_URL', "https://project.supabase.co"), \
+                patch.object(settings, 'SUPABASE_ANON_KEY', "anon-key"):
+            first = supabase_client.get_supabase_client("jwt-one")
+            second = supabase_client.get_supabase_client("jwt-two")
+            await first.from_('Article').select('id').execute()
+            await second.from_('Article').select('id').execute()
+
+        assert first.session is shared_client
+        assert second.session is shared_client
+        assert [r.headers["Authorization"] for r in seen_requests] == ["Bearer jwt-one", "Bearer jwt-two"]
+        assert all(r.headers["apikey"] == "anon-key" for r in seen_requests)
+        assert str(seen_requests[0].url).startswith("https://project.supabase.co/rest/v1/Article")
+        assert metrics.stats()["connections_reused"] == 1
+
+    @pytest.mark.asyncio
+    async def test_anonymous_client_uses_anon_key(self):
+        transport, seen_requests = make_transport([FakeNetworkStream()])
+        shared_client = create_http_client(transport, PoolMetrics(max_connections=4))
+
+        with patch.object(supabase_client, 'get_http_client', return_value=shared_client), \
+                patch.object(settings, 'SUPABASE_URL', "https://project.supabase.co"), \
+                patch.object(settings, 'SUPABASE_ANON_KEY', "anon-key"):
+            await supabase_client.get_supabase_client().from_('Article').select('id').execute()
+
+        assert seen_requests[0].headers["Authorization"] == "Bearer anon-key"
+
+    @pytest.mark.asyncio
+    async def test_pool_is_reused_within_a_loop(self):
+        await supabase_client.aclose()
+        try:
+            assert supabase_client.get_http_client() is supabase_client.get_http_client()
+        finally:
+            await supabase_client.aclose()
+
+    @pytest.mark.asyncio
+    async def test_admin_client_shares_pool(self):
+        await supabase_client.aclose()
+        try:
+            with patch.object(settings, 'SUPABASE_URL', "https://project.supabase.co"), \
+                    patch.object(settings, 'SUPABASE_SERVICE_ROLE_KEY', "service-key"):
+                admin = supabase_client.get_admin_client()
+                assert supabase_client.get_admin_client() is admin
+                assert admin.options.httpx_client is supabase_client.get_http_client()
+        finally:
+            await supabase_client.aclose()
@@ -0,0 +1,107 @@
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import MagicMock, patch
+from src.lib.timing import StageMetrics, record, request_timings, stage, stage_metrics, timed
+from src.main import app
+from src.middleware.server_timing import format_server_timing
+from src.services.article_service import ArticleService
+
+client = TestClient(app)
+
+
+class TestStageMetrics:
+
+    def test_render_prometheus_histogram(self):
+        metrics = StageMetrics(buckets=(0.01, 0.1))
+        for seconds in (0.005, 0.05, 0.05, 3.0):
+            metrics.observe("fetch", seconds)
+
+        lines = metrics.render().splitlines()
+
+        assert "# TYPE analyze_stage_duration_seconds histogram" in lines
+        assert 'analyze_stage_duration_seconds_bucket{stage="fetch",le="0.01"} 1' in lines
+        assert 'analyze_stage_duration_seconds_bucket{stage="fetch",le="0.1"} 3' in lines
+        assert 'analyze_stage_duration_seconds_bucket{stage="fetch",le="+Inf"} 4' in lines
+        assert 'analyze_stage_duration_seconds_count{stage="fetch"} 4' in lines
+        assert 'analyze_stage_duration_seconds_sum{stage="fetch"} 3.105' in lines
+
+    def test_bucket_bounds_are_inclusive(self):
+        metrics = StageMetrics(buckets=(0.01,))
+        metrics.observe("parse", 0.01)
+        assert 'analyze_stage_duration_seconds_bucket{stage="parse",le="0.01"} 1' in metrics.render()
+
+
+class TestSpans:
+
+    def test_spans_add_up_per_request(self):
+        timings = {}
+        token = request_timings.set(timings)
+        try:
+            with stage("fetch"):
+                pass
+            record("fetch", 0.5)
+            record("save", 0.25)
+        finally:
+            request_timings.reset(token)
+
+        assert timings["fetch"] >= 0.5
+        assert timings["save"] == 0.25
+
+    def test_outside_a_request_only_histograms(self):
+        stage_metrics.reset()
+        record("save", 0.1)
+        assert request_timings.get() is None
+        assert 'stage="save"' in stage_metrics.render()
+
+    @pytest.mark.asyncio
+    async def test_timed_coroutine(self):
+        @timed("lookup")
+        async def lookup():
+            await asyncio.sleep(0.01)
+            return "row"
+
+        timings = {}
+        token = request_timings.set(timings)
+        try:
+            assert await lookup() == "row"
+        finally:
+            request_timings.reset(token)
+
+        assert timings["lookup"] >= 0.01
+
+    @pytest.mark.asyncio
+    async def test_worker_stages_reach_the_request(self):
+        vectorizer, model = MagicMock(), MagicMock()
+        model.predict_proba.return_value = [[0.7, 0.3]]
+        timings = {}
+        token = request_timings.set(timings)
+        try:
+            with patch.object(ArticleService, 'vectorizer', vectorizer), patch.object(ArticleService, 'model', model):
+                await ArticleService.ai_analysis({"title": "Title", "text": "Content"})
+        finally:
+            request_timings.reset(token)
+
+        assert set(timings) == {"inference", "vectorize", "predict"}
+        assert timings["inference"] >= timings["vectorize"] + timings["predict"]
+
+
+class TestServerTiming:
+
+    def test_format(self):
+        header = format_server_timing({"fetch": 0.1824, "parse": 0.0217}, 0.231)
+        assert header == b"fetch;dur=182.4, parse;dur=21.7, total;dur=231.0"
+
+    def test_header_on_responses(self):
+        response = client.get("/healthz")
+        assert response.headers["server-timing"].startswith("total;dur=")
+
+    def test_metrics_endpoint(self):
+        stage_metrics.reset()
+        stage_metrics.observe("fetch", 0.2)
+
+        response = client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert 'analyze_stage_duration_seconds_count{stage="fetch"} 1' in response.text
@@ -0,0 +1,57 @@
+import pytest
+from src.lib.urls import canonicalize_url, normalize_url, resolve_canonical_url
+
+
+class TestCanonicalizeUrl:
+    
+    @pytest.mark.parametrize("url", [
+        "https://example.com/news/story",
+        "http://example.com/news/story",
+        "https://www.example.com/news/story",
+        "https://EXAMPLE.com/news/story/",
+        "https://example.com:443/news/story",
+        "https://example.com/news/story#comments",
+        "https://example.com/news/story?utm_source=twitter&utm_medium=social",
+        "https://example.com/news/story?fbclid=IwAR123&gclid=abc",
+        "https://example.com/news/story/amp",
+        "https://example.com/amp/news/story",
+        "https://amp.example.com/news/story",
+        "https://example.com/news/story?amp=1",
+        "https://example.com/news//story",
+    ])
+    def test_variants_collapse(self, url):
+        assert canonicalize_url(url) == "https://example.com/news/story"
+    
+    def test_amp_html_extension(self):
+        assert canonicalize_url("https://example.com/news/story.amp.html") == "https://example.com/news/story.html"
+    
+    def test_keeps_meaningful_query_sorted(self):
+        assert canonicalize_url("https://example.com/article?p=2&id=7&utm_campaign=x") == "https://example.com/article?id=7&p=2"
+    
+    def test_root_path(self):
+        assert canonicalize_url("https://www.example.com") == "https://example.com/"
+    
+    def test_normalize_url_keeps_query(self):
+        assert normalize_url("HTTPS://Example.com:443/a?utm_source=x#frag") == "https://example.com/a?utm_source=x"
+
+
+class TestResolveCanonicalUrl:
+    
+    def test_prefers_canonical_link(self):
+        result = resolve_canonical_url(
+            "https://example.com/story?id=1",
+            "https://example.com/story?id=1",
+            "/news/2025/story-title"
+        )
+        assert result == "https://example.com/news/2025/story-title"
+    
+    def test_uses_final_url_after_redirect(self):
+        assert resolve_canonical_url("https://t.co/abc", "https://www.example.com/story/") == "https://example.com/story"
+    
+    def test_ignores_cross_site_canonical(self):
+        result = resolve_canonical_url("https://example.com/story", None, "https://other.com/story")
+        assert result == "https://example.com/story"
+    
+    def test_ignores_home_page_canonical(self):
+        result = resolve_canonical_url("https://example.com/story", None, "https://example.com/")
+        assert result == "https://example.com/story"
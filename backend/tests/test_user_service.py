@@ -1,5 +1,7 @@
+import asyncio
 import pytest
 from unittest.mock import Mock, AsyncMock, patch
+from src.services.article_service import article_cache
 from src.services.user_service import UserService
 from fastapi import UploadFile
 
@@ -10,18 +12,18 @@ class TestUserService:
     async def test_upload_avatar_success(self):
         mock_client = Mock()
         mock_storage = Mock()
-        mock_storage.upload.return_value = Mock(error=None)
-        mock_storage.get_public_url.return_value = "https://storage.example.com/avatar.jpg"
+        mock_storage.upload = AsyncMock(return_value=Mock(error=None))
+        mock_storage.get_public_url = AsyncMock(return_value="https://storage.example.com/avatar.jpg")
         
         mock_table = Mock()
         mock_table.update.return_value = mock_table
         mock_table.eq.return_value = mock_table
-        mock_table.execute.return_value = Mock(error=None)
+        mock_table.execute = AsyncMock(return_value=Mock(error=None))
         
         mock_client.storage.from_ = Mock(return_value=mock_storage)
         mock_client.table = Mock(return_value=mock_table)
         
-        with patch('src.services.user_service.supabase_admin_client', mock_client):
+        with patch('src.services.user_service.get_admin_client', return_value=mock_client):
             service = UserService()
             
             mock_file = Mock(spec=UploadFile)
@@ -43,11 +45,11 @@ class TestUserService:
         mock_error.message = "Storage full"
         
         mock_storage = Mock()
-        mock_storage.upload.return_value = Mock(error=mock_error)
+        mock_storage.upload = AsyncMock(return_value=Mock(error=mock_error))
         
         mock_client.storage.from_ = Mock(return_value=mock_storage)
         
-        with patch('src.services.user_service.supabase_admin_client', mock_client):
+        with patch('src.services.user_service.get_admin_client', return_value=mock_client):
             service = UserService()
             
             mock_file = Mock(spec=UploadFile)
@@ -65,8 +67,8 @@ class TestUserService:
     async def test_upload_avatar_database_error(self):
         mock_client = Mock()
         mock_storage = Mock()
-        mock_storage.upload.return_value = Mock(error=None)
-        mock_storage.get_public_url.return_value = "https://storage.example.com/avatar.jpg"
+        mock_storage.upload = AsyncMock(return_value=Mock(error=None))
+        mock_storage.get_public_url = AsyncMock(return_value="https://storage.example.com/avatar.jpg")
         
         mock_error = Mock()
         mock_error.message = "Database connection failed"
@@ -74,12 +76,12 @@ class TestUserService:
         mock_table = Mock()
         mock_table.update.return_value = mock_table
         mock_table.eq.return_value = mock_table
-        mock_table.execute.return_value = Mock(error=mock_error)
+        mock_table.execute = AsyncMock(return_value=Mock(error=mock_error))
         
         mock_client.storage.from_ = Mock(return_value=mock_storage)
         mock_client.table = Mock(return_value=mock_table)
         
-        with patch('src.services.user_service.supabase_admin_client', mock_client):
+        with patch('src.services.user_service.get_admin_client', return_value=mock_client):
             service = UserService()
             
             mock_file = Mock(spec=UploadFile)
@@ -92,3 +94,71 @@ class TestUserService:
                 await service.upload_avatar("user123", mock_file)
             
             assert "Failed to upload avatar" in str(exc_info.value)
+    
+    @pytest.mark.asyncio
+    async def test_delete_account_cleans_up_concurrently(self):
+        started = []
+        both_started = asyncio.Event()
+        
+        async def wait_for_other(name):
+            started.append(name)
+            if len(started) == 2:
+                both_started.set()
+            # Only finishes if the other cleanup step runs at the same time
+            await asyncio.wait_for(both_started.wait(), timeout=1)
+        
+        async def list_files(user_id):
+            await wait_for_other("storage")
+            return [{"name": "a.jpg"}]
+        
+        mock_client = Mock()
+        mock_storage = Mock()
+        mock_storage.list = AsyncMock(side_effect=list_files)
+        mock_storage.remove = AsyncMock()
+        mock_client.storage.from_ = Mock(return_value=mock_storage)
+        mock_client.auth.admin.delete_user = AsyncMock()
+        
+        async def clear(user_id, user_jwt):
+            await wait_for_other("history")
+            return True
+        
+        with patch('src.services.user_service.get_admin_client', return_value=mock_client):
+            with patch('src.services.user_service.article_repository.clear', side_effect=clear) as mock_clear:
+                await UserService().delete_account("user123", "fake_jwt")
+        
+        assert sorted(started) == ["history", "storage"]
+        mock_storage.remove.assert_awaited_once_with(["user123/a.jpg"])
+        mock_clear.assert_called_once_with("user123", "fake_jwt")
+        mock_client.auth.admin.delete_user.assert_awaited_once_with("user123")
+    
+    @pytest.mark.asyncio
+    async def test_delete_account_cleanup_failures_are_not_fatal(self):
+        mock_client = Mock()
+        mock_storage = Mock()
+        mock_storage.list = AsyncMock(side_effect=Exception("Storage down"))
+        mock_client.storage.from_ = Mock(return_value=mock_storage)
+        mock_client.auth.admin.delete_user = AsyncMock()
+        
+        with patch('src.services.user_service.get_admin_client', return_value=mock_client):
+            with patch('src.services.user_service.article_repository.clear', side_effect=Exception("Database error")):
+                await UserService().delete_account("user123", "fake_jwt")
+        
+        mock_client.auth.admin.delete_user.assert_awaited_once_with("user123")
+    
+    @pytest.mark.asyncio
+    async def test_delete_account_invalidates_cached_articles(self):
+        mock_client = Mock()
+        mock_storage = Mock()
+        mock_storage.list = AsyncMock(return_value=[])
+        mock_client.storage.from_ = Mock(return_value=mock_storage)
+        mock_client.auth.admin.delete_user = AsyncMock()
+        article_cache.local.set(("user123", 0, 1), ("cached", 0))
+        article_cache.local.set(("other_user", 0, 1), ("cached", 0))
+        
+        with patch('src.services.user_service.get_admin_client', return_value=mock_client):
+            with patch('src.services.user_service.article_repository.clear', return_value=True):
+                await UserService().delete_account("user123", "fake_jwt")
+        
+        assert article_cache.local.get(("user123", 0, 1)) is None
+        assert article_cache.local.get(("other_user", 0, 1)) is not None
+        article_cache.clear()
@@ -17,9 +17,15 @@ export const articleApi = {
     });
   },
 
-  // Get analysis history
-  getHistory: async () => {
-    return await apiClient('/api/v1/articles/history', {
+  // Get a page of analysis history (newest first)
+  getHistory: async ({ before, limit, fields } = {}) => {
+    const params = new URLSearchParams();
+    if (before) params.set('before', before);
+    if (limit) params.set('limit', limit);
+    if (fields) params.set('fields', fields);
+    const query = params.toString();
+
+    return await apiClient(`/api/v1/articles/history${query ? `?${query}` : ''}`, {
       method: 'GET'
     });
   },
@@ -12,7 +12,15 @@ import {
   HiSortDescending
 } from 'react-icons/hi';
 
-export default function HistoryPanel({ history, isLoading, error, onHistoryChange }) {
+export default function HistoryPanel({
+  history,
+  isLoading,
+  error,
+  onHistoryChange,
+  hasMore,
+  isLoadingMore,
+  onLoadMore
+}) {
   const [selectedArticleId, setSelectedArticleId] = useState(null);
   const [isArticleDetailsOpen, setIsArticleDetailsOpen] = useState(false);
   const [searchQuery, setSearchQuery] = useState('');
@@ -230,6 +238,16 @@ export default function HistoryPanel({ history, isLoading, error, onHistoryChang
         </div>
       )}
 
+      {!error && !isLoading && hasMore && (
+        <button
+          className="load-more-button"
+          onClick={() => onLoadMore?.()}
+          disabled={isLoadingMore}
+        >
+          {isLoadingMore ? 'Loading...' : 'Load more'}
+        </button>
+      )}
+
       <ArticleDetails 
         articleId={selectedArticleId}
         isOpen={isArticleDetailsOpen}
@@ -6,8 +6,19 @@ import HistoryPanel from './HistoryPanel';
 import UserButton from './UserButton';
 import { HiX, HiMenu } from 'react-icons/hi';
 import './styles.css';
+
+// Start loading the next history page this close to the bottom (px)
+const LOAD_MORE_THRESHOLD = 200;
   
-export default function Sidebar({ history, isLoading, error, onHistoryChange }) {
+export default function Sidebar({
+  history,
+  isLoading,
+  error,
+  onHistoryChange,
+  hasMore,
+  isLoadingMore,
+  onLoadMore
+}) {
   const [isOpen, setIsOpen] = useState(true);
   const [isUserMenuOpen, setIsUserMenuOpen] = useState(false);
   const { user, logout } = useAuth();
@@ -17,6 +28,14 @@ export default function Sidebar({ history, isLoading, error, onHistoryChange })
   const toggleUserMenu = () => setIsUserMenuOpen(!isUserMenuOpen);
   const closeUserMenu = () => setIsUserMenuOpen(false);
 
+  const handleContentScroll = (e) => {
+    if (!hasMore || isLoadingMore) return;
+    const { scrollTop, scrollHeight, clientHeight } = e.currentTarget;
+    if (scrollHeight - scrollTop - clientHeight < LOAD_MORE_THRESHOLD) {
+      onLoadMore?.();
+    }
+  };
+
   return (
     <div className={`sidebar ${isOpen ? 'open' : 'closed'}`}>
       <button 
@@ -27,12 +46,15 @@ export default function Sidebar({ history, isLoading, error, onHistoryChange })
         {isOpen ? <HiX size={24} /> : <HiMenu size={24} />}
       </button>
 
-      <div className="sidebar-content">
+      <div className="sidebar-content" onScroll={handleContentScroll}>
         <HistoryPanel 
           history={history}
           isLoading={isLoading}
           error={error}
           onHistoryChange={onHistoryChange}
+          hasMore={hasMore}
+          isLoadingMore={isLoadingMore}
+          onLoadMore={onLoadMore}
         />
       </div>
 
@@ -180,6 +180,37 @@ describe('Sidebar', () => {
     expect(screen.getByText('0 items')).toBeInTheDocument();
   });
 
+  const scrollContentTo = (scrollTop) => {
+    const sidebarContent = document.querySelector('.sidebar-content');
+    Object.defineProperty(sidebarContent, 'scrollHeight', { configurable: true, value: 2000 });
+    Object.defineProperty(sidebarContent, 'clientHeight', { configurable: true, value: 500 });
+    sidebarContent.scrollTop = scrollTop;
+    fireEvent.scroll(sidebarContent);
+  };
+
+  it('loads more history when scrolled near the bottom', () => {
+    const onLoadMore = vi.fn();
+    render(<Sidebar {...defaultProps} hasMore={true} onLoadMore={onLoadMore} />);
+
+    scrollContentTo(100);
+    expect(onLoadMore).not.toHaveBeenCalled();
+
+    scrollContentTo(1400);
+    expect(onLoadMore).toHaveBeenCalledTimes(1);
+  });
+
+  it('does not load more when there is no next page or a page is loading', () => {
+    const onLoadMore = vi.fn();
+    const { rerender } = render(<Sidebar {...defaultProps} hasMore={false} onLoadMore={onLoadMore} />);
+
+    scrollContentTo(1400);
+
+    rerender(<Sidebar {...defaultProps} hasMore={true} isLoadingMore={true} onLoadMore={onLoadMore} />);
+    scrollContentTo(1400);
+
+    expect(onLoadMore).not.toHaveBeenCalled();
+  });
+
   it('sidebar remains functional after multiple toggles', () => {
     render(<Sidebar {...defaultProps} />);
     
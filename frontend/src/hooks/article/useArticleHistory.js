@@ -1,27 +1,59 @@
 import { useState, useEffect, useRef } from 'react';
 import { useAuth } from '../auth/useAuth';
-import { apiClient } from '../../api/client';
+import { articleApi } from '../../api/articles';
 import { createCache, cachedFetch, resetCache } from '../../util/cacheManager.js';
 
-const historyCache = createCache([]);
+// items: the pages loaded so far, newest first
+// nextBefore: history_index cursor of the next page, null once the last page is in
+const EMPTY_HISTORY = { items: [], nextBefore: null };
+
+const historyCache = createCache(EMPTY_HISTORY);
+
+const HISTORY_PAGE_SIZE = 50;
+
+// Load one page of history in the sidebar's summary shape, starting below the cursor.
+async function fetchHistoryPage(before) {
+  const { data: response, error: apiError } = await articleApi.getHistory({
+    before,
+    limit: HISTORY_PAGE_SIZE,
+    fields: 'summary'
+  });
+
+  if (apiError) throw new Error(apiError);
+
+  const items = response?.data || [];
+  // A short page is the last one
+  const nextBefore = items.length < HISTORY_PAGE_SIZE
+    ? null
+    : items[items.length - 1].history_index;
+  return { items, nextBefore };
+}
 
 export function useArticleHistory() {
-  const [history, setHistory] = useState(historyCache.data);
+  const [history, setHistory] = useState(historyCache.data.items);
+  const [nextBefore, setNextBefore] = useState(historyCache.data.nextBefore);
   const [isLoading, setIsLoading] = useState(false);
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
   const [error, setError] = useState(null);
   const { user } = useAuth();
   const hasInitializedRef = useRef(false);
+  const loadingMoreRef = useRef(false);
+
+  const showHistory = (data) => {
+    setHistory(data.items);
+    setNextBefore(data.nextBefore);
+  };
 
   const fetchHistory = async () => {
     if (!user) {
-      setHistory([]);
-      resetCache(historyCache, []);
+      resetCache(historyCache, EMPTY_HISTORY);
+      showHistory(EMPTY_HISTORY);
       hasInitializedRef.current = false;
       return;
     }
 
     if (hasInitializedRef.current) {
-      setHistory(historyCache.data);
+      showHistory(historyCache.data);
       return;
     }
 
@@ -30,18 +62,10 @@ export function useArticleHistory() {
     try {
       await cachedFetch(
         historyCache,
-        async () => {
-          const { data: response, error: apiError } = await apiClient('/api/v1/articles/history', {
-            method: 'GET'
-          });
-
-          if (apiError) throw new Error(apiError);
-          
-          return response?.data || [];
-        },
+        () => fetchHistoryPage(),
         {
           onSuccess: (data) => {
-            setHistory(data);
+            showHistory(data);
             setError(null);
             hasInitializedRef.current = true;
           },
@@ -60,11 +84,37 @@ export function useArticleHistory() {
     fetchHistory();
   }, [user]);
 
+  // Append the next page; called on scroll or from the "Load more" button
+  const loadMore = async () => {
+    const cursor = historyCache.data.nextBefore;
+    if (!user || cursor === null || loadingMoreRef.current) return;
+
+    loadingMoreRef.current = true;
+    setIsLoadingMore(true);
+
+    try {
+      const page = await fetchHistoryPage(cursor);
+      // Drop the page if a refresh replaced the history meanwhile
+      if (historyCache.data.nextBefore !== cursor) return;
+      historyCache.data = {
+        items: historyCache.data.items.concat(page.items),
+        nextBefore: page.nextBefore
+      };
+      showHistory(historyCache.data);
+      setError(null);
+    } catch (err) {
+      setError(err.message || 'Failed to load article history');
+    } finally {
+      loadingMoreRef.current = false;
+      setIsLoadingMore(false);
+    }
+  };
+
   // Manual refresh that clears the cache
   const refreshHistory = async () => {
     hasInitializedRef.current = false;
-    resetCache(historyCache, []);
-    
+    resetCache(historyCache, EMPTY_HISTORY);
+
     try {
       const result = await fetchHistory();
       return result;
@@ -77,7 +127,10 @@ export function useArticleHistory() {
   return {
     history,
     isLoading,
+    isLoadingMore,
+    hasMore: nextBefore !== null,
     error,
-    refreshHistory
+    refreshHistory,
+    loadMore
   };
-}
\ No newline at end of file
+}
@@ -5,7 +5,15 @@ import '../styles/MainPage.css';
 import { useArticleHistory } from '../hooks/article/useArticleHistory';
 
 export default function MainPage() {
-  const { history, isLoading, error, refreshHistory } = useArticleHistory();
+  const {
+    history,
+    isLoading,
+    isLoadingMore,
+    hasMore,
+    error,
+    refreshHistory,
+    loadMore
+  } = useArticleHistory();
   return (
     <div className="main-page">
       <Sidebar
@@ -13,6 +21,9 @@ export default function MainPage() {
         isLoading={isLoading}
         error={error}
         onHistoryChange={refreshHistory}
+        hasMore={hasMore}
+        isLoadingMore={isLoadingMore}
+        onLoadMore={loadMore}
       />
       <div className="content-wrapper">
         <ArticleInput onArticleSubmitted={refreshHistory} history={history} />